@@ -0,0 +1,306 @@
+"""
+Async (ASGI) variant of the chat pipeline.
+
+Serves /chat and /chat/stream with the same behaviour as hello.py, but every
+I/O step is awaited instead of blocking a worker thread: the history read and
+the catalog lookup run concurrently, Mongo goes through PyMongo's
+AsyncMongoClient and the LLM backend's async methods, so one process can
+hold hundreds of in-flight chats. The in-memory pieces (catalog cache,
+retrieval indexes, response caches, model registry) are shared with hello.py.
+
+Run with an ASGI server, e.g.:
+    hypercorn asgi_app:app --bind 0.0.0.0:8002
+"""
+import asyncio
+import json
+import os
+import time
+
+from pymongo import AsyncMongoClient
+from quart import Quart, Response, jsonify, request
+
+import hello
+from conversation_summary import build_history_block
+from circuit_breaker import CircuitOpen
+from concurrency_limit import AsyncConcurrencyLimiter, Overloaded
+from hello import ChatError, build_turn, sse_event, turn_messages
+from llm_backend import LLMTimeout
+from single_flight import AsyncSingleFlight, FlightAborted
+
+app = Quart(__name__)
+app.config['SECRET_KEY'] = hello.app.config['SECRET_KEY']
+
+async_client = AsyncMongoClient(os.getenv('MONGODB_CLIENT'), tlsAllowInvalidCertificates=True)
+async_db = async_client["files"]
+sessions_collection = async_db['sessions']
+messages_collection = async_db['messages']
+
+chat_flight = AsyncSingleFlight()
+# same limits as hello.gemini_limiter, for the coroutines of this event loop
+gemini_limiter = AsyncConcurrencyLimiter(
+    max_concurrent=hello.gemini_limiter.max_concurrent,
+    max_queue=hello.gemini_limiter.max_queue,
+    max_wait=hello.gemini_limiter.max_wait
+)
+
+
+async def get_or_create_default_session(user_id):
+    """create a default chat session per user if not exists"""
+    sid = "default"
+    now = time.time()
+    await sessions_collection.update_one(
+        {"user_id": user_id, "session_id": sid},
+        {"$setOnInsert": {"title": "Default chat", "created_at": now, "updated_at": now}},
+        upsert=True
+    )
+    return sid
+
+
+async def load_history(user_id, session_id):
+    """(rolling summary, last HISTORY_LIMIT messages), from the ring buffer or MongoDB"""
+    cached = hello.history_cache.get_with_summary(user_id, session_id)
+    if cached is not None:
+        return cached
+    cursor = messages_collection.find(
+        {"user_id": user_id, "session_id": session_id},
+        {"_id": 0, "role": 1, "text": 1}
+    ).sort("ts", -1).limit(hello.HISTORY_LIMIT)
+    history, session = await asyncio.gather(
+        cursor.to_list(length=hello.HISTORY_LIMIT),
+        sessions_collection.find_one(
+            {"user_id": user_id, "session_id": session_id}, {"_id": 0, "summary": 1}
+        )
+    )
+    history = list(reversed(history))
+    summary = (session or {}).get("summary", "")
+    hello.history_cache.fill(user_id, session_id, history, summary=summary)
+    return summary, history
+
+
+async def load_catalog():
+    """catalog snapshot; a cache miss reads Mongo, so keep it off the event loop"""
+    try:
+        return await asyncio.to_thread(hello.catalog_cache.get)
+    except Exception as e:
+        raise ChatError(f'Error fetching clubs from database: {str(e)}', 500)
+
+
+async def prepare_chat(data):
+    """STEPS 0-6 with the history and catalog reads running concurrently"""
+    user_message = hello.validate_chat_request(data)
+
+    # STEP 2 — identify the user and pick a session
+    user_id = hello.user_id_from(
+        request.headers.get('Authorization'), request.remote_addr, request.headers.get('User-Agent')
+    )
+    session_id = data.get('session_id', '').strip() or await get_or_create_default_session(user_id)
+
+    # For the starter (no memory yet), keep harmless placeholders (same as hello.py):
+    user_id = "demo-user"
+    session_id = "demo-session"
+
+    # STEPS 3 + 4 — history and catalog at the same time
+    (summary, history), catalog = await asyncio.gather(load_history(user_id, session_id), load_catalog())
+    history_text = build_history_block(summary, history, hello.HISTORY_TOKEN_BUDGET, hello.count_tokens)
+
+    # Starter fallback (no memory yet, same as hello.py):
+    history_text = ""
+
+    turn = build_turn(user_id, session_id, user_message, history_text, catalog)
+    turn['fallback_reason'] = hello.fallback_reason(data)
+    return turn
+
+
+async def persist_turns(user_id, session_id, user_message, bot_response):
+    """STEP 8 — one insert_many plus the session touch, concurrently"""
+    now = time.time()
+    messages = turn_messages(user_id, session_id, user_message, bot_response, now)
+    hello.history_cache.append(user_id, session_id, messages)
+    if hello.write_behind is not None:
+        # non-blocking hand-off to hello.py's background flusher
+        hello.write_behind.submit({
+            'user_id': user_id, 'session_id': session_id, 'messages': messages, 'ts': now
+        })
+    else:
+        await asyncio.gather(
+            messages_collection.insert_many(list(messages), ordered=False),
+            sessions_collection.update_one(
+                {"user_id": user_id, "session_id": session_id},
+                {"$max": {"updated_at": now}},
+                upsert=True
+            )
+        )
+    if hello.session_summarizer is not None:
+        hello.session_summarizer.schedule(user_id, session_id)
+
+
+async def local_answer(turn):
+    """hello.local_answer off the event loop (a catalog cache miss scans Mongo)"""
+    return await asyncio.to_thread(hello.local_answer, turn)
+
+
+async def turn_prefix(turn):
+    """hello.turn_prefix off the event loop (it reads the catalog cache)"""
+    if 'cached_prompt' not in turn:
+        return None
+    return await asyncio.to_thread(hello.turn_prefix, turn)
+
+
+async def generate_answer(turn):
+    """await the LLM for one prepared turn and cache the answer"""
+    # the breaker is shared with hello.py: both apps talk to the same upstream
+    try:
+        with hello.gemini_breaker.guard():
+            async with gemini_limiter.slot(timeout=hello.time_left(turn)):
+                bot_response = await hello.llm.agenerate(
+                    turn['full_prompt'], timeout=hello.time_left(turn), prefix=await turn_prefix(turn)
+                )
+    except LLMTimeout:
+        raise ChatError('The model did not answer in time', 504)
+    if not bot_response:
+        return hello.NO_RESPONSE_TEXT
+    hello.remember_answer(turn, bot_response)
+    return bot_response
+
+
+async def llm_error_answer(turn, e):
+    """hello.llm_error_answer (retrieval answer for an upstream failure, else None) off the event loop"""
+    return await asyncio.to_thread(hello.llm_error_answer, turn, e)
+
+
+def error_response(message, status):
+    return jsonify({'success': False, 'error': message}), status
+
+
+def unavailable_response(e):
+    """fast 503 telling the client when to retry (see hello.unavailable_response)"""
+    body = jsonify({'success': False, 'error': e.message, 'retry_after': e.retry_after})
+    return body, 503, {'Retry-After': str(e.retry_after)}
+
+
+@app.route('/chat', methods=['POST'])
+async def chat():
+    """Async /chat: same request and response shape as hello.chat()"""
+    try:
+        data = await request.get_json()
+        turn = await prepare_chat(data)
+
+        if data.get('stream'):
+            return stream_chat(turn)
+
+        # STEP 7 — routed lookups and response caches, then one Gemini call per
+        #          identical in-flight prompt, or the local club search when
+        #          Gemini is not an option
+        bot_response, source = await local_answer(turn)
+        if bot_response is None:
+            try:
+                bot_response, _ = await chat_flight.do(turn['flight_key'], lambda: generate_answer(turn))
+            except Exception as e:
+                # upstream error or open circuit: the local club search answers
+                bot_response, source = await llm_error_answer(turn, e), 'retrieval'
+                if bot_response is None:
+                    raise
+
+        await persist_turns(turn['user_id'], turn['session_id'], turn['user_message'], bot_response)
+
+        return jsonify({
+            'success': True,
+            'response': bot_response,
+            'session_id': turn['session_id'],
+            'cached': source == 'cache',
+            'source': source,
+            'prompt_tokens': turn['prompt_tokens'],
+            'cached_tokens': turn['cached_tokens']
+        })
+
+    except ChatError as e:
+        return error_response(e.message, e.status)
+    except (Overloaded, CircuitOpen) as e:
+        return unavailable_response(e)
+    except FlightAborted as e:
+        # the request this one was coalesced onto was cancelled
+        return error_response(str(e), 503)
+    except Exception as e:
+        return error_response(f'Unexpected error: {str(e)}', 500)
+
+
+def stream_chat(turn):
+    """SSE stream of LLM chunks; the answer is persisted once complete"""
+    async def generate():
+        try:
+            bot_response, source = await local_answer(turn)
+            if bot_response is not None:
+                yield sse_event({'delta': bot_response})
+            else:
+                parts = []
+                try:
+                    with hello.gemini_breaker.guard():
+                        async with gemini_limiter.slot(timeout=hello.time_left(turn)):
+                            chunks = hello.llm.astream(
+                                turn['full_prompt'], timeout=hello.time_left(turn), prefix=await turn_prefix(turn)
+                            )
+                            async for text in chunks:
+                                parts.append(text)
+                                yield sse_event({'delta': text})
+                except Exception as e:
+                    # fall back unless part of the model's answer was already sent
+                    bot_response = None if parts else await llm_error_answer(turn, e)
+                    if bot_response is None:
+                        raise
+                    source = 'retrieval'
+                    yield sse_event({'delta': bot_response})
+                else:
+                    bot_response = "".join(parts) or hello.NO_RESPONSE_TEXT
+                    if parts:
+                        hello.remember_answer(turn, bot_response)
+
+            await persist_turns(turn['user_id'], turn['session_id'], turn['user_message'], bot_response)
+            yield sse_event({
+                'success': True,
+                'response': bot_response,
+                'session_id': turn['session_id'],
+                'cached': source == 'cache',
+                'source': source,
+                'prompt_tokens': turn['prompt_tokens'],
+                'cached_tokens': turn['cached_tokens']
+            }, event='done')
+        except (Overloaded, CircuitOpen) as e:
+            yield sse_event({'success': False, 'error': e.message, 'retry_after': e.retry_after}, event='error')
+        except ChatError as e:
+            yield sse_event({'success': False, 'error': e.message}, event='error')
+        except LLMTimeout:
+            yield sse_event({'success': False, 'error': 'The model did not answer in time'}, event='error')
+        except Exception as e:
+            yield sse_event({'success': False, 'error': f'Unexpected error: {str(e)}'}, event='error')
+
+    return Response(
+        generate(),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
+@app.route('/chat/stream', methods=['POST'])
+async def chat_stream():
+    """Async counterpart of hello.chat_stream()"""
+    try:
+        turn = await prepare_chat(await request.get_json())
+        return stream_chat(turn)
+    except ChatError as e:
+        return error_response(e.message, e.status)
+    except Exception as e:
+        return error_response(f'Unexpected error: {str(e)}', 500)
+
+
+@app.route('/api/metrics', methods=['GET'])
+async def api_metrics():
+    """hello.py's counters plus the async single-flight stats"""
+    with hello.app.app_context():
+        metrics = json.loads(hello.api_metrics().get_data())
+    metrics['async_single_flight'] = chat_flight.stats()
+    metrics['async_gemini_limiter'] = gemini_limiter.stats()
+    return jsonify(metrics)
+
+
+if __name__ == '__main__':
+    app.run(port=8002)
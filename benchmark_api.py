@@ -0,0 +1,235 @@
+"""
+End-to-end benchmark for the HTTP API.
+
+Boots hello.app in-process against mongomock (an in-memory MongoDB stand-in)
+and the fake LLM backend, seeds synthetic club catalogs built from
+sample_clubs.csv and times requests to the main endpoints through Flask's
+test client. Results (p50/p95/p99 latency and throughput per endpoint and
+catalog size) are printed as a table and written as JSON, so runs can be
+compared for regressions.
+
+    pip install -r requirements-dev.txt
+    python benchmark_api.py --sizes 100,10000 --output bench.json
+
+Needs no MongoDB server and no Gemini key.
+"""
+import argparse
+import csv
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import quote
+
+from club_names import with_name_key
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+DEPARTMENTS = ['CS', 'ECE', 'ME', 'ISYE', 'MATH', 'BIO', 'ARCH', 'BUS']
+CHAT_TOPICS = ['robotics', 'music', 'finance', 'chess', 'film', 'data science',
+               'hiking', 'startups', 'photography', 'debate']
+EMAIL = 'bench@gatech.edu'
+PASSWORD = 'bench-password'
+
+
+def percentile(samples, p):
+    """nearest-rank percentile of a non-empty list"""
+    ordered = sorted(samples)
+    rank = max(1, -(-len(ordered) * p // 100))   # ceil(n * p / 100)
+    return ordered[int(rank) - 1]
+
+
+def summarize(endpoint, size, latencies, errors, elapsed):
+    """one result row; latencies in seconds"""
+    ms = [t * 1000 for t in latencies]
+    return {
+        'endpoint': endpoint,
+        'catalog_size': size,
+        'requests': len(ms),
+        'errors': errors,
+        'p50_ms': round(percentile(ms, 50), 3),
+        'p95_ms': round(percentile(ms, 95), 3),
+        'p99_ms': round(percentile(ms, 99), 3),
+        'mean_ms': round(sum(ms) / len(ms), 3),
+        'max_ms': round(max(ms), 3),
+        'throughput_rps': round(len(ms) / elapsed, 2) if elapsed else 0.0,
+    }
+
+
+def typo(name):
+    """the name with one letter of its first word dropped (a fuzzy-search query)"""
+    word = name.split()[0]
+    return word[:len(word) // 2] + word[len(word) // 2 + 1:] if len(word) > 3 else word
+
+
+def load_sample_clubs(path=os.path.join(HERE, 'sample_clubs.csv')):
+    with open(path, newline='', encoding='utf-8') as f:
+        return list(csv.DictReader(f))
+
+
+def synthetic_clubs(n, sample, seed=0):
+    """n clubs cycling through `sample`, with unique names and analytics fields"""
+    rng = random.Random(seed)
+    clubs = []
+    for i in range(n):
+        base = sample[i % len(sample)]
+        clubs.append({
+            'club_name': f"{base['club_name']} {i}",
+            'link': base['link'],
+            'description': base['description'],
+            'majors': base['majors'],
+            'department': rng.choice(DEPARTMENTS),
+            'members': rng.randint(5, 400),
+            'events_2024': rng.randint(0, 40),
+            'event_attendance_2024': rng.randint(0, 2000),
+        })
+    return clubs
+
+
+def boot():
+    """import hello with mongomock standing in for MongoClient and the fake LLM"""
+    try:
+        import mongomock
+    except ImportError:
+        sys.exit("benchmark_api.py needs mongomock: pip install -r requirements-dev.txt")
+    import pymongo
+
+    os.environ['MONGODB_CLIENT'] = 'mongodb://benchmark'
+    os.environ.setdefault('LLM_BACKEND', 'fake')
+    os.environ.setdefault('FAKE_LLM_LATENCY', '0.05')
+    os.environ.setdefault('FAKE_LLM_TOKENS_PER_SECOND', '2000')
+    # background summarisation would add LLM calls the benchmark didn't ask for
+    os.environ.setdefault('CHAT_SUMMARY', '0')
+    pymongo.MongoClient = mongomock.MongoClient
+    sys.path.insert(0, HERE)
+    import hello
+    return hello
+
+
+def seed(hello, clubs):
+    hello.collection.delete_many({})
+    for start in range(0, len(clubs), 5000):
+        hello.collection.insert_many([with_name_key(dict(c)) for c in clubs[start:start + 5000]])
+    hello.catalog_cache.invalidate()
+    hello.response_cache.clear()
+
+
+def endpoints(clubs):
+    """(label, method, path(i), body(i) or None) for every benchmarked route"""
+    names = [c['club_name'] for c in clubs]
+    return [
+        ('GET /clubs', 'get', lambda i: '/clubs', None),
+        ('GET /clubs?format=ndjson', 'get', lambda i: '/clubs?format=ndjson', None),
+        ('GET /clubs?limit=50', 'get', lambda i: '/clubs?limit=50&fields=club_name,link', None),
+        ('GET /clubs/<name>', 'get', lambda i: f"/clubs/{quote(names[(i * 7919) % len(names)])}", None),
+        ('GET /clubs/<name>?match=fuzzy', 'get',
+         lambda i: f"/clubs/{quote(typo(names[(i * 7919) % len(names)]))}?match=fuzzy", None),
+        ('GET /clubs/suggest', 'get', lambda i: f"/clubs/suggest?q={quote(names[(i * 7919) % len(names)][:1 + i % 4])}", None),
+        ('POST /chat', 'post', lambda i: '/chat',
+         lambda i: {'message': f"I like {CHAT_TOPICS[i % len(CHAT_TOPICS)]}, what clubs fit? ({i})"}),
+        ('POST /auth/login', 'post', lambda i: '/auth/login',
+         lambda i: {'email': EMAIL, 'password': PASSWORD}),
+        ('GET /api/members_by_department', 'get', lambda i: '/api/members_by_department', None),
+        ('GET /api/events_summary', 'get', lambda i: '/api/events_summary', None),
+        ('GET /api/metrics', 'get', lambda i: '/api/metrics', None),
+    ]
+
+
+def run_endpoint(app, method, path, body, requests, concurrency, max_seconds, warmup):
+    """time up to `requests` calls (stopping after max_seconds); returns (latencies, errors, elapsed)"""
+    def call(client, i):
+        started = time.perf_counter()
+        response = getattr(client, method)(path(i), json=body(i) if body else None)
+        return time.perf_counter() - started, response.status_code >= 400
+
+    warm = app.test_client()
+    for i in range(warmup):
+        call(warm, i)
+
+    deadline = time.perf_counter() + max_seconds
+
+    def worker(offset):
+        client = app.test_client()
+        results = []
+        for i in range(offset, requests, concurrency):
+            results.append(call(client, i))
+            if time.perf_counter() > deadline:
+                break
+        return results
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        results = [r for rs in pool.map(worker, range(concurrency)) for r in rs]
+    elapsed = time.perf_counter() - started
+    return [t for t, _ in results], sum(err for _, err in results), elapsed
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=HERE,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the HTTP API in-process")
+    parser.add_argument('--sizes', default='100,10000,100000',
+                        help="comma separated catalog sizes (default 100,10000,100000)")
+    parser.add_argument('--requests', type=int, default=200, help="requests per endpoint and size")
+    parser.add_argument('--concurrency', type=int, default=1, help="client threads")
+    parser.add_argument('--max-seconds', type=float, default=20.0,
+                        help="stop an endpoint early after this long (slow routes on big catalogs)")
+    parser.add_argument('--warmup', type=int, default=3, help="untimed requests per endpoint")
+    parser.add_argument('--endpoints', default='', help="only run endpoints whose label contains one of these (comma separated)")
+    parser.add_argument('--output', help="write the JSON results here (default: stdout)")
+    args = parser.parse_args(argv)
+
+    hello = boot()
+    sample = load_sample_clubs()
+    hello.app.test_client().post('/auth/register', json={'email': EMAIL, 'password': PASSWORD, 'name': 'Bench'})
+    only = [e.strip() for e in args.endpoints.split(',') if e.strip()]
+
+    results = []
+    for size in [int(s) for s in args.sizes.split(',') if s.strip()]:
+        clubs = synthetic_clubs(size, sample)
+        seed(hello, clubs)
+        for label, method, path, body in endpoints(clubs):
+            if only and not any(o in label for o in only):
+                continue
+            latencies, errors, elapsed = run_endpoint(
+                hello.app, method, path, body, args.requests, args.concurrency, args.max_seconds, args.warmup)
+            row = summarize(label, size, latencies, errors, elapsed)
+            results.append(row)
+            print(f"{size:>7} {label:<34} n={row['requests']:<5} p50={row['p50_ms']:>9.2f}ms "
+                  f"p95={row['p95_ms']:>9.2f}ms p99={row['p99_ms']:>9.2f}ms "
+                  f"{row['throughput_rps']:>8.1f} req/s errors={errors}", file=sys.stderr)
+
+    report = {
+        'meta': {
+            'timestamp': datetime.utcnow().isoformat() + 'Z',
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'llm_backend': hello.llm.stats() if hello.llm is not None else None,
+            'requests': args.requests,
+            'concurrency': args.concurrency,
+            'max_seconds': args.max_seconds,
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+    return report
+
+
+if __name__ == '__main__':
+    main()
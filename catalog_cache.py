@@ -0,0 +1,231 @@
+"""
+In-process cache of the club catalog used to ground /chat prompts.
+
+The catalog is loaded once, each club is rendered into its prompt line once,
+and then everything is served from memory until the TTL runs out. Club writes
+patch the cached catalog in place via apply() and forward the change to any
+registered indexes, so a write never forces a full collection scan.
+
+Once the TTL runs out the old snapshot keeps being served while one
+background thread re-reads the collection and rebuilds the indexes, outside
+the lock; the result is swapped in when it is ready (writes applied in the
+meantime are replayed on it).
+"""
+import hashlib
+import threading
+import time
+from itertools import islice
+
+
+def doc_id(club):
+    """stable string key for a club document"""
+    return str(club['_id'])
+
+
+class CatalogSnapshot:
+    """Catalog contents at a given version (treat as read-only)"""
+    __slots__ = ('version', 'clubs', 'lines', 'context', 'loaded_at', '_fingerprint')
+
+    def __init__(self, version, clubs, lines, context, loaded_at):
+        self.version = version          # counted per process: workers disagree
+        self.clubs = clubs          # doc id -> club dict, in catalog order
+        self.lines = lines          # doc id -> pre-rendered prompt line
+        self.context = context      # default block: the first few lines
+        self.loaded_at = loaded_at
+        self._fingerprint = None
+
+    def fingerprint(self):
+        """hash of the rendered catalog: equal across workers for equal contents"""
+        if self._fingerprint is None:
+            h = hashlib.sha256()
+            for i in sorted(self.lines):
+                h.update(i.encode())
+                h.update(b"\0")
+                h.update(self.lines[i].encode())
+                h.update(b"\0")
+            self._fingerprint = h.hexdigest()
+        return self._fingerprint
+
+    def render(self, ids):
+        """join the pre-rendered lines for the given doc ids"""
+        return "\n".join(self.lines[i] for i in ids if i in self.lines)
+
+
+class CatalogCache:
+    """Versioned club catalog cache with TTL refresh and incremental writes"""
+
+    def __init__(self, loader, render_line, ttl=300, default_limit=20):
+        self._loader = loader            # () -> list of club dicts (with _id)
+        self._render_line = render_line  # club dict -> prompt line
+        self.ttl = ttl
+        self.default_limit = default_limit
+        self._lock = threading.Lock()        # guards the snapshot; never held during a load
+        self._load_lock = threading.Lock()   # one collection scan at a time
+        self._snapshot = None
+        self._version = 0
+        self._listeners = []
+        self._pending = None        # writes applied while a load runs, replayed on its result
+        self._refresher = None      # background reload thread, if one is running
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+        self.invalidations = 0
+        self.writes = 0
+
+    def add_listener(self, index):
+        """
+        Keep an index in sync with the catalog. The index must provide
+        build(clubs_by_id), upsert(doc_id, club) and remove(doc_id).
+        """
+        with self._lock:
+            self._listeners.append(index)
+            if self._snapshot is not None:
+                index.build(self._snapshot.clubs)
+
+    def get(self):
+        """
+        Return the current snapshot. An expired one is still returned while a
+        background thread reloads the catalog and rebuilds the indexes (a scan
+        and rebuild of a big catalog takes seconds); only the first load blocks.
+        """
+        with self._lock:
+            snap = self._snapshot
+            if snap is not None:
+                if time.monotonic() - snap.loaded_at < self.ttl:
+                    self.hits += 1
+                elif self._refresher is not None:
+                    self.stale_hits += 1
+                else:
+                    self.misses += 1
+                    self._refresher = threading.Thread(target=self._refresh_in_background,
+                                                       name='catalog-refresh', daemon=True)
+                    self._refresher.start()
+                return snap
+
+        # nothing cached: wait for one load; concurrent callers share it
+        with self._load_lock:
+            with self._lock:
+                if self._snapshot is not None:
+                    self.hits += 1
+                    return self._snapshot
+                self.misses += 1
+            return self._load()
+
+    def _refresh_in_background(self):
+        try:
+            with self._load_lock:
+                self._load()
+        except Exception as e:
+            print(f"⚠ catalog reload failed, serving the cached catalog: {e}")
+        finally:
+            with self._lock:
+                self._refresher = None
+
+    def _load(self):
+        """Read the collection and rebuild the indexes off the lock, then swap in (needs _load_lock)"""
+        with self._lock:
+            self._pending = []
+            invalidations = self.invalidations
+            old = self._snapshot
+            listeners = list(self._listeners)
+        started = time.monotonic()
+        try:
+            clubs = {doc_id(c): c for c in self._loader()}
+            changed = old is None or clubs != old.clubs
+            if changed:
+                lines = {i: self._render_line(c) for i, c in clubs.items()}
+                for index in listeners:
+                    index.build(clubs)
+        except BaseException:
+            with self._lock:
+                self._pending = None
+            raise
+
+        with self._lock:
+            pending, self._pending = self._pending, None
+            if self.invalidations == invalidations:
+                if not changed:
+                    # same catalog (plus any writes already patched into the snapshot)
+                    current = self._snapshot
+                    self._snapshot = self._make_snapshot(current.clubs, current.lines, started)
+                    return self._snapshot
+                for upserted, removed in pending:
+                    self._patch(clubs, lines, upserted, removed)
+                    for index in listeners:
+                        self._notify(index, upserted, removed)
+                self._version += 1
+                self._snapshot = self._make_snapshot(clubs, lines, started)
+                return self._snapshot
+        # invalidated while loading: this read may predate the change, read again
+        return self._load()
+
+    def apply(self, upserted=(), removed=()):
+        """Patch the cached catalog after a club write"""
+        upserted = list(upserted)
+        removed = [str(i) for i in removed]
+        with self._lock:
+            self.writes += 1
+            if self._pending is not None:
+                # a load is running; its result gets this write too
+                self._pending.append((upserted, removed))
+            snap = self._snapshot
+            if snap is None:
+                # nothing loaded yet; the next get() reads the fresh catalog
+                return
+            clubs = dict(snap.clubs)
+            lines = dict(snap.lines)
+            self._patch(clubs, lines, upserted, removed)
+            self._version += 1
+            self._snapshot = self._make_snapshot(clubs, lines, snap.loaded_at)
+            for index in self._listeners:
+                self._notify(index, upserted, removed)
+
+    def _patch(self, clubs, lines, upserted, removed):
+        for i in removed:
+            clubs.pop(i, None)
+            lines.pop(i, None)
+        for club in upserted:
+            i = doc_id(club)
+            clubs[i] = club
+            lines[i] = self._render_line(club)
+
+    @staticmethod
+    def _notify(index, upserted, removed):
+        for i in removed:
+            index.remove(i)
+        for club in upserted:
+            index.upsert(doc_id(club), club)
+
+    def invalidate(self):
+        """Drop the cached catalog; the next get() reloads from the database"""
+        with self._lock:
+            self._snapshot = None
+            self.invalidations += 1
+
+    def _make_snapshot(self, clubs, lines, loaded_at):
+        context = "\n".join(islice(lines.values(), self.default_limit))
+        return CatalogSnapshot(self._version, clubs, lines, context, loaded_at)
+
+    @property
+    def version(self):
+        return self._version
+
+    def stats(self):
+        """Counters for the metrics endpoint"""
+        with self._lock:
+            snap = self._snapshot
+            lookups = self.hits + self.misses + self.stale_hits
+            return {
+                'version': self._version,
+                'hits': self.hits,
+                'misses': self.misses,
+                'stale_hits': self.stale_hits,
+                'hit_rate': round((self.hits + self.stale_hits) / lookups, 4) if lookups else 0.0,
+                'refreshing': self._refresher is not None,
+                'invalidations': self.invalidations,
+                'writes': self.writes,
+                'ttl_seconds': self.ttl,
+                'cached': snap is not None,
+                'club_count': len(snap.clubs) if snap else 0,
+                'age_seconds': round(time.monotonic() - snap.loaded_at, 3) if snap else None,
+            }
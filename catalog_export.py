@@ -0,0 +1,43 @@
+"""
+Streaming export of the club catalog.
+
+GET /clubs?format=ndjson (one JSON object per line) and
+GET /clubs?format=json-array (one JSON array) write clubs out while the
+Mongo cursor is still being read, batch_size documents at a time, instead of
+building the whole list and a single JSON string in memory. Peak memory is
+one batch, whatever the catalog size.
+"""
+import json
+
+FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'json-array': 'application/json',
+}
+
+
+def _dumps(doc):
+    return json.dumps(doc, default=str, ensure_ascii=False)
+
+
+def export_chunks(docs, fmt, batch=500):
+    """text chunks (about `batch` clubs each) serializing `docs` as `fmt`"""
+    if fmt not in FORMATS:
+        raise ValueError(f"format must be one of: {', '.join(FORMATS)}")
+    array = fmt == 'json-array'
+    if array:
+        yield '['
+    pending, first = [], True
+    for doc in docs:
+        doc.pop('_id', None)
+        if array:
+            pending.append(_dumps(doc) if first else ',' + _dumps(doc))
+        else:
+            pending.append(_dumps(doc) + '\n')
+        first = False
+        if len(pending) >= batch:
+            yield ''.join(pending)
+            pending = []
+    if pending:
+        yield ''.join(pending)
+    if array:
+        yield ']'
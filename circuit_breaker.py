@@ -0,0 +1,140 @@
+"""
+Circuit breaker for the upstream LLM.
+
+While Gemini is healthy the breaker is closed and calls go through. After
+failure_threshold consecutive failures, or when at least failure_rate of the
+last `window` calls failed, it opens: calls are refused immediately with
+CircuitOpen instead of tying up a worker until the SDK times out. After
+reset_timeout seconds it goes half-open and lets a few trial calls through;
+a success closes it again, a failure re-opens it.
+"""
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpen(Exception):
+    """The breaker is refusing calls; retry after `retry_after` seconds"""
+
+    def __init__(self, message, retry_after=1):
+        super().__init__(message)
+        self.message = message
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """closed -> open -> half-open state machine around a flaky dependency"""
+
+    def __init__(self, failure_threshold=5, failure_rate=0.5, window=20,
+                 reset_timeout=30, half_open_calls=1, is_failure=None):
+        self.failure_threshold = failure_threshold
+        self.failure_rate = failure_rate
+        self.window = window
+        self.reset_timeout = reset_timeout
+        self.half_open_calls = half_open_calls
+        self._is_failure = is_failure or (lambda e: True)   # exception -> counts against the upstream?
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._trials = 0
+        self._consecutive = 0
+        self._recent = deque(maxlen=window)   # True for each failed call
+        self.successes = 0
+        self.failures = 0
+        self.rejected = 0
+        self.opened = 0
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._current()
+
+    def _current(self):
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._state = HALF_OPEN
+            self._trials = 0
+        return self._state
+
+    def allow(self):
+        """Claim permission for one call; raises CircuitOpen"""
+        with self._lock:
+            state = self._current()
+            if state == CLOSED:
+                return
+            if state == HALF_OPEN and self._trials < self.half_open_calls:
+                self._trials += 1
+                return
+            self.rejected += 1
+            retry_after = max(1, int(self._opened_at + self.reset_timeout - time.monotonic() + 0.999))
+        raise CircuitOpen('The chat service is temporarily unavailable', retry_after)
+
+    def success(self):
+        with self._lock:
+            self.successes += 1
+            self._consecutive = 0
+            self._recent.append(False)
+            if self._state == HALF_OPEN:
+                self._state = CLOSED
+                self._recent.clear()
+
+    def failure(self):
+        with self._lock:
+            self.failures += 1
+            self._consecutive += 1
+            self._recent.append(True)
+            if self._state == HALF_OPEN or self._tripped():
+                self._open()
+
+    def ignore(self):
+        """The claimed call ended without telling us anything about the upstream"""
+        with self._lock:
+            if self._state == HALF_OPEN and self._trials:
+                self._trials -= 1
+
+    def _tripped(self):
+        if self._consecutive >= self.failure_threshold:
+            return True
+        return len(self._recent) == self.window and sum(self._recent) >= self.failure_rate * self.window
+
+    def _open(self):
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+        self._consecutive = 0
+        self._recent.clear()
+        self.opened += 1
+
+    @contextmanager
+    def guard(self):
+        """allow() on entry, then record how the block went"""
+        self.allow()
+        try:
+            yield
+        except BaseException as e:
+            if isinstance(e, Exception) and self._is_failure(e):
+                self.failure()
+            else:
+                self.ignore()
+            raise
+        self.success()
+
+    def call(self, fn):
+        with self.guard():
+            return fn()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'state': self._current(),
+                'successes': self.successes,
+                'failures': self.failures,
+                'rejected': self.rejected,
+                'opened': self.opened,
+                'recent_failure_rate': round(sum(self._recent) / len(self._recent), 4) if self._recent else 0.0,
+                'failure_threshold': self.failure_threshold,
+                'reset_timeout_seconds': self.reset_timeout,
+            }
@@ -0,0 +1,88 @@
+"""
+Indexed club name lookups.
+
+Name lookups used to filter with an unanchored case-insensitive $regex,
+which cannot use an index (every lookup scanned the collection) and treated
+user input as a regular expression. Each club now also stores its name in
+normalized form (casefolded, whitespace collapsed) in NAME_FIELD, kept up to
+date on every write and indexed, so:
+
+- exact:    {NAME_FIELD: key}                   index point lookup
+- prefix:   {NAME_FIELD: {$gte: key, $lt: ...}} index range scan
+- contains: escaped regex on NAME_FIELD         still a scan, kept for old clients
+
+CLUB_NAME_COLLATION=1 serves exact lookups from a case-insensitive collation
+index on club_name instead (MongoDB only; mongomock ignores collations).
+"""
+import re
+
+from pymongo import UpdateOne
+from pymongo.collation import Collation
+
+NAME_FIELD = 'club_name_key'
+MATCH_MODES = ('exact', 'prefix', 'contains')
+
+# strength 2: compare ignoring case (but not accents)
+CASE_INSENSITIVE = Collation(locale='en', strength=2)
+
+_SPACE_RE = re.compile(r"\s+")
+
+
+def normalize_name(name):
+    """casefolded, whitespace-collapsed club name ('' for missing names)"""
+    if not isinstance(name, str):
+        return ''
+    return _SPACE_RE.sub(' ', name.casefold()).strip()
+
+
+def with_name_key(club):
+    """set NAME_FIELD on a club document about to be written; returns it"""
+    if 'club_name' in club:
+        club[NAME_FIELD] = normalize_name(club['club_name'])
+    return club
+
+
+def _prefix_end(key):
+    """smallest string greater than every string starting with `key`"""
+    return key[:-1] + chr(ord(key[-1]) + 1)
+
+
+def name_filter(name, mode='exact'):
+    """Mongo filter for clubs whose name matches `name` under `mode`"""
+    if mode not in MATCH_MODES:
+        raise ValueError(f"unknown match mode: {mode}")
+    key = normalize_name(name)
+    if not key:
+        raise ValueError('club name is empty')
+    if mode == 'exact':
+        return {NAME_FIELD: key}
+    if mode == 'prefix':
+        return {NAME_FIELD: {'$gte': key, '$lt': _prefix_end(key)}}
+    return {NAME_FIELD: {'$regex': re.escape(key)}}
+
+
+def find_by_name(collection, name, mode='exact', projection=None, collation=False):
+    """cursor over the clubs matching `name`"""
+    if collation and mode == 'exact':
+        key = _SPACE_RE.sub(' ', name).strip()
+        return collection.find({'club_name': key}, projection, collation=CASE_INSENSITIVE)
+    return collection.find(name_filter(name, mode), projection)
+
+
+def ensure_indexes(collection, collation=False):
+    collection.create_index(NAME_FIELD)
+    if collation:
+        collection.create_index('club_name', collation=CASE_INSENSITIVE, name='club_name_ci')
+
+
+def backfill(collection, batch=1000):
+    """set NAME_FIELD on clubs written before it existed; returns how many"""
+    ops, done = [], 0
+    for club in collection.find({NAME_FIELD: {'$exists': False}}, {'club_name': 1}):
+        ops.append(UpdateOne({'_id': club['_id']}, {'$set': {NAME_FIELD: normalize_name(club.get('club_name'))}}))
+        if len(ops) >= batch:
+            done += collection.bulk_write(ops, ordered=False).modified_count
+            ops = []
+    if ops:
+        done += collection.bulk_write(ops, ordered=False).modified_count
+    return done
@@ -0,0 +1,158 @@
+"""
+Concurrency limiting for upstream LLM calls.
+
+At most max_concurrent calls run at once; up to max_queue more callers wait
+(for at most max_wait seconds) for a free slot. Anyone beyond that is turned
+away immediately with Overloaded, which the chat routes map to a 503 with a
+Retry-After hint, instead of letting a burst hit the Gemini rate limit and
+fail every request together. ConcurrencyLimiter is for threads,
+AsyncConcurrencyLimiter for coroutines on one event loop.
+"""
+import asyncio
+import math
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+
+
+class Overloaded(Exception):
+    """No slot available: the wait queue is full or the wait timed out"""
+
+    def __init__(self, message, retry_after=1):
+        super().__init__(message)
+        self.message = message
+        self.retry_after = retry_after
+
+
+class _LimiterStats:
+    def __init__(self, max_concurrent, max_queue, max_wait):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.active = 0
+        self.waiting = 0
+        self.peak_waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait_seen = 0.0
+        self.avg_hold = 0.0      # moving average of how long a slot is held
+
+    def _admitted(self, waited):
+        self.admitted += 1
+        self.total_wait += waited
+        self.max_wait_seen = max(self.max_wait_seen, waited)
+
+    def _released(self, held):
+        self.avg_hold = held if not self.avg_hold else 0.9 * self.avg_hold + 0.1 * held
+
+    def retry_after(self):
+        """seconds until the current queue has likely drained (at least 1)"""
+        drain = (self.waiting + 1) * (self.avg_hold or 1.0) / self.max_concurrent
+        return max(1, math.ceil(drain))
+
+    def stats(self):
+        return {
+            'active': self.active,
+            'queue_depth': self.waiting,
+            'peak_queue_depth': self.peak_waiting,
+            'max_concurrent': self.max_concurrent,
+            'max_queue': self.max_queue,
+            'admitted': self.admitted,
+            'rejected': self.rejected,
+            'timeouts': self.timeouts,
+            'avg_wait_ms': round(1000 * self.total_wait / self.admitted, 2) if self.admitted else 0.0,
+            'max_wait_ms': round(1000 * self.max_wait_seen, 2),
+            'avg_hold_ms': round(1000 * self.avg_hold, 2),
+        }
+
+
+class ConcurrencyLimiter(_LimiterStats):
+    """Semaphore with a bounded, time-limited wait queue (threads)"""
+
+    def __init__(self, max_concurrent=8, max_queue=32, max_wait=10.0):
+        super().__init__(max_concurrent, max_queue, max_wait)
+        self._cond = threading.Condition()
+
+    @contextmanager
+    def slot(self, timeout=None):
+        """Hold one slot for the duration of the block; raises Overloaded"""
+        self.acquire(timeout)
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(time.monotonic() - start)
+
+    def acquire(self, timeout=None):
+        """timeout caps max_wait, e.g. to what is left of the request's deadline"""
+        start = time.monotonic()
+        with self._cond:
+            if self.active >= self.max_concurrent or self.waiting:
+                if self.waiting >= self.max_queue:
+                    self.rejected += 1
+                    raise Overloaded('Too many chat requests in progress', self.retry_after())
+                self.waiting += 1
+                self.peak_waiting = max(self.peak_waiting, self.waiting)
+                deadline = start + (self.max_wait if timeout is None else min(self.max_wait, timeout))
+                try:
+                    while self.active >= self.max_concurrent:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self.timeouts += 1
+                            raise Overloaded('Timed out waiting for a free chat slot', self.retry_after())
+                        self._cond.wait(remaining)
+                finally:
+                    self.waiting -= 1
+            self.active += 1
+            self._admitted(time.monotonic() - start)
+
+    def release(self, held=0.0):
+        with self._cond:
+            self.active -= 1
+            self._released(held)
+            self._cond.notify()
+
+    def stats(self):
+        with self._cond:
+            return super().stats()
+
+
+class AsyncConcurrencyLimiter(_LimiterStats):
+    """asyncio counterpart of ConcurrencyLimiter"""
+
+    def __init__(self, max_concurrent=8, max_queue=32, max_wait=10.0):
+        super().__init__(max_concurrent, max_queue, max_wait)
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+
+    @asynccontextmanager
+    async def slot(self, timeout=None):
+        start = time.monotonic()
+        if self._semaphore.locked():
+            if self.waiting >= self.max_queue:
+                self.rejected += 1
+                raise Overloaded('Too many chat requests in progress', self.retry_after())
+            self.waiting += 1
+            self.peak_waiting = max(self.peak_waiting, self.waiting)
+            try:
+                await asyncio.wait_for(
+                    self._semaphore.acquire(),
+                    self.max_wait if timeout is None else min(self.max_wait, timeout)
+                )
+            except asyncio.TimeoutError:
+                self.timeouts += 1
+                raise Overloaded('Timed out waiting for a free chat slot', self.retry_after())
+            finally:
+                self.waiting -= 1
+        else:
+            await self._semaphore.acquire()
+        self.active += 1
+        self._admitted(time.monotonic() - start)
+        held_from = time.monotonic()
+        try:
+            yield
+        finally:
+            self.active -= 1
+            self._released(time.monotonic() - held_from)
+            self._semaphore.release()
@@ -0,0 +1,112 @@
+"""
+Gemini context caching for the static part of the chat prompt.
+
+The preamble, the club catalog and the instructions are the same for every
+chat request until the catalog changes, so they are uploaded once as a
+cached-content handle and each request sends only its own history and
+message. PrefixCache keeps one handle per catalog version, builds the
+prefix lazily, and refreshes the handle shortly before its server-side TTL
+runs out. When a handle cannot be created (caching unsupported for the
+model, prefix below the minimum size, API error) it returns None and the
+caller sends the plain prompt; creation is then not retried for a while.
+"""
+import threading
+import time
+
+
+class _Entry:
+    __slots__ = ('version', 'handle', 'model', 'created_at')
+
+    def __init__(self, version, handle, model, created_at):
+        self.version = version
+        self.handle = handle
+        self.model = model
+        self.created_at = created_at
+
+
+class PrefixCache:
+    """One cached-content handle (and model bound to it) per catalog version"""
+
+    def __init__(self, create, bind, ttl=3600, retry_after=300, delete=None):
+        self._create = create          # (prefix text, ttl seconds) -> handle
+        self._bind = bind              # handle -> model that generates on top of it
+        self._delete = delete          # handle -> None, for superseded handles
+        self.ttl = ttl
+        self.retry_after = retry_after
+        self._lock = threading.Lock()
+        self._entry = None
+        self._creating = False
+        self._retry_at = 0.0
+        self.hits = 0
+        self.creates = 0
+        self.failures = 0
+        self.fallbacks = 0
+
+    def model_for(self, version, build_prefix):
+        """
+        The model bound to the cached prefix for `version`, or None when the
+        caller should send the plain prompt. build_prefix() is only called
+        when a new handle has to be created.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entry
+            # refresh at 90% of the TTL so a request never hits an expired handle
+            if entry is not None and entry.version == version and now - entry.created_at < self.ttl * 0.9:
+                self.hits += 1
+                return entry.model
+            if self._creating or now < self._retry_at:
+                # another thread is uploading, or the last attempt failed recently
+                self.fallbacks += 1
+                return None
+            self._creating = True
+
+        try:
+            handle = self._create(build_prefix(), self.ttl)
+            model = self._bind(handle)
+        except Exception as e:
+            with self._lock:
+                self._creating = False
+                self._retry_at = time.monotonic() + self.retry_after
+                self.failures += 1
+                self.fallbacks += 1
+            print(f"⚠ context cache unavailable, sending plain prompts: {e}")
+            return None
+
+        with self._lock:
+            old, self._entry = self._entry, _Entry(version, handle, model, time.monotonic())
+            self._creating = False
+            self.creates += 1
+        if old is not None:
+            self._discard(old.handle)
+        return model
+
+    def invalidate(self, version=None):
+        """Forget the handle (e.g. it expired server-side); the next call recreates it"""
+        with self._lock:
+            old = self._entry
+            if old is None or (version is not None and old.version != version):
+                return
+            self._entry = None
+        self._discard(old.handle)
+
+    def _discard(self, handle):
+        if self._delete is None:
+            return
+        try:
+            self._delete(handle)
+        except Exception:
+            pass   # it expires on its own
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.creates + self.fallbacks
+            return {
+                'version': self._entry.version if self._entry is not None else None,
+                'hits': self.hits,
+                'creates': self.creates,
+                'failures': self.failures,
+                'fallbacks': self.fallbacks,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'ttl_seconds': self.ttl,
+            }
@@ -0,0 +1,147 @@
+"""
+Rolling conversation summaries for long chat sessions.
+
+Only the last few messages of a session go into the prompt verbatim. As
+older turns age out of that window, SessionSummarizer folds them into a
+running summary stored on the session document (sessions_collection), in a
+background thread so the response path never waits for it. The prompt then
+gets the summary plus as many of the most recent messages as fit in the
+history token budget (build_history_block).
+"""
+import queue
+import threading
+import time
+
+
+def estimate_tokens(text):
+    """cheap token estimate (~4 characters per token)"""
+    return (len(text) + 3) // 4
+
+
+def format_message(message):
+    return f"{message['role'].title()}: {message['text']}"
+
+
+def build_history_block(summary, messages, budget, count_tokens=estimate_tokens):
+    """
+    Summary first, then the newest messages that still fit in `budget` tokens
+    (kept in chronological order). The summary is trimmed if it alone is too big.
+    """
+    parts = []
+    used = 0
+    if summary:
+        header = "Summary of earlier conversation: "
+        summary_tokens = count_tokens(header + summary)
+        if summary_tokens > budget // 2:
+            # never let the summary crowd out the recent turns entirely
+            summary = summary[:max(0, (budget // 2) * 4 - len(header))].rstrip() + "…"
+            summary_tokens = count_tokens(header + summary)
+        parts.append(header + summary)
+        used += summary_tokens
+
+    recent = []
+    for message in reversed(messages):
+        line = format_message(message)
+        cost = count_tokens(line) + 1
+        if used + cost > budget:
+            break
+        recent.append(line)
+        used += cost
+    parts.extend(reversed(recent))
+    return "\n".join(parts)
+
+
+def extractive_summary(previous, messages, max_chars=1200):
+    """
+    Offline summary: keep what the user asked about, newest last, within
+    max_chars. Used when no LLM is configured.
+    """
+    asks = [m['text'].strip() for m in messages if m['role'] == 'user' and m['text'].strip()]
+    text = (previous + " " if previous else "") + " ".join(f"User asked: {a}." for a in asks)
+    return text if len(text) <= max_chars else "…" + text[-max_chars:]
+
+
+class SessionSummarizer:
+    """Background worker that folds aged-out messages into the session summary"""
+
+    def __init__(self, sessions_collection, messages_collection, summarize,
+                 window=8, min_batch=4, on_update=None):
+        self.sessions = sessions_collection
+        self.messages = messages_collection
+        self._summarize = summarize      # (previous summary, [messages]) -> new summary
+        self.window = window             # messages kept verbatim, never summarised
+        self.min_batch = min_batch       # aged-out messages needed to bother the LLM
+        self._on_update = on_update      # (user_id, session_id, summary) -> None
+        self._queue = queue.Queue()
+        self._pending = set()
+        self._lock = threading.Lock()
+        self.runs = 0
+        self.updates = 0
+        self.failures = 0
+        self._thread = threading.Thread(target=self._run, name='session-summarizer', daemon=True)
+        self._thread.start()
+
+    def schedule(self, user_id, session_id):
+        """Ask for a summary refresh; cheap and safe to call after every turn"""
+        key = (user_id, session_id)
+        with self._lock:
+            if key in self._pending:
+                return
+            self._pending.add(key)
+        self._queue.put(key)
+
+    def _run(self):
+        while True:
+            key = self._queue.get()
+            with self._lock:
+                self._pending.discard(key)
+            try:
+                self.update(*key)
+            except Exception as e:
+                self.failures += 1
+                print(f"⚠ session summary failed for {key}: {e}")
+
+    def update(self, user_id, session_id):
+        """Summarise messages that have left the verbatim window; returns the summary"""
+        self.runs += 1
+        session = self.sessions.find_one(
+            {"user_id": user_id, "session_id": session_id},
+            {"summary": 1, "summary_through": 1}
+        ) or {}
+        through = session.get("summary_through")
+        query = {"user_id": user_id, "session_id": session_id}
+        if through is not None:
+            query["ts"] = {"$gt": through}
+        newer = list(self.messages.find(
+            query, {"_id": 0, "role": 1, "text": 1, "ts": 1}
+        ).sort("ts", 1))
+        aged_out = newer[:max(0, len(newer) - self.window)]
+        if len(aged_out) < self.min_batch:
+            return session.get("summary", "")
+
+        summary = self._summarize(session.get("summary", ""), aged_out)
+        # only lands if no other worker advanced the summary in the meantime
+        result = self.sessions.update_one(
+            {"user_id": user_id, "session_id": session_id, "summary_through": through},
+            {"$set": {
+                "summary": summary,
+                "summary_through": aged_out[-1]["ts"],
+                "summary_updated_at": time.time()
+            }}
+        )
+        if not result.matched_count:
+            return session.get("summary", "")
+        self.updates += 1
+        if self._on_update is not None:
+            self._on_update(user_id, session_id, summary)
+        return summary
+
+    def stats(self):
+        return {
+            'queued': self._queue.qsize(),
+            'runs': self.runs,
+            'updates': self.updates,
+            'failures': self.failures,
+            'window': self.window,
+            'min_batch': self.min_batch,
+        }
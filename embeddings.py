@@ -0,0 +1,197 @@
+"""
+Local dense-embedding search over the club catalog.
+
+EmbeddingIndex keeps one L2-normalised vector per club in a contiguous NumPy
+matrix and answers a query with a single matrix-vector product plus
+argpartition. When given a path, the matrix is written to an .npy file and
+memory-mapped copy-on-write, so every worker that loads the same catalog
+shares the pages and only the rows it changes are copied. The file name
+carries the catalog fingerprint (clubs.npy -> clubs.<fingerprint>.npy) and
+appears in one atomic rename, so a worker can never map a matrix built for
+another catalog while others are writing theirs.
+
+Embedders are pluggable: anything with a ``dim`` attribute and an
+``embed(texts) -> float32 array of shape (len(texts), dim)`` method works.
+HashingEmbedder is deterministic and needs no model files, so it runs
+offline and in tests.
+"""
+import glob
+import hashlib
+import importlib
+import os
+import threading
+
+import numpy as np
+
+from retrieval import club_field_text, tokenize
+
+
+class HashingEmbedder:
+    """Feature-hashing embedder over words, word pairs and character trigrams"""
+
+    name = 'hashing'
+
+    def __init__(self, dim=256):
+        self.dim = dim
+
+    def _features(self, text):
+        words = tokenize(text)
+        feats = list(words)
+        feats += [f"{a} {b}" for a, b in zip(words, words[1:])]
+        for w in words:
+            padded = f"#{w}#"
+            feats += [padded[i:i + 3] for i in range(len(padded) - 2)]
+        return feats
+
+    def embed(self, texts):
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feat in self._features(text):
+                h = int.from_bytes(hashlib.blake2b(feat.encode(), digest_size=8).digest(), 'little')
+                out[row, h % self.dim] += 1.0 if (h >> 63) & 1 else -1.0
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        np.divide(out, norms, out=out, where=norms > 0)
+        return out
+
+
+EMBEDDERS = {
+    'hashing': HashingEmbedder,
+}
+
+
+def get_embedder(spec='hashing'):
+    """Build an embedder from a registered name or a 'module:factory' path"""
+    if spec in EMBEDDERS:
+        return EMBEDDERS[spec]()
+    module_name, _, attr = spec.partition(':')
+    if not attr:
+        raise ValueError(f"Unknown embedder '{spec}'")
+    return getattr(importlib.import_module(module_name), attr)()
+
+
+def club_text(club):
+    """the text a club is embedded from"""
+    return " ".join(club_field_text(club, f) for f in ('club_name', 'description', 'majors'))
+
+
+class EmbeddingIndex:
+    """Club vectors in one matrix, with incremental upsert/remove"""
+
+    def __init__(self, embedder, path=None, batch_size=512):
+        self.embedder = embedder
+        self.path = path
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        self._matrix = np.zeros((0, embedder.dim), dtype=np.float32)
+        self._ids = []     # row -> doc id
+        self._rows = {}    # doc id -> row
+
+    def _embed_all(self, texts):
+        if not texts:
+            return np.zeros((0, self.embedder.dim), dtype=np.float32)
+        return np.vstack([
+            self.embedder.embed(texts[i:i + self.batch_size])
+            for i in range(0, len(texts), self.batch_size)
+        ]).astype(np.float32, copy=False)
+
+    def _fingerprint(self, ids, texts):
+        h = hashlib.sha1(f"{getattr(self.embedder, 'name', type(self.embedder).__name__)}:{self.embedder.dim}".encode())
+        for did, text in zip(ids, texts):
+            h.update(did.encode())
+            h.update(b'\0')
+            h.update(text.encode())
+            h.update(b'\0')
+        return h.hexdigest()
+
+    def _mapped_path(self, fingerprint):
+        root, ext = os.path.splitext(self.path)
+        return f"{root}.{fingerprint[:16]}{ext or '.npy'}"
+
+    def _load_mapped(self, fingerprint):
+        """Map a matrix another worker already wrote for this exact catalog"""
+        try:
+            return np.load(self._mapped_path(fingerprint), mmap_mode='c')
+        except (OSError, ValueError):
+            return None
+
+    def _save_mapped(self, matrix, fingerprint):
+        path = self._mapped_path(fingerprint)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp.npy"
+        mapped = np.lib.format.open_memmap(tmp, mode='w+', dtype=np.float32, shape=matrix.shape)
+        mapped[:] = matrix
+        mapped.flush()
+        del mapped
+        # same fingerprint, same matrix: racing writers replace it with equal bytes
+        os.replace(tmp, path)
+        root, ext = os.path.splitext(self.path)
+        for old in glob.glob(f"{glob.escape(root)}.{'[0-9a-f]' * 16}{ext or '.npy'}"):
+            if old != path:
+                try:
+                    os.remove(old)   # workers still mapping it keep their pages
+                except OSError:
+                    pass
+        return np.load(path, mmap_mode='c')
+
+    def build(self, clubs_by_id):
+        """Replace the index contents with the given {doc_id: club} mapping"""
+        ids = list(clubs_by_id)
+        texts = [club_text(clubs_by_id[i]) for i in ids]
+        matrix = None
+        if self.path:
+            fingerprint = self._fingerprint(ids, texts)
+            matrix = self._load_mapped(fingerprint)
+            if matrix is None:
+                matrix = self._save_mapped(self._embed_all(texts), fingerprint)
+        else:
+            matrix = self._embed_all(texts)
+        with self._lock:
+            self._matrix = matrix
+            self._ids = ids
+            self._rows = {did: row for row, did in enumerate(ids)}
+
+    def upsert(self, did, club):
+        vec = self.embedder.embed([club_text(club)])[0]
+        with self._lock:
+            row = self._rows.get(did)
+            if row is None:
+                row = len(self._ids)
+                if row == self._matrix.shape[0]:
+                    # grow geometrically; this leaves the shared mapping
+                    grown = np.zeros((max(16, row * 2), self.embedder.dim), dtype=np.float32)
+                    grown[:row] = self._matrix[:row]
+                    self._matrix = grown
+                self._ids.append(did)
+                self._rows[did] = row
+            self._matrix[row] = vec
+
+    def remove(self, did):
+        with self._lock:
+            row = self._rows.pop(did, None)
+            if row is None:
+                return
+            last = len(self._ids) - 1
+            if row != last:
+                # keep rows contiguous: move the last vector into the hole
+                moved = self._ids[last]
+                self._matrix[row] = self._matrix[last]
+                self._ids[row] = moved
+                self._rows[moved] = row
+            self._ids.pop()
+
+    def __len__(self):
+        return len(self._ids)
+
+    def search(self, query, k=10, min_score=0.0):
+        """Return up to k (doc_id, cosine score) pairs, best first"""
+        q = self.embedder.embed([query])[0]
+        with self._lock:
+            n = len(self._ids)
+            if n == 0 or k <= 0:
+                return []
+            scores = self._matrix[:n] @ q
+            if k < n:
+                top = np.argpartition(-scores, k - 1)[:k]
+            else:
+                top = np.arange(n)
+            top = top[np.argsort(-scores[top], kind='stable')]
+            return [(self._ids[i], float(scores[i])) for i in top if scores[i] > min_score]
@@ -0,0 +1,61 @@
+"""
+Retrieval-only chat answers.
+
+When Gemini is not configured, its circuit breaker is open, or the client
+asks for {"mode": "fast"}, the chat routes answer from a local keyword
+search over the club catalog instead: the best matching clubs are formatted
+into a fixed template. No network call, deterministic, a few milliseconds.
+"""
+import threading
+
+NO_MATCH_TEXT = (
+    "I couldn't find any clubs matching that. Try a club name, an interest "
+    "(for example robotics or music) or your major."
+)
+
+
+def render_club(club):
+    line = f"- {club.get('club_name', 'Unknown')}"
+    if club.get('description'):
+        line += f": {club['description']}"
+    majors = club.get('majors')
+    if majors:
+        if isinstance(majors, (list, tuple)):
+            majors = ", ".join(str(m) for m in majors)
+        line += f" (Majors: {majors})"
+    if club.get('link'):
+        line += f" {club['link']}"
+    return line
+
+
+def render_answer(clubs, intro="Here are some clubs that match what you asked about:"):
+    """templated answer listing `clubs` (best first)"""
+    if not clubs:
+        return NO_MATCH_TEXT
+    return "\n".join([intro, ""] + [render_club(c) for c in clubs])
+
+
+class FallbackResponder:
+    """Answer chat messages from a local club search instead of the LLM"""
+
+    def __init__(self, search, limit=5):
+        self._search = search   # (message, k) -> club dicts, best first
+        self.limit = limit
+        self._lock = threading.Lock()
+        self.answers = {}       # reason -> count
+        self.no_match = 0
+
+    def answer(self, message, reason):
+        clubs = self._search(message, self.limit)
+        with self._lock:
+            self.answers[reason] = self.answers.get(reason, 0) + 1
+            self.no_match += not clubs
+        return render_answer(clubs)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'answers': sum(self.answers.values()),
+                'by_reason': dict(self.answers),
+                'no_match': self.no_match,
+            }
@@ -0,0 +1,166 @@
+"""
+Typo-tolerant club name search.
+
+GET /clubs/<name>?match=fuzzy finds "Robotics Club" for "robtics". Scoring
+every club with an edit distance would be a full scan per query, so
+TrigramIndex keeps an inverted index from character trigrams (of each
+word, padded with spaces) to club names:
+
+1. candidates: names sharing the most trigrams with the query, counted over
+   the query's rarer trigrams only (a gram like "clu" is in half the catalog
+   and says little);
+2. re-rank: bounded Levenshtein distance between the query and the best
+   matching run of words in each candidate name; anything further than
+   max_distance edits away is dropped.
+
+The index is a CatalogCache listener, updated incrementally on club writes.
+"""
+import threading
+from collections import Counter
+
+from club_names import normalize_name
+
+
+def trigrams(text):
+    """padded character trigrams of each word of a normalized text"""
+    grams = set()
+    for word in text.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def bounded_levenshtein(a, b, limit):
+    """edit distance between a and b, or limit + 1 once it must exceed limit"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i] + [0] * len(b)
+        for j, cb in enumerate(b, 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return min(previous[-1], limit + 1)
+
+
+def name_distance(query, name, limit):
+    """smallest distance between the query and the whole name or any same-length run of its words"""
+    best = bounded_levenshtein(query, name, limit)
+    words, n = name.split(), len(query.split())
+    for i in range(len(words) - n + 1):
+        if best == 0:
+            break
+        best = min(best, bounded_levenshtein(query, " ".join(words[i:i + n]), min(best, limit)))
+    return best
+
+
+def default_max_distance(query):
+    """one edit per three characters, between 1 and 3"""
+    return min(3, max(1, len(query) // 3))
+
+
+class TrigramIndex:
+    """Fuzzy club name lookup: trigram candidates, edit-distance re-ranking"""
+
+    def __init__(self, limit=10, candidates=200, common_share=0.05):
+        self.limit = limit
+        self.candidates = candidates        # names re-ranked per query
+        self.common_share = common_share    # grams in more names than this share are skipped
+        self._lock = threading.Lock()
+        self._postings = {}     # trigram -> set of name keys
+        self._names = {}        # name key -> {doc_id: club}
+        self._key_of = {}       # doc_id -> name key
+        self.queries = 0
+        self.candidates_scored = 0
+        self.misses = 0
+
+    # ---- catalog listener ----
+    def build(self, clubs_by_id):
+        # index into a scratch instance so queries keep the old index meanwhile
+        fresh = TrigramIndex()
+        for did, club in clubs_by_id.items():
+            fresh._add(did, club)
+        with self._lock:
+            self._postings, self._names, self._key_of = fresh._postings, fresh._names, fresh._key_of
+
+    def upsert(self, did, club):
+        with self._lock:
+            self._remove(did)
+            self._add(did, club)
+
+    def remove(self, did):
+        with self._lock:
+            self._remove(did)
+
+    def _add(self, did, club):
+        key = normalize_name(club.get('club_name'))
+        if not key:
+            return
+        self._key_of[did] = key
+        clubs = self._names.setdefault(key, {})
+        if not clubs:
+            for gram in trigrams(key):
+                self._postings.setdefault(gram, set()).add(key)
+        clubs[did] = club
+
+    def _remove(self, did):
+        key = self._key_of.pop(did, None)
+        if key is None:
+            return
+        clubs = self._names.get(key, {})
+        clubs.pop(did, None)
+        if clubs:
+            return
+        self._names.pop(key, None)
+        for gram in trigrams(key):
+            names = self._postings.get(gram)
+            if names is not None:
+                names.discard(key)
+                if not names:
+                    del self._postings[gram]
+
+    # ---- queries ----
+    def _candidates(self, grams):
+        """name keys sharing the most (informative) trigrams with the query"""
+        ranked = sorted((len(self._postings.get(g, ())), g) for g in grams)
+        ranked = [(df, g) for df, g in ranked if df]
+        cutoff = max(50, int(len(self._names) * self.common_share))
+        useful = [g for df, g in ranked if df <= cutoff] or [g for _, g in ranked[:3]]
+        overlap = Counter()
+        for gram in useful:
+            overlap.update(self._postings[gram])
+        return [key for key, _ in overlap.most_common(self.candidates)]
+
+    def search(self, query, limit=None, max_distance=None):
+        """clubs whose name is within max_distance edits of the query, closest first"""
+        text = normalize_name(query)
+        limit = limit or self.limit
+        if not text:
+            return []
+        if max_distance is None:
+            max_distance = default_max_distance(text)
+        with self._lock:
+            self.queries += 1
+            keys = self._candidates(trigrams(text))
+            self.candidates_scored += len(keys)
+            scored = []
+            for key in keys:
+                distance = name_distance(text, key, max_distance)
+                if distance <= max_distance:
+                    scored.append((distance, len(key), key))
+            scored.sort()
+            clubs = [c for _, _, key in scored for c in self._names[key].values()][:limit]
+            self.misses += not clubs
+            return clubs
+
+    def stats(self):
+        with self._lock:
+            return {
+                'names': len(self._names),
+                'trigrams': len(self._postings),
+                'queries': self.queries,
+                'avg_candidates': round(self.candidates_scored / self.queries, 1) if self.queries else 0.0,
+                'no_match': self.misses,
+            }
@@ -1,13 +1,35 @@
-from flask import Flask, jsonify, request, render_template
-from pymongo import MongoClient
+from flask import Flask, jsonify, request, render_template, render_template_string, Response, stream_with_context
+from pymongo import MongoClient, UpdateOne
 from functools import wraps
 import pandas as pd
 import os
+import json
 from dotenv import load_dotenv
 import google.generativeai as genai
 import jwt
+import bcrypt
 from datetime import datetime, timedelta
 import time, uuid, hashlib   # <-- added for session + memory
+from catalog_cache import CatalogCache
+from model_registry import ModelRegistry
+from response_cache import ResponseCache, SemanticResponseCache, cache_key
+from single_flight import SingleFlight, MongoFlightLock, FlightAborted
+from write_behind import WriteBehindQueue
+from history_cache import HistoryCache
+from conversation_summary import SessionSummarizer, build_history_block, extractive_summary
+from retrieval import BM25Index, reciprocal_rank_fusion
+from prompt_assembly import PromptAssembler, Section, get_token_counter
+from context_cache import PrefixCache
+from concurrency_limit import ConcurrencyLimiter, Overloaded
+from circuit_breaker import CircuitBreaker, CircuitOpen
+from fallback_answer import FallbackResponder
+from intent_router import IntentRouter
+from llm_backend import FakeBackend, GeminiBackend, LLMTimeout, Prefix
+import pagination
+from catalog_export import FORMATS as EXPORT_FORMATS, export_chunks
+import club_names
+from suggest import SuggestIndex
+from fuzzy_search import TrigramIndex
 
 # Load environment variables
 load_dotenv()
@@ -15,6 +37,9 @@ load_dotenv()
 app = Flask(__name__)
 app.config['SECRET_KEY'] = os.getenv('JWT_SECRET_KEY', 'your-secret-key-change-in-production')
 
+# CLUB_NAME_COLLATION=1: exact name lookups use a case-insensitive collation index
+CLUB_NAME_COLLATION = os.getenv('CLUB_NAME_COLLATION', '0') == '1'
+
 # MongoDB connection with error handling
 try:
     mongodb_client = os.getenv('MONGODB_CLIENT')
@@ -29,6 +54,11 @@ try:
     # create indexes for speed (optional safe)
     sessions_collection.create_index([("user_id", 1), ("updated_at", -1)])
     messages_collection.create_index([("user_id", 1), ("session_id", 1), ("ts", 1)])
+    collection.create_index(pagination.SORT)   # keyset pages of GET /clubs
+    club_names.ensure_indexes(collection, CLUB_NAME_COLLATION)   # name lookups
+    backfilled = club_names.backfill(collection)
+    if backfilled:
+        print(f"✓ Added normalized names to {backfilled} clubs")
     print("✓ MongoDB connection successful")
 except Exception as e:
     print(f"✗ MongoDB connection error: {e}")
@@ -46,23 +76,193 @@ if gemini_key and gemini_key != 'your_gemini_api_key_here':
         print("⚠ Chat feature may not work without valid Gemini API key")
         GEMINI_AVAILABLE = False
 else:
-    print("⚠ Gemini API key not set - chat feature will not work")
+    print("⚠ Gemini API key not set - chat will answer from the local club search only")
     GEMINI_AVAILABLE = False
 
+# Model settings (optional .env overrides)
+GEMINI_MODEL = os.getenv('GEMINI_MODEL', 'gemini-2.0-flash')
+GEMINI_GENERATION_CONFIG = {
+    'temperature': float(os.environ['GEMINI_TEMPERATURE']) if os.getenv('GEMINI_TEMPERATURE') else None,
+    'max_output_tokens': int(os.environ['GEMINI_MAX_OUTPUT_TOKENS']) if os.getenv('GEMINI_MAX_OUTPUT_TOKENS') else None,
+}
+
+# one GenerativeModel per (name, config), shared by every request and thread
+model_registry = ModelRegistry(
+    lambda name, config: genai.GenerativeModel(name, generation_config=config or None)
+)
+
+def get_chat_model():
+    """the shared Gemini model used by /chat"""
+    return model_registry.get(GEMINI_MODEL, **GEMINI_GENERATION_CONFIG)
+
+if GEMINI_AVAILABLE:
+    get_chat_model()   # build it at startup, off the request path
+
+# GEMINI_CONTEXT_CACHE=1 uploads the static prompt prefix (preamble + catalog)
+# once per catalog version with Gemini context caching; each request then
+# sends only its history and message. Falls back to plain prompts if the
+# model or prefix size does not support caching, and for catalogs whose
+# prefix is over GEMINI_CONTEXT_CACHE_MAX_TOKENS (those use the top-k prompt).
+prefix_cache = None
+CONTEXT_CACHE_MAX_TOKENS = int(os.getenv('GEMINI_CONTEXT_CACHE_MAX_TOKENS', '100000'))
+if GEMINI_AVAILABLE and os.getenv('GEMINI_CONTEXT_CACHE', '0') == '1':
+    GEMINI_CACHE_MODEL = os.getenv('GEMINI_CONTEXT_CACHE_MODEL', GEMINI_MODEL)
+    prefix_cache = PrefixCache(
+        create=lambda prefix, ttl: genai.caching.CachedContent.create(
+            model=GEMINI_CACHE_MODEL if GEMINI_CACHE_MODEL.startswith('models/') else f'models/{GEMINI_CACHE_MODEL}',
+            system_instruction=prefix,
+            ttl=timedelta(seconds=ttl)
+        ),
+        bind=lambda handle: genai.GenerativeModel.from_cached_content(
+            handle,
+            generation_config={k: v for k, v in GEMINI_GENERATION_CONFIG.items() if v is not None} or None
+        ),
+        delete=lambda handle: handle.delete(),
+        ttl=float(os.getenv('GEMINI_CONTEXT_CACHE_TTL', '3600'))
+    )
+
+# LLM_BACKEND=gemini (default) | fake: an offline stand-in with simulated
+# latency, token rate and error rate, for load and soak tests
+LLM_BACKEND = os.getenv('LLM_BACKEND', 'gemini').lower()
+if LLM_BACKEND == 'fake':
+    llm = FakeBackend(
+        latency=float(os.getenv('FAKE_LLM_LATENCY', '0.2')),
+        tokens_per_second=float(os.getenv('FAKE_LLM_TOKENS_PER_SECOND', '50')),
+        error_rate=float(os.getenv('FAKE_LLM_ERROR_RATE', '0')),
+        reply_tokens=int(os.getenv('FAKE_LLM_REPLY_TOKENS', '40'))
+    )
+elif GEMINI_AVAILABLE:
+    llm = GeminiBackend(get_chat_model, prefix_cache)
+else:
+    llm = None   # chat answers from the local club search only
+
+NO_RESPONSE_TEXT = 'I could not generate a response.'
+
+# repeated questions are answered from memory (RESPONSE_CACHE_MAX_BYTES=0 disables)
+response_cache = ResponseCache(
+    max_bytes=int(os.getenv('RESPONSE_CACHE_MAX_BYTES', str(8 * 1024 * 1024))),
+    ttl=float(os.getenv('RESPONSE_CACHE_TTL', '3600'))
+)
+# include the conversation history in the cache key (safer, fewer hits)
+RESPONSE_CACHE_KEY_HISTORY = os.getenv('RESPONSE_CACHE_KEY_HISTORY', '1') == '1'
+
+# optional paraphrase-tolerant layer behind the exact cache (SEMANTIC_CACHE=1)
+semantic_cache = None
+if os.getenv('SEMANTIC_CACHE', '0') == '1':
+    from embeddings import get_embedder
+    semantic_cache = SemanticResponseCache(
+        get_embedder(os.getenv('CHAT_EMBEDDER', 'hashing')),
+        capacity=int(os.getenv('SEMANTIC_CACHE_SIZE', '1024')),
+        threshold=float(os.getenv('SEMANTIC_CACHE_THRESHOLD', '0.9')),
+        ttl=float(os.getenv('RESPONSE_CACHE_TTL', '3600'))
+    )
+
+def cached_answer(turn):
+    """exact cache first, then the semantic cache (if enabled)"""
+    answer = response_cache.get(turn['cache_key'], turn['catalog_version'])
+    if answer is None and semantic_cache is not None:
+        answer = semantic_cache.get(turn['user_message'], turn['catalog_version'], scope=turn['cache_scope'])
+    return answer
+
+def remember_answer(turn, answer):
+    """store a fresh Gemini answer in every enabled cache"""
+    response_cache.put(turn['cache_key'], answer, turn['catalog_version'])
+    if semantic_cache is not None:
+        semantic_cache.put(turn['user_message'], answer, turn['catalog_version'], scope=turn['cache_scope'])
+
+# concurrent identical prompts share one Gemini call; CHAT_SINGLE_FLIGHT_MONGO=1
+# also coalesces across workers through a lease document in MongoDB
+chat_flight = SingleFlight(
+    distributed=MongoFlightLock(
+        db['chat_flights'],
+        lease=float(os.getenv('CHAT_SINGLE_FLIGHT_LEASE', '30'))
+    ) if os.getenv('CHAT_SINGLE_FLIGHT_MONGO', '0') == '1' else None
+)
+
+def turn_prefix(turn):
+    """the turn's cacheable static prompt prefix (see static_prefix), or None"""
+    if 'cached_prompt' not in turn:
+        return None
+    catalog = catalog_cache.get()
+    if catalog.version != turn['catalog_version']:
+        return None   # catalog changed under this turn; its plain prompt is still right
+    def used():
+        # the request went out as the short prompt on top of the cached prefix
+        turn['prompt_tokens'] = turn['cached_prompt_tokens']
+        turn['cached_tokens'] = static_prefix_tokens(catalog)
+    return Prefix(catalog.version, lambda: static_prefix(catalog), turn['cached_prompt'], used)
+
+# at most GEMINI_MAX_CONCURRENCY Gemini calls per worker; up to GEMINI_QUEUE_SIZE
+# more wait GEMINI_QUEUE_TIMEOUT seconds for a slot, anyone else gets a 503
+gemini_limiter = ConcurrencyLimiter(
+    max_concurrent=int(os.getenv('GEMINI_MAX_CONCURRENCY', '8')),
+    max_queue=int(os.getenv('GEMINI_QUEUE_SIZE', '32')),
+    max_wait=float(os.getenv('GEMINI_QUEUE_TIMEOUT', '10'))
+)
+
+# seconds a chat request may spend in total, queueing for a slot included
+CHAT_TIMEOUT = float(os.getenv('CHAT_TIMEOUT', '30'))
+
+def counts_against_llm(e):
+    """upstream trouble trips the breaker; our own refusals and bad requests do not"""
+    if isinstance(e, (ChatError, Overloaded, CircuitOpen, FlightAborted)):
+        return False
+    return llm.is_failure(e)
+
+# stop calling Gemini for GEMINI_BREAKER_RESET seconds once it keeps failing
+gemini_breaker = CircuitBreaker(
+    failure_threshold=int(os.getenv('GEMINI_BREAKER_FAILURES', '5')),
+    failure_rate=float(os.getenv('GEMINI_BREAKER_FAILURE_RATE', '0.5')),
+    window=int(os.getenv('GEMINI_BREAKER_WINDOW', '20')),
+    reset_timeout=float(os.getenv('GEMINI_BREAKER_RESET', '30')),
+    is_failure=counts_against_llm
+)
+
+def waiter_error(e):
+    """a leader's failure as the requests coalesced onto it should see it"""
+    if isinstance(e, LLMTimeout):
+        return ChatError('The model did not answer in time', 504)
+    if not isinstance(e, Exception):
+        # the leader's client went away (GeneratorExit) or the worker is stopping
+        return ChatError('The request was cancelled', 503)
+    return e
+
+def time_left(turn):
+    """seconds until the turn's deadline; a 504 ChatError once it has passed"""
+    remaining = turn['deadline'] - time.monotonic()
+    if remaining <= 0:
+        raise ChatError('The chat request timed out', 504)
+    return remaining
+
+def generate_answer(turn):
+    """call the LLM for one prepared turn and cache the answer"""
+    try:
+        with gemini_breaker.guard(), gemini_limiter.slot(timeout=time_left(turn)):
+            bot_response = llm.generate(turn['full_prompt'], timeout=time_left(turn), prefix=turn_prefix(turn))
+    except LLMTimeout:
+        raise ChatError('The model did not answer in time', 504)
+    if not bot_response:
+        return NO_RESPONSE_TEXT
+    remember_answer(turn, bot_response)
+    return bot_response
+
 
 # ================== MEMORY UTILITIES (new section) ==================
-def get_user_id():
-    """generate stable id from ip+ua or jwt"""
-    token = request.headers.get('Authorization')
+def user_id_from(token, remote_addr, user_agent):
+    """stable id from a jwt bearer token, else from ip+ua"""
     if token and token.startswith('Bearer '):
         try:
             data = jwt.decode(token[7:], app.config['SECRET_KEY'], algorithms=['HS256'])
             return f"email:{data['email']}"
         except Exception:
             pass
-    raw = (request.remote_addr or '') + (request.user_agent.string or '')
+    raw = (remote_addr or '') + (user_agent or '')
     return "anon:" + hashlib.sha256(raw.encode()).hexdigest()[:32]
 
+def get_user_id():
+    """generate stable id from ip+ua or jwt"""
+    return user_id_from(request.headers.get('Authorization'), request.remote_addr, request.user_agent.string)
+
 def get_or_create_default_session(user_id):
     """create a default chat session per user if not exists"""
     sid = "default"
@@ -76,6 +276,108 @@ def get_or_create_default_session(user_id):
             "updated_at": time.time()
         })
     return sid
+HISTORY_LIMIT = 8   # messages of short-term memory per prompt
+
+# recent messages of active sessions, kept in memory by the chat route
+history_cache = HistoryCache(
+    max_messages=HISTORY_LIMIT,
+    max_sessions=int(os.getenv('HISTORY_CACHE_SESSIONS', '10000')),
+    max_bytes=int(os.getenv('HISTORY_CACHE_MAX_BYTES', str(32 * 1024 * 1024))),
+    ttl=float(os.getenv('HISTORY_CACHE_TTL', '300'))
+)
+
+def load_history(user_id, session_id):
+    """(rolling summary, last HISTORY_LIMIT messages oldest first), from memory or MongoDB"""
+    cached = history_cache.get_with_summary(user_id, session_id)
+    if cached is not None:
+        return cached
+    history = list(messages_collection.find(
+        {"user_id": user_id, "session_id": session_id},
+        {"_id": 0, "role": 1, "text": 1}
+    ).sort("ts", -1).limit(HISTORY_LIMIT))
+    history = list(reversed(history))
+    session = sessions_collection.find_one(
+        {"user_id": user_id, "session_id": session_id}, {"_id": 0, "summary": 1}
+    ) or {}
+    summary = session.get("summary", "")
+    history_cache.fill(user_id, session_id, history, summary=summary)
+    return summary, history
+
+# tokens of conversation (summary + recent turns) allowed into each prompt
+HISTORY_TOKEN_BUDGET = int(os.getenv('HISTORY_TOKEN_BUDGET', '600'))
+
+# tokens allowed for the whole prompt: the lowest-ranked catalog rows go first,
+# then the oldest history lines; the instructions and user message always stay
+PROMPT_TOKEN_BUDGET = int(os.getenv('PROMPT_TOKEN_BUDGET', '4000'))
+count_tokens = get_token_counter(os.getenv('PROMPT_TOKENIZER', 'approx'))
+prompt_assembler = PromptAssembler(PROMPT_TOKEN_BUDGET, count_tokens)
+# ===============================================================
+
+
+# ================== CLUB CATALOG CACHE ==================
+def load_clubs():
+    """read the full club catalog from MongoDB"""
+    return list(collection.find({}))
+
+def render_club_line(club):
+    """one catalog line for the chat prompt"""
+    return f"Club: {club.get('club_name', 'Unknown')} - {club.get('description', 'No description')} - Majors: {club.get('majors', 'N/A')}"
+
+# shared across requests; club writes below call catalog_cache.apply()
+catalog_cache = CatalogCache(
+    load_clubs,
+    render_club_line,
+    ttl=float(os.getenv('CATALOG_CACHE_TTL', '300'))
+)
+
+# keyword index that picks which clubs go into the chat prompt
+club_index = BM25Index()
+catalog_cache.add_listener(club_index)
+CHAT_TOP_K = int(os.getenv('CHAT_TOP_K', '10'))
+
+# optional semantic retriever: CHAT_RETRIEVER=bm25 (default) | semantic | hybrid
+CHAT_RETRIEVER = os.getenv('CHAT_RETRIEVER', 'bm25').lower()
+semantic_index = None
+if CHAT_RETRIEVER in ('semantic', 'hybrid'):
+    from embeddings import EmbeddingIndex, get_embedder
+    semantic_index = EmbeddingIndex(
+        get_embedder(os.getenv('CHAT_EMBEDDER', 'hashing')),
+        path=os.getenv('CLUB_EMBEDDINGS_PATH') or None
+    )
+    catalog_cache.add_listener(semantic_index)
+
+# plain lookups ("link for Film Club", "clubs for Statistics majors") are
+# answered straight from the catalog; CHAT_INTENT_ROUTER=0 sends all to Gemini
+intent_router = None
+if os.getenv('CHAT_INTENT_ROUTER', '1') == '1':
+    intent_router = IntentRouter(limit=int(os.getenv('CHAT_INTENT_LIMIT', '10')))
+    catalog_cache.add_listener(intent_router)
+
+# typeahead for /clubs/suggest, kept in step with club writes
+suggest_index = SuggestIndex(limit=int(os.getenv('CLUB_SUGGEST_LIMIT', '8')))
+catalog_cache.add_listener(suggest_index)
+
+# typo-tolerant name search for /clubs/<name>?match=fuzzy
+fuzzy_index = TrigramIndex(limit=int(os.getenv('CLUB_FUZZY_LIMIT', '10')))
+catalog_cache.add_listener(fuzzy_index)
+
+def retrieve_club_ids(message, k=CHAT_TOP_K):
+    """doc ids of the clubs most relevant to a chat message"""
+    if semantic_index is None:
+        ranked = club_index.search(message, k=k)
+    elif CHAT_RETRIEVER == 'semantic':
+        ranked = semantic_index.search(message, k=k)
+    else:
+        ranked = reciprocal_rank_fusion(
+            [club_index.search(message, k=k), semantic_index.search(message, k=k)], k=k
+        )
+    return [doc_id for doc_id, _ in ranked]
+
+def club_ids_matching(club_name, mode='exact'):
+    """_ids of the clubs a name-based write applies to"""
+    return [c['_id'] for c in club_names.find_by_name(
+        collection, club_name, mode, {'_id': 1}, CLUB_NAME_COLLATION
+    )]
 # ===============================================================
 
 
@@ -201,16 +503,73 @@ def get_current_user(current_user):
 
 # ============= CLUB ROUTES =============
 
+CLUBS_PAGE_SIZE = int(os.getenv('CLUBS_PAGE_SIZE', '50'))
+CLUBS_PAGE_MAX = int(os.getenv('CLUBS_PAGE_MAX', '500'))
+CLUBS_EXPORT_BATCH = int(os.getenv('CLUBS_EXPORT_BATCH', '500'))
+
+def export_clubs(fields, fmt):
+    """streamed catalog export; the cursor is read CLUBS_EXPORT_BATCH clubs at a time"""
+    docs = collection.find({}, pagination.projection(fields)).batch_size(CLUBS_EXPORT_BATCH)
+    try:
+        yield from export_chunks(docs, fmt, batch=CLUBS_EXPORT_BATCH)
+    except Exception as e:
+        # headers are already sent; a truncated body is all the client can see
+        print(f"✗ club export failed: {e}")
+
 @app.route('/clubs', methods=['GET'])
 def get_all_clubs():
-    """Get all clubs from the database"""
+    """Get all clubs, or one page of them with ?limit=N&after=<next_cursor>"""
     try:
-        clubs = list(collection.find({}, {'_id': 0}))
+        fields = pagination.parse_fields(request.args.get('fields'))
+        fmt = request.args.get('format')
+        if fmt:
+            if fmt not in EXPORT_FORMATS:
+                raise ValueError(f"format must be one of: {', '.join(EXPORT_FORMATS)}")
+            return Response(export_clubs(fields, fmt), mimetype=EXPORT_FORMATS[fmt])
+
+        if 'limit' in request.args or 'after' in request.args:
+            limit = pagination.parse_limit(request.args.get('limit'), CLUBS_PAGE_SIZE, CLUBS_PAGE_MAX)
+            clubs, next_cursor = pagination.page(collection, limit, request.args.get('after'), fields)
+            return jsonify({
+                'success': True,
+                'count': len(clubs),
+                'clubs': clubs,
+                'next_cursor': next_cursor
+            })
+
+        clubs = list(collection.find({}, pagination.projection(fields)))
         return jsonify({
             'success': True,
             'count': len(clubs),
             'clubs': clubs
         })
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/clubs/suggest', methods=['GET'])
+def suggest_clubs():
+    """Typeahead: club names and majors starting with ?q=, most popular first"""
+    try:
+        limit = pagination.parse_limit(request.args.get('limit'), suggest_index.limit, 50)
+        catalog_cache.get()   # loads the catalog (and the index) on first use
+        return jsonify({
+            'success': True,
+            'query': request.args.get('q', ''),
+            **suggest_index.suggest(request.args.get('q', ''), limit)
+        })
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
@@ -219,18 +578,32 @@ def get_all_clubs():
 
 @app.route('/clubs/<club_name>', methods=['GET'])
 def get_club_by_name(club_name):
-    """Get clubs matching the name (case-insensitive)"""
+    """Get clubs matching the name (case-insensitive; ?match=exact|prefix|contains|fuzzy)"""
     try:
-        # Case-insensitive search using regex
-        clubs = list(collection.find(
-            {'club_name': {'$regex': club_name, '$options': 'i'}}, 
-            {'_id': 0}
-        ))
+        match = request.args.get('match', 'prefix')
+        if match == 'fuzzy':
+            # closest names first, from the in-memory trigram index
+            catalog_cache.get()
+            clubs = [
+                {k: v for k, v in club.items() if k not in ('_id', club_names.NAME_FIELD)}
+                for club in fuzzy_index.search(club_name)
+            ]
+        else:
+            # indexed lookup on the normalized name (prefix by default)
+            clubs = list(club_names.find_by_name(
+                collection, club_name, match,
+                {'_id': 0, club_names.NAME_FIELD: 0}, CLUB_NAME_COLLATION
+            ))
         return jsonify({
             'success': True,
             'count': len(clubs),
             'clubs': clubs
         })
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
@@ -253,7 +626,8 @@ def create_club():
                 }), 400
         
         # Insert the new club
-        result = collection.insert_one(data)
+        result = collection.insert_one(club_names.with_name_key(data))
+        catalog_cache.apply(upserted=[data])
         
         return jsonify({
             'success': True,
@@ -277,13 +651,15 @@ def update_club(club_name):
         if '_id' in data:
             del data['_id']
         
-        # Update the club (case-insensitive search)
+        # Update the club (case-insensitive exact name, or ?match=prefix)
+        ids = club_ids_matching(club_name, request.args.get('match', 'exact'))
         result = collection.update_many(
-            {'club_name': {'$regex': club_name, '$options': 'i'}},
-            {'$set': data}
+            {'_id': {'$in': ids}},
+            {'$set': club_names.with_name_key(data)}
         )
         
         if result.modified_count > 0:
+            catalog_cache.apply(upserted=collection.find({'_id': {'$in': ids}}))
             return jsonify({
                 'success': True,
                 'message': f'Updated {result.modified_count} club(s)',
@@ -295,6 +671,11 @@ def update_club(club_name):
                 'error': 'No clubs found with that name'
             }), 404
             
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
@@ -305,12 +686,14 @@ def update_club(club_name):
 def delete_club(club_name):
     """Delete clubs by name (case-insensitive)"""
     try:
-        # Delete clubs matching the name (case-insensitive)
+        # Delete clubs matching the name (case-insensitive exact name, or ?match=prefix)
+        ids = club_ids_matching(club_name, request.args.get('match', 'exact'))
         result = collection.delete_many(
-            {'club_name': {'$regex': club_name, '$options': 'i'}}
+            {'_id': {'$in': ids}}
         )
         
         if result.deleted_count > 0:
+            catalog_cache.apply(removed=ids)
             return jsonify({
                 'success': True,
                 'message': f'Deleted {result.deleted_count} club(s)',
@@ -322,6 +705,11 @@ def delete_club(club_name):
                 'error': 'No clubs found with that name'
             }), 404
             
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
@@ -336,127 +724,452 @@ def index():
 
 # ============= CHAT ROUTE (UPDATED WITH MEMORY) =============
 
-@app.route('/chat', methods=['POST'])
-def chat():
-    """Handle chat messages with Gemini (now stores short-term memory)"""
+class ChatError(Exception):
+    """chat request problem reported to the client as {'success': False, 'error': ...}"""
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+def validate_chat_request(data):
+    """STEPS 0-1: the request must carry a message"""
+    # STEP 0 — sanity: without Gemini configured, chat still answers from
+    #          the local club search (see fallback_reason)
+
+    # STEP 1 — read the incoming JSON and basic validation
+    if not data:
+        raise ChatError('No JSON data provided')
+        
+    user_message = data.get('message', '').strip()
+    if not user_message:
+        raise ChatError('No message provided')
+    return user_message
+
+def prepare_chat(data):
+    """STEPS 0-6: validate the request, load memory + catalog and compose the prompt"""
+    user_message = validate_chat_request(data)
+
+    # ------------------------------------------------------------------
+    # STEP 2 — identify the user and pick a session (TASK → add memory key)
+    # TASK: get a stable user_id and a session_id (use default if missing)
+    # history depends on these two keys.
+    # SOLUTION (uncomment the two lines below during the demo):
+    user_id = get_user_id()
+    session_id = data.get('session_id', '').strip() or get_or_create_default_session(user_id)
+
+    # For the starter (no memory yet), keep harmless placeholders:
+    user_id = "demo-user"                 # will be replaced by SOLUTION
+    session_id = "demo-session"           # will be replaced by SOLUTION
+    # ------------------------------------------------------------------
+
+    # ------------------------------------------------------------------
+    # STEP 3 — fetch last 8 turns to build short-term memory (TASK)
+    # TASK: pull last 8 messages for (user_id, session_id), newest → oldest,
+    #       then reverse and join into a readable conversation block.
+    # SOLUTION (uncomment this block during the demo):
+    summary, history = load_history(user_id, session_id)   # ring buffer, Mongo on a miss
+    history_text = build_history_block(summary, history, HISTORY_TOKEN_BUDGET, count_tokens)
+
+    # Starter fallback (no memory yet):
+    history_text = ""                     # will be replaced by SOLUTION
+    # ------------------------------------------------------------------
+
+    # STEP 4 — get clubs for grounding (served from the in-process catalog cache)
     try:
-        # STEP 0 — sanity: Gemini must be configured
-        if not GEMINI_AVAILABLE:
-            return jsonify({
+        catalog = catalog_cache.get()
+    except Exception as e:
+        raise ChatError(f'Error fetching clubs from database: {str(e)}', 500)
+
+    turn = build_turn(user_id, session_id, user_message, history_text, catalog)
+    turn['fallback_reason'] = fallback_reason(data)
+    return turn
+
+def format_history(history):
+    """oldest-first messages as a readable conversation block"""
+    return "\n".join([f"{m['role'].title()}: {m['text']}" for m in history])
+
+CHAT_PREAMBLE = "You are a helpful assistant for Georgia Tech students looking for clubs to join."
+CATALOG_HEADER = "Here are some available clubs at Georgia Tech:\n\n"
+CHAT_INSTRUCTIONS = "Please help students find clubs that match their interests, majors, or goals."
+
+def build_turn(user_id, session_id, user_message, history_text, catalog):
+    """STEPS 5-6: pick grounding clubs and compose the prompt (no I/O)"""
+    # STEP 5 — ground on the clubs most relevant to the message (BM25 and/or
+    #          embeddings), falling back to the first catalog rows when nothing matches
+    top_ids = retrieve_club_ids(user_message)
+    if top_ids:
+        clubs_context = catalog.render(top_ids)
+    else:
+        clubs_context = catalog.context or "No clubs are currently in the database."
+
+    # ------------------------------------------------------------------
+    # STEP 6 — compose the prompt (TASK → add the memory block)
+    # TASK: include {history_text} under “Previous conversation:”
+    # The prompt is assembled from prioritised sections so it always fits
+    # PROMPT_TOKEN_BUDGET (see prompt_assembly.py).
+    history = Section('history', history_text.splitlines(), priority=20, drop='head',
+                      header="Previous conversation:\n")
+    user = Section.text('user', f"User: {user_message}\n\nAssistant:", required=True)
+    prompt = prompt_assembler.assemble([
+        Section.text('preamble', CHAT_PREAMBLE, required=True),
+        Section('catalog', clubs_context.splitlines(), priority=10, drop='tail',
+                header=CATALOG_HEADER),
+        history,
+        Section.text('instructions', CHAT_INSTRUCTIONS, required=True),
+        user,
+    ])
+    # ------------------------------------------------------------------
+
+    turn = {
+        'user_id': user_id,
+        'session_id': session_id,
+        'user_message': user_message,
+        'full_prompt': prompt.text,
+        'prompt_tokens': prompt.tokens,   # tokens sent with the request
+        'cached_tokens': 0,               # tokens served from the context cache
+        'deadline': time.monotonic() + CHAT_TIMEOUT,
+        'catalog_version': catalog.version,
+        'cache_key': cache_key(
+            user_message, catalog.version,
+            history_text if RESPONSE_CACHE_KEY_HISTORY else None
+        ),
+        'cache_scope': (
+            hashlib.sha256(history_text.encode()).hexdigest()
+            if RESPONSE_CACHE_KEY_HISTORY else None
+        )
+    }
+    # the cross-worker flight key is shared through MongoDB, so it is scoped by
+    # the catalog contents: version counters are per process
+    turn['flight_key'] = turn['cache_key'] if chat_flight.distributed is None else cache_key(
+        user_message, catalog.fingerprint(),
+        history_text if RESPONSE_CACHE_KEY_HISTORY else None
+    )
+    if prefix_cache is not None and static_prefix_tokens(catalog) <= CONTEXT_CACHE_MAX_TOKENS:
+        # the preamble, catalog and instructions live in the cached prefix
+        turn['cached_prompt'] = "\n\n".join(r for r in (history.render(), user.render()) if r)
+        turn['cached_prompt_tokens'] = count_tokens(turn['cached_prompt'])
+    return turn
+
+def static_prefix(catalog):
+    """preamble + whole catalog + instructions: the same for every chat at one catalog version"""
+    return "\n\n".join([
+        CHAT_PREAMBLE,
+        CATALOG_HEADER + ("\n".join(catalog.lines.values()) or "No clubs are currently in the database."),
+        CHAT_INSTRUCTIONS,
+    ])
+
+_prefix_size = (None, 0)   # (catalog version, tokens in its static prefix)
+
+def static_prefix_tokens(catalog):
+    """tokens in static_prefix(catalog), counted once per catalog version"""
+    global _prefix_size
+    version, tokens = _prefix_size
+    if version != catalog.version:
+        tokens = count_tokens(static_prefix(catalog))
+        _prefix_size = (catalog.version, tokens)
+    return tokens
+
+def turn_messages(user_id, session_id, user_message, bot_response, now):
+    """the user + assistant message documents for one chat turn"""
+    return (
+        {"user_id": user_id, "session_id": session_id, "role": "user",
+         "text": user_message, "ts": now},
+        {"user_id": user_id, "session_id": session_id, "role": "assistant",
+         "text": bot_response, "ts": now + 0.001},
+    )
+
+def persist_turns(user_id, session_id, user_message, bot_response):
+    """STEP 8 — persist both turns + touch session timestamp"""
+    # TASK: insert two docs into messages_collection and update sessions_collection.updated_at
+    # SOLUTION (uncomment this block during the demo):
+    now = time.time()
+    turn = {
+        'user_id': user_id,
+        'session_id': session_id,
+        'messages': turn_messages(user_id, session_id, user_message, bot_response, now),
+        'ts': now
+    }
+    # the ring buffer sees the turn right away, even before a deferred write lands
+    history_cache.append(user_id, session_id, turn['messages'])
+    if write_behind is not None:
+        # returns immediately; the background flusher batches across requests
+        write_behind.submit(turn)
+    else:
+        flush_turns([turn])
+    if session_summarizer is not None:
+        session_summarizer.schedule(user_id, session_id)
+
+def flush_turns(turns):
+    """one insert_many for all messages + one bulk upsert of the session timestamps"""
+    messages_collection.insert_many(
+        [doc for turn in turns for doc in turn['messages']], ordered=False
+    )
+    touched = {}
+    for turn in turns:
+        key = (turn['user_id'], turn['session_id'])
+        touched[key] = max(turn['ts'], touched.get(key, 0))
+    updates = [
+        ({"user_id": user_id, "session_id": session_id}, {"$max": {"updated_at": ts}})
+        for (user_id, session_id), ts in touched.items()
+    ]
+    if len(updates) == 1:
+        sessions_collection.update_one(*updates[0], upsert=True)
+    else:
+        sessions_collection.bulk_write(
+            [UpdateOne(query, update, upsert=True) for query, update in updates], ordered=False
+        )
+
+# seconds a background summary may wait for a Gemini slot and the answer
+SUMMARY_TIMEOUT = float(os.getenv('CHAT_SUMMARY_TIMEOUT', '15'))
+
+def summarize_turns(previous, messages):
+    """fold aged-out messages into the running session summary"""
+    if llm is None:
+        return extractive_summary(previous, messages)
+    prompt = f"""Update the running summary of a conversation between a Georgia Tech student and a club-finder assistant.
+Keep the student's interests, majors, goals and the clubs already recommended. Reply with the summary only, at most 120 words.
+
+Current summary:
+{previous or '(none)'}
+
+New messages:
+{format_history(messages)}"""
+    # same breaker and concurrency limit as chat calls, so summaries neither
+    # hammer a failing upstream nor hang the summarizer thread
+    deadline = time.monotonic() + SUMMARY_TIMEOUT
+    try:
+        with gemini_breaker.guard(), gemini_limiter.slot(timeout=SUMMARY_TIMEOUT):
+            summary = llm.generate(prompt, timeout=max(deadline - time.monotonic(), 0.1))
+    except Exception as e:
+        print(f"⚠ summary LLM call failed, keeping an extractive summary: {e}")
+        return extractive_summary(previous, messages)
+    return summary.strip() or extractive_summary(previous, messages)
+
+# CHAT_SUMMARY=1 turns on the background rolling summaries; off by default
+# while STEP 3 still replaces the history block with the starter placeholder
+session_summarizer = SessionSummarizer(
+    sessions_collection,
+    messages_collection,
+    summarize_turns,
+    window=HISTORY_LIMIT,
+    min_batch=int(os.getenv('CHAT_SUMMARY_BATCH', '4')),
+    on_update=history_cache.set_summary
+) if os.getenv('CHAT_SUMMARY', '0') == '1' else None
+
+# CHAT_WRITE_BEHIND=1 takes the chat writes off the response path
+write_behind = WriteBehindQueue(
+    flush_turns,
+    max_batch=int(os.getenv('CHAT_WRITE_BEHIND_BATCH', '100')),
+    interval=float(os.getenv('CHAT_WRITE_BEHIND_INTERVAL', '0.5'))
+) if os.getenv('CHAT_WRITE_BEHIND', '0') == '1' else None
+
+def search_clubs(message, k):
+    """best BM25 matches for a message as club dicts (names, descriptions, majors)"""
+    catalog = catalog_cache.get()
+    return [catalog.clubs[i] for i, _ in club_index.search(message, k=k) if i in catalog.clubs]
+
+# templated answers from the local search when Gemini is not an option
+fallback = FallbackResponder(search_clubs, limit=int(os.getenv('FALLBACK_TOP_K', '5')))
+
+def fallback_reason(data):
+    """why this request skips Gemini up front ('unconfigured' / 'fast'), or None"""
+    if llm is None:
+        return 'unconfigured'
+    if data.get('mode') == 'fast':
+        return 'fast'
+    return None
+
+def llm_error_answer(turn, e):
+    """
+    retrieval answer when the LLM call failed upstream (or its breaker is
+    open); None for other errors. Timeouts stay errors (504 on /chat, an
+    error event on the stream) on every route.
+    """
+    if isinstance(e, LLMTimeout):
+        return None
+    if isinstance(e, CircuitOpen):
+        return fallback.answer(turn['user_message'], 'circuit_open')
+    if isinstance(e, Exception) and counts_against_llm(e):
+        print(f"⚠ LLM call failed, answering from the local club search: {e}")
+        return fallback.answer(turn['user_message'], 'llm_error')
+    return None
+
+def local_answer(turn):
+    """
+    (answer, source) for a turn that needs no Gemini call: a routed lookup,
+    a cached answer, or the retrieval fallback; (None, 'llm') otherwise
+    """
+    if intent_router is not None:
+        routed = intent_router.route(turn['user_message'])
+        if routed is not None:
+            return routed[1], 'intent'
+    answer = cached_answer(turn)
+    if answer is not None:
+        return answer, 'cache'
+    if turn['fallback_reason']:
+        return fallback.answer(turn['user_message'], turn['fallback_reason']), 'retrieval'
+    return None, 'llm'
+
+def sse_event(payload, event=None):
+    """format one Server-Sent Events message"""
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(payload)}\n\n"
+
+def stream_chat(turn):
+    """STEPS 7-9, streaming: forward LLM chunks as SSE, persist once complete"""
+    def generate():
+        try:
+            bot_response, source = local_answer(turn)
+            flight, leader = (None, False) if bot_response is not None else chat_flight.begin(turn['flight_key'])
+            if not leader:
+                # answered locally, or an identical prompt is already generating: reuse that answer
+                if bot_response is None:
+                    try:
+                        bot_response = chat_flight.wait(flight)
+                    except Exception as e:
+                        bot_response, source = llm_error_answer(turn, e), 'retrieval'
+                        if bot_response is None:
+                            raise
+                yield sse_event({'delta': bot_response})
+            else:
+                parts = []
+                try:
+                    with gemini_breaker.guard(), gemini_limiter.slot(timeout=time_left(turn)):
+                        for text in llm.stream(turn['full_prompt'], timeout=time_left(turn), prefix=turn_prefix(turn)):
+                            parts.append(text)
+                            yield sse_event({'delta': text})
+                except Exception as e:
+                    # Gemini failed or keeps failing: answer from the local search
+                    # instead, unless part of its answer has already been sent
+                    chat_flight.finish(turn['flight_key'], flight, error=waiter_error(e))
+                    bot_response = None if parts else llm_error_answer(turn, e)
+                    if bot_response is None:
+                        raise
+                    source = 'retrieval'
+                    yield sse_event({'delta': bot_response})
+                except BaseException as e:
+                    chat_flight.finish(turn['flight_key'], flight, error=waiter_error(e))
+                    raise
+                else:
+                    bot_response = "".join(parts) or NO_RESPONSE_TEXT
+                    if parts:
+                        remember_answer(turn, bot_response)
+                    chat_flight.finish(turn['flight_key'], flight, result=bot_response)
+
+            persist_turns(turn['user_id'], turn['session_id'], turn['user_message'], bot_response)
+            yield sse_event({
+                'success': True,
+                'response': bot_response,
+                'session_id': turn['session_id'],
+                'cached': source == 'cache',
+                'source': source,
+                'prompt_tokens': turn['prompt_tokens'],
+                'cached_tokens': turn['cached_tokens']
+            }, event='done')
+        except (Overloaded, CircuitOpen) as e:
+            yield sse_event({
                 'success': False,
-                'error': 'Gemini API key not configured. Please set GEMINI_API_KEY in your .env file.'
-            }), 400
-        
-        # STEP 1 — read the incoming JSON and basic validation
-        data = request.get_json()
-        if not data:
-            return jsonify({
+                'error': e.message,
+                'retry_after': e.retry_after
+            }, event='error')
+        except ChatError as e:
+            yield sse_event({
                 'success': False,
-                'error': 'No JSON data provided'
-            }), 400
-            
-        user_message = data.get('message', '').strip()
-        if not user_message:
-            return jsonify({
+                'error': e.message
+            }, event='error')
+        except LLMTimeout:
+            yield sse_event({
                 'success': False,
-                'error': 'No message provided'
-            }), 400
-
-        # ------------------------------------------------------------------
-        # STEP 2 — identify the user and pick a session (TASK → add memory key)
-        # TASK: get a stable user_id and a session_id (use default if missing)
-        # history depends on these two keys.
-        # SOLUTION (uncomment the two lines below during the demo):
-        user_id = get_user_id()
-        session_id = data.get('session_id', '').strip() or get_or_create_default_session(user_id)
-
-        # For the starter (no memory yet), keep harmless placeholders:
-        user_id = "demo-user"                 # will be replaced by SOLUTION
-        session_id = "demo-session"           # will be replaced by SOLUTION
-        # ------------------------------------------------------------------
-
-        # ------------------------------------------------------------------
-        # STEP 3 — fetch last 8 turns to build short-term memory (TASK)
-        # TASK: pull last 8 messages for (user_id, session_id), newest → oldest,
-        #       then reverse and join into a readable conversation block.
-        # SOLUTION (uncomment this block during the demo):
-        history = list(messages_collection.find(
-            {"user_id": user_id, "session_id": session_id},
-            {"_id": 0, "role": 1, "text": 1}
-        ).sort("ts", -1).limit(8))
-        history = list(reversed(history))
-        history_text = "\n".join([f"{m['role'].title()}: {m['text']}" for m in history])
-
-        # Starter fallback (no memory yet):
-        history_text = ""                     # will be replaced by SOLUTION
-        # ------------------------------------------------------------------
-
-        # STEP 4 — get clubs for grounding (kept as-is)
-        try:
-            clubs = list(collection.find({}, {'_id': 0}))
+                'error': 'The model did not answer in time'
+            }, event='error')
         except Exception as e:
-            return jsonify({
+            yield sse_event({
                 'success': False,
-                'error': f'Error fetching clubs from database: {str(e)}'
-            }), 500
-        
-        # STEP 5 — build a small catalog block for the prompt (kept as-is)
-        if clubs:
-            clubs_context = "\n".join([
-                f"Club: {club.get('club_name', 'Unknown')} - {club.get('description', 'No description')} - Majors: {club.get('majors', 'N/A')}"
-                for club in clubs[:20]
-            ])
-        else:
-            clubs_context = "No clubs are currently in the database."
-
-        # ------------------------------------------------------------------
-        # STEP 6 — compose the prompt (TASK → add the memory block)
-        # TASK: include {history_text} under “Previous conversation:”
-        system_prompt = f"""You are a helpful assistant for Georgia Tech students looking for clubs to join.
+                'error': f'Unexpected error: {str(e)}'
+            }, event='error')
 
-Here are some available clubs at Georgia Tech:
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
 
-{clubs_context}
+@app.route('/chat', methods=['POST'])
+def chat():
+    """Handle chat messages with Gemini (now stores short-term memory)"""
+    try:
+        data = request.get_json()
+        turn = prepare_chat(data)
 
-Previous conversation:
-{history_text}
+        # {"stream": true} switches to the same SSE response as /chat/stream
+        if data.get('stream'):
+            return stream_chat(turn)
 
-Please help students find clubs that match their interests, majors, or goals."""
-        # ------------------------------------------------------------------
+        # STEP 7 — answer catalog lookups and repeated questions locally,
+        #          otherwise call Gemini once per identical in-flight prompt;
+        #          the local club search answers when Gemini is not an option
+        bot_response, source = local_answer(turn)
+        if bot_response is None:
+            try:
+                bot_response, _ = chat_flight.do(turn['flight_key'], lambda: generate_answer(turn))
+            except Exception as e:
+                # upstream error or open circuit: the local club search answers
+                bot_response, source = llm_error_answer(turn, e), 'retrieval'
+                if bot_response is None:
+                    raise
 
-        # STEP 7 — call Gemini (kept as-is)
-        model = genai.GenerativeModel('gemini-2.0-flash')
-        full_prompt = f"{system_prompt}\n\nUser: {user_message}\n\nAssistant:"
-        response = model.generate_content(full_prompt)
-        bot_response = getattr(response, 'text', 'I could not generate a response.')
-
-        # ------------------------------------------------------------------
-        # STEP 8 — persist both turns + touch session timestamp (TASK)
-        # TASK: insert two docs into messages_collection and update sessions_collection.updated_at
-        # SOLUTION (uncomment this block during the demo):
-        now = time.time()
-        messages_collection.insert_one({
-            "user_id": user_id, "session_id": session_id, "role": "user",
-            "text": user_message, "ts": now
-        })
-        messages_collection.insert_one({
-            "user_id": user_id, "session_id": session_id, "role": "assistant",
-            "text": bot_response, "ts": now + 0.001
-        })
-        sessions_collection.update_one(
-            {"user_id": user_id, "session_id": session_id},
-            {"$set": {"updated_at": now}},
-            upsert=True
-        )
-        # ------------------------------------------------------------------
+        # STEP 8 — persist both turns + touch session timestamp
+        persist_turns(turn['user_id'], turn['session_id'], turn['user_message'], bot_response)
 
         # STEP 9 — return the response (always include session_id once enabled)
         return jsonify({
             'success': True,
             'response': bot_response,
-            'session_id': session_id
+            'session_id': turn['session_id'],
+            'cached': source == 'cache',
+            'source': source,
+            'prompt_tokens': turn['prompt_tokens'],
+            'cached_tokens': turn['cached_tokens']
         })
 
+    except ChatError as e:
+        return jsonify({
+            'success': False,
+            'error': e.message
+        }), e.status
+    except (Overloaded, CircuitOpen) as e:
+        return unavailable_response(e)
+    except FlightAborted as e:
+        # the request this one was coalesced onto was cancelled
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 503
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': f'Unexpected error: {str(e)}'
+        }), 500
+
+def unavailable_response(e):
+    """fast 503 telling the client when to retry (Overloaded or CircuitOpen)"""
+    return jsonify({
+        'success': False,
+        'error': e.message,
+        'retry_after': e.retry_after
+    }), 503, {'Retry-After': str(e.retry_after)}
+
+@app.route('/chat/stream', methods=['POST'])
+def chat_stream():
+    """Stream the chat answer as Server-Sent Events (delta events, then done)"""
+    try:
+        turn = prepare_chat(request.get_json())
+        return stream_chat(turn)
+    except ChatError as e:
+        return jsonify({
+            'success': False,
+            'error': e.message
+        }), e.status
     except Exception as e:
         return jsonify({
             'success': False,
@@ -464,6 +1177,43 @@ Please help students find clubs that match their interests, majors, or goals."""
         }), 500
 
 # ------------------- API ROUTES -------------------
+@app.route("/api/metrics", methods=["GET"])
+def api_metrics():
+    """
+    Returns in-process performance counters for this worker:
+    {"catalog_cache": {"hits": 120, "misses": 3, "version": 2, ...}}
+    """
+    return jsonify({
+        "catalog_cache": catalog_cache.stats(),
+        "model_registry": model_registry.stats(),
+        "llm_backend": llm.stats() if llm is not None else None,
+        "response_cache": response_cache.stats(),
+        "semantic_cache": semantic_cache.stats() if semantic_cache is not None else None,
+        "single_flight": chat_flight.stats(),
+        "write_behind": write_behind.stats() if write_behind is not None else None,
+        "history_cache": history_cache.stats(),
+        "session_summarizer": session_summarizer.stats() if session_summarizer is not None else None,
+        "prompt_assembly": prompt_assembler.stats(),
+        "context_cache": prefix_cache.stats() if prefix_cache is not None else None,
+        "gemini_limiter": gemini_limiter.stats(),
+        "gemini_breaker": gemini_breaker.stats(),
+        "fallback": fallback.stats(),
+        "intent_router": intent_router.stats() if intent_router is not None else None,
+        "club_suggest": suggest_index.stats(),
+        "fuzzy_search": fuzzy_index.stats(),
+        "club_index": {
+            "retriever": CHAT_RETRIEVER,
+            "documents": len(club_index),
+            "embedded_documents": len(semantic_index) if semantic_index is not None else None
+        }
+    })
+
+
+def get_clubs_dataframe():
+    """all clubs (without _id) as a DataFrame for the analytics endpoints"""
+    return pd.DataFrame(list(collection.find({}, {'_id': 0, club_names.NAME_FIELD: 0})))
+
+
 @app.route("/api/members_by_department", methods=["GET"])
 def api_members_by_department():
     """
@@ -483,6 +1233,8 @@ def api_members_by_department():
         df["members"] = pd.to_numeric(df["members"], errors="coerce").fillna(0).astype(int)
     else:
         df["members"] = 0
+    if "department" not in df.columns:
+        df["department"] = None
 
     grouped = df.groupby("department", dropna=False)["members"].sum().reset_index()
     result = [
@@ -609,5 +1361,6 @@ if __name__ == '__main__':
     print(f"Server running on: http://localhost:8001")
     print(f"Debug mode: ON")
     print(f"Gemini API: {'✓ Available' if GEMINI_AVAILABLE else '✗ Not configured'}")
+    print(f"LLM backend: {llm.name if llm is not None else 'none (retrieval-only chat)'}")
     print("="*50 + "\n")
     app.run(debug=True, port=8001)
@@ -0,0 +1,133 @@
+"""
+In-memory recent-history cache for chat sessions.
+
+Each (user_id, session_id) gets a ring buffer with its last few messages.
+The buffer is filled from MongoDB once, on a miss, and after that the chat
+route appends every turn it writes, so building the history block for an
+active conversation is a dict lookup. Sessions are evicted least recently
+used first, bounded by count and by the total size of the cached text.
+Entries also expire after a TTL so a session that another worker wrote to
+cannot stay stale for long. Alongside the messages each entry keeps the
+session's rolling summary, so the whole history block comes from memory.
+"""
+import threading
+import time
+from collections import OrderedDict, deque
+
+
+class _Session:
+    __slots__ = ('messages', 'summary', 'bytes', 'loaded_at')
+
+    def __init__(self, now):
+        self.messages = deque()
+        self.summary = ''
+        self.bytes = 0
+        self.loaded_at = now
+
+
+def _size(message):
+    return len(message.get('text', '')) + len(message.get('role', '')) + 64
+
+
+class HistoryCache:
+    """Ring buffer of the last max_messages messages per chat session"""
+
+    def __init__(self, max_messages=8, max_sessions=10000, max_bytes=32 * 1024 * 1024, ttl=300):
+        self.max_messages = max_messages
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._sessions = OrderedDict()   # (user_id, session_id) -> _Session
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _live(self, key):
+        entry = self._sessions.get(key)
+        if entry is not None and time.monotonic() - entry.loaded_at >= self.ttl:
+            self._drop(key)
+            entry = None
+        return entry
+
+    def get(self, user_id, session_id):
+        """Oldest-first copy of the cached messages, or None on a miss"""
+        cached = self.get_with_summary(user_id, session_id)
+        return None if cached is None else cached[1]
+
+    def get_with_summary(self, user_id, session_id):
+        """(summary, messages) for a cached session, or None on a miss"""
+        key = (user_id, session_id)
+        with self._lock:
+            entry = self._live(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._sessions.move_to_end(key)
+            self.hits += 1
+            return entry.summary, list(entry.messages)
+
+    def fill(self, user_id, session_id, messages, summary=''):
+        """Seed a session from the database (oldest first)"""
+        key = (user_id, session_id)
+        with self._lock:
+            if key in self._sessions:
+                self._drop(key)
+            entry = self._sessions[key] = _Session(time.monotonic())
+            entry.summary = summary or ''
+            entry.bytes = len(entry.summary)
+            self._bytes += entry.bytes
+            self._push(key, messages)
+
+    def set_summary(self, user_id, session_id, summary):
+        """Record a refreshed rolling summary for a cached session"""
+        with self._lock:
+            entry = self._sessions.get((user_id, session_id))
+            if entry is not None:
+                delta = len(summary) - len(entry.summary)
+                entry.summary = summary
+                entry.bytes += delta
+                self._bytes += delta
+
+    def append(self, user_id, session_id, messages):
+        """Add freshly written messages; ignored for sessions not in the cache"""
+        key = (user_id, session_id)
+        with self._lock:
+            if key in self._sessions:
+                self._sessions.move_to_end(key)
+                self._push(key, messages)
+
+    def _push(self, key, messages):
+        entry = self._sessions[key]
+        for m in messages:
+            m = {'role': m['role'], 'text': m['text']}
+            entry.messages.append(m)
+            size = _size(m)
+            entry.bytes += size
+            self._bytes += size
+            if len(entry.messages) > self.max_messages:
+                size = _size(entry.messages.popleft())
+                entry.bytes -= size
+                self._bytes -= size
+        while self._sessions and (len(self._sessions) > self.max_sessions or self._bytes > self.max_bytes):
+            self._drop(next(iter(self._sessions)))
+            self.evictions += 1
+
+    def _drop(self, key):
+        entry = self._sessions.pop(key)
+        self._bytes -= entry.bytes
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'sessions': len(self._sessions),
+                'bytes': self._bytes,
+                'max_sessions': self.max_sessions,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+            }
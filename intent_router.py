@@ -0,0 +1,155 @@
+"""
+Keyword intent router for the chat routes.
+
+Plenty of chat messages are plain catalog lookups ("link for Film Club",
+"clubs for Statistics majors", "tell me about Chess Club"). IntentRouter
+recognises those with a few regular expressions and answers them from
+exact name / major lookups, so they never reach the LLM. Anything it is
+not sure about (no rule matches, or the name or major is unknown) returns
+None and goes through the normal Gemini path.
+
+The router is a CatalogCache listener: its name and major maps follow the
+catalog through build/upsert/remove like the retrieval indexes.
+"""
+import re
+import threading
+
+from fallback_answer import render_answer, render_club
+from retrieval import club_field_text
+
+_SPACE_RE = re.compile(r"\s+")
+
+
+def normalize(text):
+    """casefold, collapse whitespace, drop surrounding punctuation"""
+    return _SPACE_RE.sub(" ", text.casefold()).strip(" \t?!.,'\"")
+
+
+def club_majors(club):
+    """normalized majors of a club (list or comma separated string)"""
+    value = club.get('majors')
+    parts = value if isinstance(value, (list, tuple)) else club_field_text(club, 'majors').split(',')
+    return {normalize(str(p)) for p in parts if normalize(str(p))}
+
+
+# (intent, pattern); patterns run on the normalized message
+RULES = [
+    ('link', re.compile(
+        r"^(?:what is |what's |give me |send me |can i get )?(?:the )?(?:link|url|website|web site|site|page)"
+        r" (?:for|to|of) (?:the )?(?P<name>.+)$")),
+    ('link', re.compile(r"^(?P<name>.+?)(?:'s)? (?:link|url|website)$")),
+    ('major', re.compile(
+        r"^(?:what |which |any |show me |list |find )?(?:the )?clubs? (?:are |is )?(?:there )?(?:for|in)"
+        r" (?P<major>.+?) (?:majors?|students)$")),
+    ('about', re.compile(
+        r"^(?:what is|what's|tell me about|describe|info on|information about|more about) (?:the )?(?P<name>.+)$")),
+    ('list', re.compile(r"^(?:list|show|show me|what are)(?: all)?(?: of)?(?: the)? clubs$")),
+]
+
+
+class IntentRouter:
+    """Answer simple catalog lookups locally; route everything else to the LLM"""
+
+    def __init__(self, limit=10):
+        self.limit = limit
+        self._lock = threading.Lock()
+        self._clubs = {}       # doc_id -> club
+        self._by_name = {}     # normalized name -> {doc_id: club}
+        self._by_major = {}    # normalized major -> {doc_id: club}
+        self.seen = 0
+        self.routed = {}       # intent -> count
+
+    # ---- catalog listener ----
+    def build(self, clubs_by_id):
+        by_name, by_major = {}, {}
+        for did, club in clubs_by_id.items():
+            self._add(did, club, by_name, by_major)
+        with self._lock:
+            self._clubs = dict(clubs_by_id)
+            self._by_name = by_name
+            self._by_major = by_major
+
+    def upsert(self, did, club):
+        with self._lock:
+            self._remove(did)
+            self._clubs[did] = club
+            self._add(did, club, self._by_name, self._by_major)
+
+    def remove(self, did):
+        with self._lock:
+            self._remove(did)
+
+    @staticmethod
+    def _add(did, club, by_name, by_major):
+        by_name.setdefault(normalize(club_field_text(club, 'club_name')), {})[did] = club
+        for major in club_majors(club):
+            by_major.setdefault(major, {})[did] = club
+
+    def _remove(self, did):
+        club = self._clubs.pop(did, None)
+        if club is None:
+            return
+        keys = [(self._by_name, normalize(club_field_text(club, 'club_name')))]
+        keys += [(self._by_major, major) for major in club_majors(club)]
+        for mapping, key in keys:
+            bucket = mapping.get(key)
+            if bucket is not None:
+                bucket.pop(did, None)
+                if not bucket:
+                    del mapping[key]
+
+    # ---- routing ----
+    def _named(self, name):
+        """clubs called `name`, also trying with/without a trailing 'club'"""
+        for candidate in (name, f"{name} club", name[:-5] if name.endswith(" club") else None):
+            if candidate and candidate in self._by_name:
+                return list(self._by_name[candidate].values())
+        return []
+
+    def route(self, message):
+        """(intent, answer) for a lookup the catalog can answer, else None"""
+        text = normalize(message)
+        with self._lock:
+            self.seen += 1
+            for intent, pattern in RULES:
+                match = pattern.match(text)
+                if match is None:
+                    continue
+                answer = self._answer(intent, match)
+                if answer is not None:
+                    self.routed[intent] = self.routed.get(intent, 0) + 1
+                    return intent, answer
+        return None
+
+    def _answer(self, intent, match):
+        if intent == 'list':
+            clubs = list(self._clubs.values())
+            shown = clubs[:self.limit]
+            more = f"\n…and {len(clubs) - len(shown)} more." if len(clubs) > len(shown) else ""
+            return render_answer(shown, intro=f"There are {len(clubs)} clubs, including:") + more
+
+        if intent == 'major':
+            major = normalize(match.group('major'))
+            clubs = list(self._by_major.get(major, {}).values())
+            if not clubs:
+                return None
+            return render_answer(clubs[:self.limit], intro=f"Clubs for {match.group('major').title()} majors:")
+
+        clubs = self._named(normalize(match.group('name')))
+        if not clubs:
+            return None
+        if intent == 'link':
+            # same-named clubs often share a link; list each link once
+            lines = dict.fromkeys(f"{c.get('club_name')}: {c['link']}" for c in clubs if c.get('link'))
+            return "\n".join(lines) if lines else None
+        return "\n".join(render_club(c)[2:] for c in clubs)
+
+    def stats(self):
+        with self._lock:
+            skipped = sum(self.routed.values())
+            return {
+                'messages': self.seen,
+                'skipped_llm_calls': skipped,
+                'skip_rate': round(skipped / self.seen, 4) if self.seen else 0.0,
+                'by_intent': dict(self.routed),
+            }
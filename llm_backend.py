@@ -0,0 +1,260 @@
+"""
+LLM backends for the chat routes.
+
+The chat pipeline talks to an LLMBackend instead of google.generativeai
+directly: generate/stream for the Flask app, agenerate/astream for the ASGI
+app. GeminiBackend is the production implementation (shared model objects,
+optional context-cached prefix, request timeouts). FakeBackend answers
+locally with configurable latency, token rate and error rate, so load and
+soak tests can run the whole pipeline offline. LLM_BACKEND picks one.
+"""
+import abc
+import asyncio
+import random
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+
+from google.api_core import exceptions as google_exceptions
+
+# static prompt prefix for catalog `version`, built lazily by build();
+# `prompt` is what gets sent on top of it when the prefix is cached, and
+# `used()` (optional) is called when a request actually went that way
+Prefix = namedtuple('Prefix', 'version build prompt used', defaults=(None,))
+
+
+# what the API answers for a cached-content handle that expired or was
+# deleted; only these fall back to the plain prompt. Timeouts, 429 and 5xx
+# propagate so the breaker sees them (a retry would double load and latency)
+HANDLE_ERRORS = (google_exceptions.NotFound, google_exceptions.FailedPrecondition,
+                 google_exceptions.PermissionDenied)
+
+
+class LLMTimeout(Exception):
+    """The backend did not answer within the request's timeout"""
+
+
+class LLMBackend(abc.ABC):
+    """Interface: text in, text (or text chunks) out; both apps need all four calls"""
+
+    name = 'base'
+
+    @abc.abstractmethod
+    def generate(self, prompt, timeout=None, prefix=None):
+        """full answer text ('' when the model returned nothing)"""
+
+    @abc.abstractmethod
+    def stream(self, prompt, timeout=None, prefix=None):
+        """iterator of answer text chunks"""
+
+    @abc.abstractmethod
+    async def agenerate(self, prompt, timeout=None, prefix=None):
+        """full answer text, for the ASGI app"""
+
+    @abc.abstractmethod
+    def astream(self, prompt, timeout=None, prefix=None):
+        """async iterator of answer text chunks"""
+
+    def is_failure(self, e):
+        """does this error say the upstream is unhealthy (for the circuit breaker)?"""
+        return True
+
+    def stats(self):
+        return {'backend': self.name}
+
+
+class GeminiBackend(LLMBackend):
+    """google.generativeai models, optionally on top of a context-cached prefix"""
+
+    name = 'gemini'
+
+    def __init__(self, get_model, prefix_cache=None):
+        self._get_model = get_model        # () -> shared GenerativeModel
+        self.prefix_cache = prefix_cache   # optional context_cache.PrefixCache
+
+    @staticmethod
+    def _options(timeout):
+        return {'request_options': {'timeout': timeout}} if timeout else {}
+
+    @staticmethod
+    @contextmanager
+    def _translate():
+        try:
+            yield
+        except google_exceptions.DeadlineExceeded as e:
+            raise LLMTimeout(str(e)) from e
+
+    def _prefixed_model(self, prefix):
+        if prefix is None or self.prefix_cache is None:
+            return None
+        return self.prefix_cache.model_for(prefix.version, prefix.build)
+
+    def _retry_timeout(self, prefix, error, timeout, started):
+        """time left for the plain retry after a failed cached-prefix call"""
+        # e.g. the handle expired server-side: drop it and send the plain prompt
+        print(f"⚠ cached prefix rejected, retrying with the full prompt: {error}")
+        self.prefix_cache.invalidate(prefix.version)
+        if not timeout:
+            return None
+        left = timeout - (time.monotonic() - started)
+        if left <= 0:
+            raise LLMTimeout('no time left to retry without the cached prefix') from error
+        return left
+
+    def _call(self, model, prompt, prefix, timeout=None, **kwargs):
+        """generate_content on the cached prefix when possible, else on the full prompt"""
+        if model is not None:
+            started = time.monotonic()
+            try:
+                response = model.generate_content(prefix.prompt, **kwargs, **self._options(timeout))
+            except HANDLE_ERRORS as e:
+                timeout = self._retry_timeout(prefix, e, timeout, started)
+            else:
+                if prefix.used:
+                    prefix.used()
+                return response
+        return self._get_model().generate_content(prompt, **kwargs, **self._options(timeout))
+
+    async def _acall(self, model, prompt, prefix, timeout=None, **kwargs):
+        if model is not None:
+            started = time.monotonic()
+            try:
+                response = await model.generate_content_async(prefix.prompt, **kwargs, **self._options(timeout))
+            except HANDLE_ERRORS as e:
+                timeout = self._retry_timeout(prefix, e, timeout, started)
+            else:
+                if prefix.used:
+                    prefix.used()
+                return response
+        return await self._get_model().generate_content_async(prompt, **kwargs, **self._options(timeout))
+
+    @staticmethod
+    def _chunk_text(chunk):
+        try:
+            return chunk.text
+        except ValueError:
+            # chunks without text parts (e.g. a bare finish reason)
+            return None
+
+    def generate(self, prompt, timeout=None, prefix=None):
+        with self._translate():
+            response = self._call(self._prefixed_model(prefix), prompt, prefix, timeout)
+        return getattr(response, 'text', None) or ''
+
+    def stream(self, prompt, timeout=None, prefix=None):
+        with self._translate():
+            response = self._call(self._prefixed_model(prefix), prompt, prefix, timeout, stream=True)
+            for chunk in response:
+                text = self._chunk_text(chunk)
+                if text:
+                    yield text
+
+    async def _amodel(self, prefix):
+        if prefix is None or self.prefix_cache is None:
+            return None
+        # creating the cached-content handle is a blocking API call
+        return await asyncio.to_thread(self._prefixed_model, prefix)
+
+    async def agenerate(self, prompt, timeout=None, prefix=None):
+        with self._translate():
+            response = await self._acall(await self._amodel(prefix), prompt, prefix, timeout)
+        return getattr(response, 'text', None) or ''
+
+    async def astream(self, prompt, timeout=None, prefix=None):
+        with self._translate():
+            response = await self._acall(await self._amodel(prefix), prompt, prefix, timeout, stream=True)
+            async for chunk in response:
+                text = self._chunk_text(chunk)
+                if text:
+                    yield text
+
+    def is_failure(self, e):
+        # 5xx, 429, timeouts and network errors; not our own bad requests
+        if isinstance(e, google_exceptions.ClientError):
+            return isinstance(e, google_exceptions.TooManyRequests)
+        return True
+
+
+class FakeLLMError(Exception):
+    """Injected upstream failure from FakeBackend"""
+
+
+class FakeBackend(LLMBackend):
+    """Offline stand-in: first-token latency, a steady token rate and random errors"""
+
+    name = 'fake'
+
+    def __init__(self, latency=0.2, tokens_per_second=50.0, error_rate=0.0, reply_tokens=40, seed=None):
+        self.latency = latency                  # seconds before the first token
+        self.tokens_per_second = tokens_per_second
+        self.error_rate = error_rate            # 0..1 share of calls that fail
+        self.reply_tokens = reply_tokens
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.errors = 0
+        self.timeouts = 0
+
+    def _start(self):
+        """count the call; returns the per-token delay or raises an injected failure"""
+        with self._lock:
+            self.calls += 1
+            fail = self._random.random() < self.error_rate
+            if fail:
+                self.errors += 1
+        if fail:
+            raise FakeLLMError('fake backend: injected upstream error')
+        return 1.0 / self.tokens_per_second
+
+    def _tokens(self, prompt):
+        question = prompt.rstrip().rsplit("User:", 1)[-1].replace("Assistant:", "").strip()
+        words = f"This is a simulated answer to: {question}".split()
+        filler = ["lorem", "ipsum", "dolor", "sit", "amet"]
+        while len(words) < self.reply_tokens:
+            words.append(filler[len(words) % len(filler)])
+        return [w + " " for w in words[:self.reply_tokens]]
+
+    def _check_deadline(self, started, timeout):
+        if timeout is not None and time.monotonic() - started >= timeout:
+            with self._lock:
+                self.timeouts += 1
+            raise LLMTimeout('fake backend: timed out')
+
+    def generate(self, prompt, timeout=None, prefix=None):
+        return "".join(self.stream(prompt, timeout, prefix)).strip()
+
+    def stream(self, prompt, timeout=None, prefix=None):
+        started = time.monotonic()
+        delay = self._start()
+        time.sleep(min(self.latency, timeout) if timeout is not None else self.latency)
+        self._check_deadline(started, timeout)
+        for token in self._tokens(prompt):
+            time.sleep(delay)
+            self._check_deadline(started, timeout)
+            yield token
+
+    async def agenerate(self, prompt, timeout=None, prefix=None):
+        return "".join([t async for t in self.astream(prompt, timeout, prefix)]).strip()
+
+    async def astream(self, prompt, timeout=None, prefix=None):
+        started = time.monotonic()
+        delay = self._start()
+        await asyncio.sleep(min(self.latency, timeout) if timeout is not None else self.latency)
+        self._check_deadline(started, timeout)
+        for token in self._tokens(prompt):
+            await asyncio.sleep(delay)
+            self._check_deadline(started, timeout)
+            yield token
+
+    def stats(self):
+        with self._lock:
+            return {
+                'backend': self.name,
+                'calls': self.calls,
+                'errors': self.errors,
+                'timeouts': self.timeouts,
+                'latency_seconds': self.latency,
+                'tokens_per_second': self.tokens_per_second,
+                'error_rate': self.error_rate,
+            }
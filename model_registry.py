@@ -0,0 +1,49 @@
+"""
+Process-wide registry of Gemini model objects.
+
+GenerativeModel instances are cheap to call but not free to build, so the
+chat routes fetch them from here instead of constructing one per request.
+Models are keyed by name plus generation config and shared across threads.
+"""
+import threading
+
+
+class ModelRegistry:
+    """Create each (model name, generation config) pair once and reuse it"""
+
+    def __init__(self, factory):
+        self._factory = factory   # (model_name, generation_config dict) -> model
+        self._lock = threading.Lock()
+        self._models = {}
+        self.lookups = 0
+
+    @staticmethod
+    def _key(model_name, generation_config):
+        return (model_name, tuple(sorted(generation_config.items())))
+
+    def get(self, model_name, **generation_config):
+        """Return the shared model, building it on first use"""
+        generation_config = {k: v for k, v in generation_config.items() if v is not None}
+        key = self._key(model_name, generation_config)
+        self.lookups += 1
+        model = self._models.get(key)
+        if model is None:
+            with self._lock:
+                model = self._models.get(key)
+                if model is None:
+                    model = self._factory(model_name, generation_config)
+                    self._models[key] = model
+        return model
+
+    def clear(self):
+        with self._lock:
+            self._models.clear()
+
+    def stats(self):
+        return {
+            'models': [
+                {'model': name, 'generation_config': dict(config)}
+                for name, config in list(self._models)
+            ],
+            'lookups': self.lookups,
+        }
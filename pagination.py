@@ -0,0 +1,112 @@
+"""
+Keyset (cursor) pagination and field projection for the club listing.
+
+GET /clubs?limit=N returns clubs ordered by (normalized name, _id) and a
+next_cursor; passing it back as ?after=... continues right after the last
+club seen. The query is a range condition on the sort key instead of a
+skip(), so every page is an index range scan on the (NAME_FIELD, _id) index
+and costs the same no matter how deep the client pages. Cursors are opaque
+URL-safe strings.
+
+The sort key is NAME_FIELD rather than club_name: MongoDB range conditions
+only match values of the same type, so a cursor taken at a null, missing or
+numeric club_name would match none of the string names after it and end
+the listing early. NAME_FIELD is always a string ('' for nameless clubs).
+
+?fields=club_name,link limits which fields are returned.
+"""
+import base64
+import json
+import re
+
+from bson import ObjectId
+from bson.errors import InvalidId
+
+from club_names import NAME_FIELD, normalize_name
+
+SORT = [(NAME_FIELD, 1), ('_id', 1)]
+
+_FIELD_RE = re.compile(r"^[A-Za-z0-9_]+$")
+
+
+def encode_cursor(club):
+    """cursor pointing just after `club` (needs its NAME_FIELD and _id)"""
+    doc_id = club['_id']
+    oid = isinstance(doc_id, ObjectId)
+    payload = {'k': club.get(NAME_FIELD) or '', 'id': str(doc_id) if oid else doc_id, 'oid': oid}
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """(normalized name, _id) from a cursor; ValueError if it is malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        doc_id = ObjectId(payload['id']) if payload.get('oid') else payload['id']
+        # cursors handed out before the switch to NAME_FIELD carry the raw name
+        key = payload['k'] if 'k' in payload else normalize_name(payload['n'])
+        if not isinstance(key, str):
+            raise TypeError(key)
+        return key, doc_id
+    except (ValueError, KeyError, TypeError, InvalidId):
+        raise ValueError('Invalid cursor')
+
+
+def after_filter(cursor):
+    """Mongo filter for the clubs sorted after `cursor`"""
+    key, doc_id = decode_cursor(cursor)
+    return {'$or': [
+        {NAME_FIELD: {'$gt': key}},
+        {NAME_FIELD: key, '_id': {'$gt': doc_id}},
+    ]}
+
+
+def parse_limit(value, default, maximum):
+    """page size from a query string value, clamped to 1..maximum"""
+    if value is None or value == '':
+        return default
+    try:
+        limit = int(value)
+    except ValueError:
+        raise ValueError('limit must be an integer')
+    if limit < 1:
+        raise ValueError('limit must be at least 1')
+    return min(limit, maximum)
+
+
+def parse_fields(value):
+    """list of field names from ?fields=a,b (None = all fields)"""
+    if not value:
+        return None
+    fields = [f.strip() for f in value.split(',') if f.strip()]
+    for field in fields:
+        if not _FIELD_RE.match(field) or field == '_id':
+            raise ValueError(f'Invalid field: {field}')
+    return fields or None
+
+
+def projection(fields, keep=()):
+    """Mongo projection for `fields` plus `keep` (always without _id and NAME_FIELD unless kept)"""
+    if fields is None:
+        return {f: 0 for f in ('_id', NAME_FIELD) if f not in keep}
+    spec = {f: 1 for f in list(fields) + list(keep)}
+    spec.setdefault('_id', 0)
+    return spec
+
+
+def page(collection, limit, after=None, fields=None):
+    """(clubs, next_cursor) for one page; next_cursor is None on the last page"""
+    query = after_filter(after) if after else {}
+    docs = list(collection.find(query, projection(fields, keep=(NAME_FIELD, '_id')))
+                .sort(SORT).limit(limit + 1))
+    more = len(docs) > limit
+    docs = docs[:limit]
+    next_cursor = encode_cursor(docs[-1]) if more else None
+
+    clubs = []
+    for doc in docs:
+        doc.pop('_id', None)
+        doc.pop(NAME_FIELD, None)
+        clubs.append(doc)
+    return clubs, next_cursor
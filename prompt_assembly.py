@@ -0,0 +1,169 @@
+"""
+Token-budget-aware prompt assembly.
+
+A prompt is a list of Sections. Each has a priority, and sections made of
+items (catalog rows, history lines) can shed items from one end. When the
+whole prompt is over the token budget, the assembler trims the lowest
+priority section first, one item at a time, then the next one, and so on;
+required sections are never touched. The outcome is deterministic and comes
+with per-section token counts, so every request can report what it sent.
+
+Token counting is local and pluggable: ApproxTokenizer estimates BPE-style
+counts from words and punctuation without any network call.
+"""
+import importlib
+import re
+import threading
+
+_PIECE_RE = re.compile(r"\w+|[^\w\s]")
+
+
+class ApproxTokenizer:
+    """~BPE token estimate: one token per punctuation mark, ~4 characters per word piece"""
+
+    name = 'approx'
+
+    def __call__(self, text):
+        if not text:
+            return 0
+        return sum(1 + (len(p) - 1) // 4 for p in _PIECE_RE.findall(text))
+
+
+def char_tokens(text):
+    """crudest estimate: 4 characters per token"""
+    return (len(text) + 3) // 4
+
+
+TOKEN_COUNTERS = {
+    'approx': ApproxTokenizer,
+    'chars': lambda: char_tokens,
+}
+
+
+def get_token_counter(spec='approx'):
+    """A text -> token count callable from a registered name or a 'module:factory' path"""
+    if spec in TOKEN_COUNTERS:
+        return TOKEN_COUNTERS[spec]()
+    module_name, _, attr = spec.partition(':')
+    if not attr:
+        raise ValueError(f"Unknown token counter '{spec}'")
+    return getattr(importlib.import_module(module_name), attr)()
+
+
+class Section:
+    """One block of the prompt: a header plus zero or more items"""
+
+    def __init__(self, name, items=(), header='', priority=0, required=False, drop='tail'):
+        self.name = name
+        self.header = header
+        self.items = [i for i in items if i]
+        self.priority = priority    # higher survives longer
+        self.required = required    # never trimmed or dropped
+        self.drop = drop            # 'tail' sheds the last items first, 'head' the first
+
+    @classmethod
+    def text(cls, name, text, **kwargs):
+        return cls(name, [text], **kwargs)
+
+    def render(self, items=None):
+        items = self.items if items is None else items
+        if not items:
+            return ''
+        return self.header + "\n".join(items)
+
+
+class AssembledPrompt:
+    __slots__ = ('text', 'tokens', 'budget', 'sections', 'over_budget')
+
+    def __init__(self, text, tokens, budget, sections, over_budget):
+        self.text = text
+        self.tokens = tokens
+        self.budget = budget
+        self.sections = sections        # name -> {'tokens', 'items', 'dropped'}
+        self.over_budget = over_budget  # required sections alone exceed the budget
+
+    @property
+    def truncated(self):
+        return any(s['dropped'] for s in self.sections.values())
+
+
+class PromptAssembler:
+    """Fit sections into a token budget by trimming the least important first"""
+
+    SEPARATOR = "\n\n"
+
+    def __init__(self, budget=4000, count_tokens=None):
+        self.budget = budget
+        self.count_tokens = count_tokens or ApproxTokenizer()
+        self._lock = threading.Lock()
+        self.prompts = 0
+        self.total_tokens = 0
+        self.max_tokens = 0
+        self.truncated = 0
+        self.over_budget = 0
+        self.dropped_items = {}   # section name -> items dropped so far
+
+    def assemble(self, sections):
+        count = self.count_tokens
+        kept = {id(s): list(s.items) for s in sections}
+        cost = {id(s): count(s.render()) for s in sections}
+        sep_cost = count(self.SEPARATOR)
+
+        def total():
+            live = [c for c in cost.values() if c]
+            return sum(live) + sep_cost * max(0, len(live) - 1)
+
+        tokens = total()
+        trimmable = sorted(
+            (s for s in sections if not s.required),
+            key=lambda s: s.priority
+        )
+        for section in trimmable:
+            if tokens <= self.budget:
+                break
+            items = kept[id(section)]
+            while items and tokens > self.budget:
+                if section.drop == 'head':
+                    items.pop(0)
+                else:
+                    items.pop()
+                cost[id(section)] = count(section.render(items))
+                tokens = total()
+
+        rendered = [section.render(kept[id(section)]) for section in sections]
+        text = self.SEPARATOR.join(r for r in rendered if r)
+        report = {
+            s.name: {
+                'tokens': cost[id(s)],
+                'items': len(kept[id(s)]),
+                'dropped': len(s.items) - len(kept[id(s)]),
+            }
+            for s in sections
+        }
+        final = count(text)
+        prompt = AssembledPrompt(text, final, self.budget, report, final > self.budget)
+        self._record(prompt)
+        return prompt
+
+    def _record(self, prompt):
+        with self._lock:
+            self.prompts += 1
+            self.total_tokens += prompt.tokens
+            self.max_tokens = max(self.max_tokens, prompt.tokens)
+            self.truncated += prompt.truncated
+            self.over_budget += prompt.over_budget
+            for name, section in prompt.sections.items():
+                if section['dropped']:
+                    self.dropped_items[name] = self.dropped_items.get(name, 0) + section['dropped']
+
+    def stats(self):
+        with self._lock:
+            return {
+                'budget': self.budget,
+                'prompts': self.prompts,
+                'avg_tokens': round(self.total_tokens / self.prompts, 1) if self.prompts else 0.0,
+                'max_tokens': self.max_tokens,
+                'truncated': self.truncated,
+                'over_budget': self.over_budget,
+                'dropped_items': dict(self.dropped_items),
+            }
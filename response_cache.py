@@ -0,0 +1,249 @@
+"""
+Caches for /chat answers.
+
+ResponseCache is an exact-match LRU + TTL cache keyed by a hash of the
+normalised question, the club catalog version and (optionally) the
+conversation history. It is bounded by the total size of the cached answers
+in bytes, and it empties itself as soon as it sees a newer catalog version,
+since every cached answer was grounded on the old catalog. Versions only move
+forward: a turn that started before a club write and stores its answer after
+it is ignored instead of flushing the answers for the new catalog.
+
+SemanticResponseCache catches paraphrases the exact cache misses: it embeds
+each question locally and serves a stored answer when the cosine similarity
+to a previous question clears a threshold. The question vectors live in one
+NumPy matrix, so a lookup is a single matrix-vector product.
+"""
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+_PUNCT_RE = re.compile(r"[^\w\s]")
+_SPACE_RE = re.compile(r"\s+")
+
+
+def normalize_message(text):
+    """casefold, drop punctuation and collapse whitespace"""
+    return _SPACE_RE.sub(" ", _PUNCT_RE.sub(" ", text.casefold())).strip()
+
+
+def cache_key(message, catalog_version, history_text=None):
+    """hash identifying one question asked against one catalog version"""
+    h = hashlib.sha256()
+    h.update(str(catalog_version).encode())
+    h.update(b"\0")
+    h.update(normalize_message(message).encode())
+    if history_text:
+        h.update(b"\0")
+        h.update(history_text.encode())
+    return h.hexdigest()
+
+
+class ResponseCache:
+    """LRU + TTL answer cache bounded in bytes and scoped to one catalog version"""
+
+    ENTRY_OVERHEAD = 200   # rough per-entry bookkeeping cost in bytes
+
+    def __init__(self, max_bytes=8 * 1024 * 1024, ttl=3600):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()   # key -> (answer, size, expires_at)
+        self._bytes = 0
+        self._version = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.version_flushes = 0
+        self.stale_calls = 0      # get/put for an older catalog version, ignored
+
+    @property
+    def enabled(self):
+        return self.max_bytes > 0
+
+    def _check_version(self, catalog_version):
+        """flush on a newer catalog version; False for an older (superseded) one"""
+        if self._version is not None and catalog_version < self._version:
+            self.stale_calls += 1
+            return False
+        if catalog_version != self._version:
+            if self._entries:
+                self.version_flushes += 1
+            self._entries.clear()
+            self._bytes = 0
+            self._version = catalog_version
+        return True
+
+    def get(self, key, catalog_version):
+        """Return the cached answer or None"""
+        if not self.enabled:
+            return None
+        with self._lock:
+            if not self._check_version(catalog_version):
+                self.misses += 1
+                return None
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            answer, size, expires_at = entry
+            if time.monotonic() >= expires_at:
+                del self._entries[key]
+                self._bytes -= size
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return answer
+
+    def put(self, key, answer, catalog_version):
+        if not self.enabled:
+            return
+        size = len(answer.encode('utf-8')) + len(key) + self.ENTRY_OVERHEAD
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if not self._check_version(catalog_version):
+                return
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (answer, size, time.monotonic() + self.ttl)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'enabled': self.enabled,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'ttl_seconds': self.ttl,
+                'catalog_version': self._version,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'version_flushes': self.version_flushes,
+                'stale_calls': self.stale_calls,
+            }
+
+
+class SemanticResponseCache:
+    """Near-duplicate answer cache with LRU eviction and a similarity threshold"""
+
+    def __init__(self, embedder, capacity=1024, threshold=0.9, ttl=3600):
+        self.embedder = embedder
+        self.capacity = capacity
+        self.threshold = threshold
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._vectors = np.zeros((capacity, embedder.dim), dtype=np.float32)
+        self._answers = [None] * capacity
+        self._scopes = [None] * capacity
+        self._expires = np.zeros(capacity)
+        self._last_used = np.zeros(capacity, dtype=np.int64)  # 0 = free slot
+        self._tick = 0
+        self._version = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _embed(self, message):
+        return self.embedder.embed([normalize_message(message)])[0]
+
+    def _check_version(self, catalog_version):
+        """forget everything on a newer catalog version; False for an older one"""
+        if self._version is not None and catalog_version < self._version:
+            return False
+        if catalog_version != self._version:
+            self._last_used[:] = 0
+            self._answers = [None] * self.capacity
+            self._scopes = [None] * self.capacity
+            self._version = catalog_version
+        return True
+
+    def _best(self, vec, scope):
+        """slot and similarity of the closest live entry in the same scope"""
+        live = (self._last_used > 0) & (self._expires > time.monotonic())
+        if scope is not None:
+            live &= np.fromiter((s == scope for s in self._scopes), dtype=bool, count=self.capacity)
+        if not live.any():
+            return None, 0.0
+        scores = self._vectors @ vec
+        scores[~live] = -1.0
+        slot = int(np.argmax(scores))
+        return slot, float(scores[slot])
+
+    def get(self, message, catalog_version, scope=None):
+        """Return the answer to a close-enough earlier question, or None"""
+        vec = self._embed(message)
+        if not vec.any():
+            return None
+        with self._lock:
+            if not self._check_version(catalog_version):
+                self.misses += 1
+                return None
+            slot, score = self._best(vec, scope)
+            if slot is None or score < self.threshold:
+                self.misses += 1
+                return None
+            self._tick += 1
+            self._last_used[slot] = self._tick
+            self.hits += 1
+            return self._answers[slot]
+
+    def put(self, message, answer, catalog_version, scope=None):
+        vec = self._embed(message)
+        if not vec.any():
+            return
+        with self._lock:
+            if not self._check_version(catalog_version):
+                return
+            slot, score = self._best(vec, scope)
+            if slot is None or score < 0.9999:
+                # new question: take a free (or expired) slot, else evict the LRU one
+                stale = (self._last_used == 0) | (self._expires <= time.monotonic())
+                if stale.any():
+                    slot = int(np.argmax(stale))
+                else:
+                    slot = int(np.argmin(self._last_used))
+                    self.evictions += 1
+            self._tick += 1
+            self._vectors[slot] = vec
+            self._answers[slot] = answer
+            self._scopes[slot] = scope
+            self._expires[slot] = time.monotonic() + self.ttl
+            self._last_used[slot] = self._tick
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': int((self._last_used > 0).sum()),
+                'capacity': self.capacity,
+                'threshold': self.threshold,
+                'catalog_version': self._version,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'saved_llm_calls': self.hits,
+            }
@@ -0,0 +1,144 @@
+"""
+Keyword retrieval over the club catalog.
+
+BM25Index is an in-memory inverted index over club_name, description and
+majors. It is built once from the catalog and then kept current one club at
+a time, so picking the clubs for a chat prompt only touches the posting lists
+of the words in the user's message.
+"""
+import heapq
+import math
+import re
+import threading
+from collections import Counter
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = frozenset("""
+a about all an and any are as at be but by can club clubs do does for from
+get has have how i if in into is it its join me my of on or our some that
+the their there these this to us we what when where which who why will with
+you your
+""".split())
+
+
+def stem(token):
+    """very light plural folding so 'robotics' and 'robotic' meet"""
+    if len(token) > 3 and token.endswith('s') and not token.endswith('ss'):
+        return token[:-1]
+    return token
+
+
+def tokenize(text):
+    """lowercase word tokens with stopwords removed"""
+    if not text:
+        return []
+    return [stem(t) for t in TOKEN_RE.findall(str(text).lower()) if t not in STOPWORDS]
+
+
+def club_field_text(club, field):
+    """majors can be stored as a list or a comma separated string"""
+    value = club.get(field)
+    if isinstance(value, (list, tuple)):
+        return " ".join(str(v) for v in value)
+    return "" if value is None else str(value)
+
+
+class BM25Index:
+    """Okapi BM25 over a few club fields, with incremental upsert/remove"""
+
+    # club names are short, so their words count extra
+    FIELD_WEIGHTS = {'club_name': 3, 'description': 1, 'majors': 2}
+
+    def __init__(self, field_weights=None, k1=1.2, b=0.75):
+        self.field_weights = field_weights or dict(self.FIELD_WEIGHTS)
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.RLock()
+        self._postings = {}    # term -> {doc_id: term frequency}
+        self._doc_terms = {}   # doc_id -> Counter, needed to undo a document
+        self._doc_lens = {}    # doc_id -> weighted token count
+        self._total_len = 0
+
+    def _terms(self, club):
+        terms = Counter()
+        for field, weight in self.field_weights.items():
+            for token in tokenize(club_field_text(club, field)):
+                terms[token] += weight
+        return terms
+
+    def build(self, clubs_by_id):
+        """Replace the index contents with the given {doc_id: club} mapping"""
+        postings = {}
+        doc_terms = {}
+        doc_lens = {}
+        for did, club in clubs_by_id.items():
+            terms = self._terms(club)
+            doc_terms[did] = terms
+            doc_lens[did] = sum(terms.values())
+            for term, tf in terms.items():
+                postings.setdefault(term, {})[did] = tf
+        with self._lock:
+            self._postings = postings
+            self._doc_terms = doc_terms
+            self._doc_lens = doc_lens
+            self._total_len = sum(doc_lens.values())
+
+    def upsert(self, did, club):
+        with self._lock:
+            self.remove(did)
+            terms = self._terms(club)
+            self._doc_terms[did] = terms
+            self._doc_lens[did] = sum(terms.values())
+            self._total_len += self._doc_lens[did]
+            for term, tf in terms.items():
+                self._postings.setdefault(term, {})[did] = tf
+
+    def remove(self, did):
+        with self._lock:
+            terms = self._doc_terms.pop(did, None)
+            if terms is None:
+                return
+            self._total_len -= self._doc_lens.pop(did)
+            for term in terms:
+                posting = self._postings.get(term)
+                if posting is not None:
+                    posting.pop(did, None)
+                    if not posting:
+                        del self._postings[term]
+
+    def __len__(self):
+        return len(self._doc_terms)
+
+    def search(self, query, k=10):
+        """Return up to k (doc_id, score) pairs, best first"""
+        terms = set(tokenize(query))
+        if not terms:
+            return []
+        with self._lock:
+            n = len(self._doc_terms)
+            if n == 0:
+                return []
+            avgdl = self._total_len / n
+            k1, b = self.k1, self.b
+            doc_lens = self._doc_lens
+            scores = {}
+            for term in terms:
+                posting = self._postings.get(term)
+                if not posting:
+                    continue
+                df = len(posting)
+                idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+                for did, tf in posting.items():
+                    norm = tf + k1 * (1 - b + b * doc_lens[did] / avgdl)
+                    scores[did] = scores.get(did, 0.0) + idf * tf * (k1 + 1) / norm
+        return heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+
+
+def reciprocal_rank_fusion(rankings, k=10, c=60):
+    """Merge several [(doc_id, score), ...] rankings into one top-k list"""
+    fused = {}
+    for ranking in rankings:
+        for rank, (did, _) in enumerate(ranking):
+            fused[did] = fused.get(did, 0.0) + 1.0 / (c + rank + 1)
+    return heapq.nlargest(k, fused.items(), key=lambda item: item[1])
@@ -0,0 +1,210 @@
+"""
+Request coalescing ("single flight") for expensive calls.
+
+When many requests ask for the same thing at once, only the first one (the
+leader) does the work; the others wait for it and receive the same result.
+SingleFlight does this between the threads of one worker and
+AsyncSingleFlight between the coroutines of one event loop. MongoFlightLock
+extends it across workers: the leader holds a lease document in MongoDB and
+writes the finished result there, where waiters in other processes pick it up.
+"""
+import asyncio
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from pymongo.errors import DuplicateKeyError
+
+
+class FlightAborted(Exception):
+    """The leader stopped without a result (cancelled, interrupted)"""
+
+
+def shareable(error):
+    """the leader's error as waiters should see it: control-flow exceptions
+    (GeneratorExit, CancelledError, KeyboardInterrupt) stay with the leader"""
+    if error is None or isinstance(error, Exception):
+        return error
+    return FlightAborted('The request was cancelled')
+
+
+class _Call:
+    __slots__ = ('event', 'result', 'error', 'waiters')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Run one call per key at a time; concurrent callers share its result"""
+
+    def __init__(self, distributed=None):
+        self.distributed = distributed   # optional MongoFlightLock
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.leaders = 0
+        self.shared = 0
+
+    def begin(self, key):
+        """Join the flight for key. Returns (call, is_leader)."""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.shared += 1
+                return call, False
+            call = self._calls[key] = _Call()
+            self.leaders += 1
+            return call, True
+
+    def finish(self, key, call, result=None, error=None):
+        """Publish the leader's outcome and release every waiter"""
+        call.result = result
+        call.error = shareable(error)
+        with self._lock:
+            if self._calls.get(key) is call:
+                del self._calls[key]
+        call.event.set()
+
+    @staticmethod
+    def wait(call, timeout=None):
+        """Block until the leader finishes; re-raise its error"""
+        if not call.event.wait(timeout):
+            raise TimeoutError('timed out waiting for the in-flight request')
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def do(self, key, fn):
+        """Return (result, shared) where shared means another caller did the work"""
+        call, leader = self.begin(key)
+        if not leader:
+            return self.wait(call), True
+        try:
+            if self.distributed is not None:
+                result, shared = self.distributed.run(key, fn)
+            else:
+                result, shared = fn(), False
+        except BaseException as e:
+            self.finish(key, call, error=e)
+            raise
+        self.finish(key, call, result=result)
+        return result, shared
+
+    def stats(self):
+        with self._lock:
+            in_flight = len(self._calls)
+        stats = {'leaders': self.leaders, 'shared': self.shared, 'in_flight': in_flight}
+        if self.distributed is not None:
+            stats['cross_worker'] = self.distributed.stats()
+        return stats
+
+
+class AsyncSingleFlight:
+    """asyncio counterpart of SingleFlight for coroutines on one event loop"""
+
+    def __init__(self):
+        self._futures = {}
+        self.leaders = 0
+        self.shared = 0
+
+    async def do(self, key, fn):
+        """Await fn() once per key; returns (result, shared)"""
+        future = self._futures.get(key)
+        if future is not None:
+            self.shared += 1
+            # shield: a cancelled waiter must not cancel the leader's result
+            return await asyncio.shield(future), True
+
+        future = self._futures[key] = asyncio.get_running_loop().create_future()
+        self.leaders += 1
+        try:
+            result = await fn()
+        except BaseException as e:
+            # a cancelled leader (client went away) must not cancel its waiters
+            future.set_exception(shareable(e))
+            future.exception()   # mark retrieved when nobody was waiting
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            del self._futures[key]
+
+    def stats(self):
+        return {'leaders': self.leaders, 'shared': self.shared, 'in_flight': len(self._futures)}
+
+
+class MongoFlightLock:
+    """Cross-worker single flight backed by a lease document per key"""
+
+    def __init__(self, collection, lease=30, result_ttl=10, poll_interval=0.05):
+        self.collection = collection
+        self.lease = lease
+        self.result_ttl = result_ttl
+        self.poll_interval = poll_interval
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.acquired = 0
+        self.shared = 0
+        self.takeovers = 0
+        # MongoDB removes lease documents once expires_at has passed
+        collection.create_index('expires_at', expireAfterSeconds=0)
+
+    def _try_acquire(self, key):
+        now = datetime.utcnow()
+        try:
+            self.collection.insert_one({
+                '_id': key,
+                'owner': self.owner,
+                'done': False,
+                'expires_at': now + timedelta(seconds=self.lease)
+            })
+            return True
+        except DuplicateKeyError:
+            # the TTL monitor only runs once a minute, so clear expired
+            # leases (and expired results) here
+            stale = self.collection.delete_one({'_id': key, 'expires_at': {'$lt': now}})
+            if stale.deleted_count:
+                self.takeovers += 1
+                return self._try_acquire(key)
+            return False
+
+    def run(self, key, fn):
+        """Return (result, shared); fn runs here only if no worker holds the lease"""
+        deadline = time.monotonic() + self.lease
+        while True:
+            if self._try_acquire(key):
+                break
+            doc = self.collection.find_one({'_id': key}, {'done': 1, 'result': 1})
+            if doc and doc.get('done'):
+                self.shared += 1
+                return doc.get('result'), True
+            if time.monotonic() >= deadline:
+                # the leader looks stuck; do the work ourselves
+                return fn(), False
+            time.sleep(self.poll_interval)
+
+        self.acquired += 1
+        try:
+            result = fn()
+        except BaseException:
+            self.collection.delete_one({'_id': key, 'owner': self.owner})
+            raise
+        self.collection.update_one(
+            {'_id': key, 'owner': self.owner},
+            {'$set': {
+                'done': True,
+                'result': result,
+                'expires_at': datetime.utcnow() + timedelta(seconds=self.result_ttl)
+            }}
+        )
+        return result, False
+
+    def stats(self):
+        return {'acquired': self.acquired, 'shared': self.shared, 'takeovers': self.takeovers}
@@ -0,0 +1,157 @@
+"""
+Typeahead suggestions for club names and majors.
+
+SuggestIndex keeps every normalized club name and major in one sorted list;
+a prefix query is two bisects for the matching range plus a top-N pick by
+popularity, so /clubs/suggest never touches MongoDB. Popularity is the
+club's `members` count for names and the number of clubs for majors.
+
+Short prefixes match a large slice of the catalog, so answers are cached per
+prefix. A club write only drops the cached prefixes of the names and majors
+it changed; everything else stays warm.
+
+The index is a CatalogCache listener: build/upsert/remove keep it in step
+with club writes without rebuilding.
+"""
+import heapq
+import threading
+from bisect import bisect_left, insort
+
+from club_names import normalize_name
+
+CLUB = 'club'
+MAJOR = 'major'
+
+
+def members(club):
+    try:
+        return max(int(float(club.get('members') or 0)), 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def club_major_labels(club):
+    """majors of a club as display strings (list or comma separated string)"""
+    value = club.get('majors')
+    if not value:
+        return []
+    parts = value if isinstance(value, (list, tuple)) else str(value).split(',')
+    return [str(p).strip() for p in parts if str(p).strip()]
+
+
+class SuggestIndex:
+    """Prefix suggestions over club names and majors, most popular first"""
+
+    def __init__(self, limit=8, cache_size=4096):
+        self.limit = limit
+        self.cache_size = cache_size
+        self._lock = threading.Lock()
+        self._keys = []          # sorted (normalized text, kind)
+        self._entries = {}       # (normalized text, kind) -> [label, {doc_id: popularity}]
+        self._clubs = {}         # doc_id -> the (name key, major keys) it contributed
+        self._cache = {}         # prefix -> {limit: answer}
+        self.queries = 0
+        self.cache_hits = 0
+
+    # ---- catalog listener ----
+    def build(self, clubs_by_id):
+        # index into a scratch instance so queries keep the old index meanwhile
+        fresh = SuggestIndex()
+        for did, club in clubs_by_id.items():
+            fresh._add(did, club, sort=False)
+        fresh._keys.sort()
+        with self._lock:
+            self._keys, self._entries, self._clubs = fresh._keys, fresh._entries, fresh._clubs
+            self._cache.clear()
+
+    def upsert(self, did, club):
+        with self._lock:
+            self._invalidate(self._remove(did) + self._add(did, club, sort=True))
+
+    def remove(self, did):
+        with self._lock:
+            self._invalidate(self._remove(did))
+
+    def _invalidate(self, keys):
+        """drop cached answers for every prefix of the changed keys"""
+        for text, _ in keys:
+            for i in range(1, len(text) + 1):
+                self._cache.pop(text[:i], None)
+
+    def _add(self, did, club, sort):
+        items = []
+        name = club.get('club_name')
+        if normalize_name(name):
+            items.append(((normalize_name(name), CLUB), name, members(club)))
+        for major in club_major_labels(club):
+            items.append(((normalize_name(major), MAJOR), major, 1))
+        for key, label, popularity in items:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = [label, {}]
+                if sort:
+                    insort(self._keys, key)
+                else:
+                    self._keys.append(key)
+            entry[1][did] = popularity
+        self._clubs[did] = [key for key, _, _ in items]
+        return self._clubs[did]
+
+    def _remove(self, did):
+        keys = self._clubs.pop(did, [])
+        for key in keys:
+            entry = self._entries.get(key)
+            if entry is None:
+                continue
+            entry[1].pop(did, None)
+            if not entry[1]:
+                del self._entries[key]
+                i = bisect_left(self._keys, key)
+                if i < len(self._keys) and self._keys[i] == key:
+                    del self._keys[i]
+        return keys
+
+    # ---- queries ----
+    def suggest(self, query, limit=None):
+        """{'clubs': [...], 'majors': [...]} whose normalized text starts with `query`"""
+        prefix = normalize_name(query)
+        limit = limit or self.limit
+        with self._lock:
+            self.queries += 1
+            if not prefix:
+                return {'clubs': [], 'majors': []}
+            cached = self._cache.get(prefix, {}).get(limit)
+            if cached is not None:
+                self.cache_hits += 1
+                return cached
+
+            start = bisect_left(self._keys, (prefix,))
+            end = bisect_left(self._keys, (prefix[:-1] + chr(ord(prefix[-1]) + 1),))
+            clubs, majors = [], []
+            for key in self._keys[start:end]:
+                label, docs = self._entries[key]
+                if key[1] == CLUB:
+                    clubs.append((max(docs.values()), key[0], label, len(docs)))
+                else:
+                    majors.append((len(docs), key[0], label))
+
+            # most popular first (members, then same-named clubs), then alphabetical
+            clubs = heapq.nsmallest(limit, clubs, key=lambda r: (-r[0], -r[3], r[1]))
+            majors = heapq.nsmallest(limit, majors, key=lambda r: (-r[0], r[1]))
+            answer = {
+                'clubs': [{'club_name': label, 'members': pop, 'count': n} for pop, _, label, n in clubs],
+                'majors': [{'major': label, 'clubs': n} for n, _, label in majors],
+            }
+            if len(self._cache) >= self.cache_size:
+                self._cache.clear()
+            self._cache.setdefault(prefix, {})[limit] = answer
+            return answer
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._keys),
+                'queries': self.queries,
+                'cache_hits': self.cache_hits,
+                'cached_prefixes': len(self._cache),
+            }
@@ -0,0 +1,25 @@
+import os
+import sys
+
+import pytest
+
+# the app modules live at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope='session')
+def hello():
+    """hello.py booted against mongomock and the fake LLM backend"""
+    mongomock = pytest.importorskip('mongomock')
+    import pymongo
+
+    os.environ['MONGODB_CLIENT'] = 'mongodb://tests'
+    os.environ['LLM_BACKEND'] = 'fake'
+    os.environ['CHAT_SUMMARY'] = '0'
+    real_client = pymongo.MongoClient
+    pymongo.MongoClient = mongomock.MongoClient
+    try:
+        import hello
+    finally:
+        pymongo.MongoClient = real_client
+    return hello
@@ -0,0 +1,143 @@
+"""
+Route-level tests for the async (Quart) chat app, with in-memory async collections
+"""
+import asyncio
+
+import pytest
+
+from circuit_breaker import CircuitBreaker
+from llm_backend import FakeBackend
+
+pytest.importorskip('quart')
+
+
+class AsyncCursor:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def sort(self, *args):
+        self._cursor = self._cursor.sort(*args)
+        return self
+
+    def limit(self, n):
+        self._cursor = self._cursor.limit(n)
+        return self
+
+    async def to_list(self, length=None):
+        return list(self._cursor)
+
+
+class AsyncCollection:
+    """just enough of AsyncMongoClient's collection API, over a mongomock collection"""
+
+    def __init__(self, collection):
+        self._collection = collection
+
+    def find(self, *args, **kwargs):
+        return AsyncCursor(self._collection.find(*args, **kwargs))
+
+    async def find_one(self, *args, **kwargs):
+        return self._collection.find_one(*args, **kwargs)
+
+    async def update_one(self, *args, **kwargs):
+        return self._collection.update_one(*args, **kwargs)
+
+    async def insert_many(self, docs, ordered=True):
+        return self._collection.insert_many(docs, ordered=ordered)
+
+
+@pytest.fixture
+def asgi(hello, monkeypatch):
+    import asgi_app
+
+    hello.collection.delete_many({})
+    hello.collection.insert_many([
+        {'club_name': 'Robotics Club', 'link': 'https://example.edu/robots',
+         'description': 'Build robots.', 'majors': 'ME, ECE'},
+        {'club_name': 'Chess Club', 'link': 'https://example.edu/chess',
+         'description': 'Weekly games.', 'majors': 'Mathematics'},
+    ])
+    hello.catalog_cache.invalidate()
+    hello.response_cache.clear()
+    monkeypatch.setattr(hello, 'llm', FakeBackend(latency=0, tokens_per_second=2000, reply_tokens=12))
+    monkeypatch.setattr(hello, 'gemini_breaker', CircuitBreaker(is_failure=hello.counts_against_llm))
+    monkeypatch.setattr(asgi_app, 'sessions_collection', AsyncCollection(hello.sessions_collection))
+    monkeypatch.setattr(asgi_app, 'messages_collection', AsyncCollection(hello.messages_collection))
+    return asgi_app
+
+
+def post(asgi, path, body):
+    async def run():
+        response = await asgi.app.test_client().post(path, json=body)
+        return response.status_code, await response.get_data(as_text=True)
+    return asyncio.run(run())
+
+
+def test_chat_answers_from_the_llm_and_persists(asgi, hello):
+    status, body = post(asgi, '/chat', {'message': 'I like building robots, any ideas?'})
+    assert status == 200
+    assert '"source":"llm"' in body.replace(' ', '')
+    assert 'simulated answer to: I like building robots' in body
+    assert hello.messages_collection.count_documents({'session_id': 'demo-session'}) >= 2
+
+
+def test_chat_routes_lookups_and_validates(asgi):
+    status, body = post(asgi, '/chat', {'message': 'link for chess club'})
+    assert status == 200 and 'https://example.edu/chess' in body
+    status, body = post(asgi, '/chat', {'message': '  '})
+    assert status == 400 and 'No message provided' in body
+
+
+def test_chat_stream_sends_deltas_then_done(asgi):
+    status, body = post(asgi, '/chat/stream', {'message': 'Any clubs for strategy games?'})
+    assert status == 200
+    assert body.count('data: {"delta"') == 12
+    assert 'event: done' in body
+
+
+class CancelledMidCall(FakeBackend):
+    """the leader's request is cancelled (client disconnect) while it awaits the model"""
+
+    def __init__(self, flight):
+        super().__init__(latency=0)
+        self.flight = flight
+
+    async def agenerate(self, prompt, timeout=None, prefix=None):
+        while self.flight.stats()['shared'] == 0:
+            await asyncio.sleep(0.01)
+        raise asyncio.CancelledError()
+
+
+def test_cancelled_leader_gives_waiters_an_error(asgi, hello, monkeypatch):
+    monkeypatch.setattr(hello, 'llm', CancelledMidCall(asgi.chat_flight))
+    message = {'message': 'Something about chess strategy please'}
+
+    async def run():
+        client = asgi.app.test_client()
+        leader = asyncio.create_task(client.post('/chat', json=message))
+        while asgi.chat_flight.stats()['in_flight'] == 0:
+            await asyncio.sleep(0.01)
+        response = await client.post('/chat', json=message)
+        await asyncio.gather(leader, return_exceptions=True)
+        return response.status_code, await response.get_json()
+
+    status, body = asyncio.run(run())
+    assert status == 503
+    assert body == {'success': False, 'error': 'The request was cancelled'}
+
+
+def test_upstream_errors_fall_back_to_the_club_search(asgi, hello, monkeypatch):
+    monkeypatch.setattr(hello, 'llm', FakeBackend(latency=0, error_rate=1))
+    status, body = post(asgi, '/chat', {'message': 'robots please'})
+    assert status == 200 and '"source":"retrieval"' in body.replace(' ', '')
+    status, body = post(asgi, '/chat/stream', {'message': 'any robots club?'})
+    assert 'event: done' in body and 'Robotics Club' in body
+
+
+def test_llm_timeouts_are_errors_on_both_routes(asgi, hello, monkeypatch):
+    monkeypatch.setattr(hello, 'CHAT_TIMEOUT', 0.1)
+    monkeypatch.setattr(hello, 'llm', FakeBackend(latency=0.3))
+    status, _ = post(asgi, '/chat', {'message': 'chess please'})
+    assert status == 504
+    status, body = post(asgi, '/chat/stream', {'message': 'any robots club?'})
+    assert 'event: error' in body and 'did not answer in time' in body
@@ -0,0 +1,26 @@
+"""
+Unit tests for the benchmark helpers (the full run needs mongomock and boots hello)
+"""
+from benchmark_api import percentile, summarize, synthetic_clubs
+
+
+def test_percentile_nearest_rank():
+    samples = list(range(1, 101))
+    assert percentile(samples, 50) == 50
+    assert percentile(samples, 99) == 99
+    assert percentile([7], 95) == 7
+
+
+def test_summarize_row():
+    row = summarize('GET /clubs', 100, [0.001, 0.002, 0.003, 0.004], errors=1, elapsed=0.5)
+    assert row['requests'] == 4 and row['errors'] == 1
+    assert row['p50_ms'] == 2.0 and row['p99_ms'] == 4.0
+    assert row['throughput_rps'] == 8.0
+
+
+def test_synthetic_clubs_unique_and_deterministic():
+    sample = [{'club_name': 'Film Club', 'link': 'l', 'description': 'd', 'majors': 'Finance'}]
+    clubs = synthetic_clubs(250, sample)
+    assert len({c['club_name'] for c in clubs}) == 250
+    assert clubs == synthetic_clubs(250, sample)
+    assert {'department', 'members', 'events_2024', 'event_attendance_2024'} <= set(clubs[0])
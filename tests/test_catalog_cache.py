@@ -0,0 +1,124 @@
+"""
+Unit tests for the in-process club catalog cache (no MongoDB needed)
+"""
+import threading
+import time
+
+from catalog_cache import CatalogCache
+
+
+def make_cache(rows, ttl=300):
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return list(rows)
+
+    cache = CatalogCache(loader, lambda club: club['club_name'], ttl=ttl)
+    return cache, calls
+
+
+def test_hit_after_first_load():
+    cache, calls = make_cache([{'_id': 1, 'club_name': 'Film Club'}])
+    first = cache.get()
+    second = cache.get()
+    assert first is second
+    assert len(calls) == 1
+    assert first.context == "Film Club"
+    assert cache.hits == 1 and cache.misses == 1
+
+
+def test_invalidate_reloads_and_bumps_version_on_change():
+    rows = [{'_id': 1, 'club_name': 'Film Club'}]
+    cache, calls = make_cache(rows)
+    v1 = cache.get().version
+    rows.append({'_id': 2, 'club_name': 'Robotics Club'})
+    cache.invalidate()
+    snap = cache.get()
+    assert len(calls) == 2
+    assert snap.version == v1 + 1
+    assert snap.context == "Film Club\nRobotics Club"
+
+
+def test_ttl_expiry_keeps_version_when_unchanged():
+    cache, calls = make_cache([{'_id': 1, 'club_name': 'Film Club'}], ttl=0)
+    first = cache.get()
+    assert cache.get() is first          # expired: served while it reloads
+    cache._refresher.join(5)
+    assert len(calls) == 2
+    assert cache.get().version == first.version
+
+
+def test_expired_snapshot_is_served_while_a_reload_runs():
+    rows = [{'_id': 1, 'club_name': 'Film Club'}]
+    release = threading.Event()
+    loads = []
+
+    def loader():
+        loads.append(1)
+        if len(loads) > 1:
+            release.wait(5)       # a slow scan of a big collection
+        return list(rows)
+
+    cache = CatalogCache(loader, lambda club: club['club_name'], ttl=0)
+    index = RecordingIndex()
+    cache.add_listener(index)
+    old = cache.get()
+    rows.append({'_id': 2, 'club_name': 'Robotics Club'})
+
+    started = time.monotonic()
+    assert cache.get() is old and cache.get() is old
+    assert time.monotonic() - started < 1
+    assert cache.stats()['stale_hits'] == 1
+    while len(loads) < 2 and time.monotonic() - started < 5:
+        time.sleep(0.005)     # the reload thread is reading the collection
+
+    cache.apply(upserted=[{'_id': 3, 'club_name': 'Chess Club'}])   # lands mid-reload
+    refresher = cache._refresher
+    release.set()
+    refresher.join(5)
+    cache.ttl = 300
+    snap = cache.get()
+    assert sorted(snap.clubs) == ['1', '2', '3']     # the write is replayed on the reload
+    assert snap.version == old.version + 2
+    assert index.events[-2:] == [('build', ['1', '2']), ('upsert', '3')]
+
+
+class RecordingIndex:
+    def __init__(self):
+        self.events = []
+
+    def build(self, clubs):
+        self.events.append(('build', sorted(clubs)))
+
+    def upsert(self, did, club):
+        self.events.append(('upsert', did))
+
+    def remove(self, did):
+        self.events.append(('remove', did))
+
+
+def test_apply_patches_snapshot_and_notifies_listeners():
+    cache, calls = make_cache([{'_id': 1, 'club_name': 'Film Club'}])
+    index = RecordingIndex()
+    cache.add_listener(index)
+    v1 = cache.get().version
+    cache.apply(upserted=[{'_id': 2, 'club_name': 'Robotics Club'}], removed=[1])
+    snap = cache.get()
+    assert len(calls) == 1
+    assert snap.version == v1 + 1
+    assert list(snap.clubs) == ['2']
+    assert snap.render(['2', '1']) == "Robotics Club"
+    assert index.events == [('build', ['1']), ('remove', '1'), ('upsert', '2')]
+
+
+def test_fingerprint_depends_on_contents_not_version():
+    a, _ = make_cache([{'_id': 1, 'club_name': 'Film Club'}])
+    b, _ = make_cache([{'_id': 1, 'club_name': 'Chess Club'}])
+    a.get()
+    b.get()
+    b.apply(upserted=[{'_id': 1, 'club_name': 'Film Club'}])   # same catalog, another version
+    assert a.get().version != b.get().version
+    assert a.get().fingerprint() == b.get().fingerprint()
+    b.apply(upserted=[{'_id': 2, 'club_name': 'Robotics Club'}])
+    assert a.get().fingerprint() != b.get().fingerprint()
@@ -0,0 +1,28 @@
+"""
+Unit tests for the streamed catalog export
+"""
+import json
+
+import pytest
+
+from catalog_export import export_chunks
+
+CLUBS = [{'_id': i, 'club_name': f'Club {i}', 'majors': ['CS']} for i in range(5)]
+
+
+def test_ndjson_lines_in_batches():
+    chunks = list(export_chunks((dict(c) for c in CLUBS), 'ndjson', batch=2))
+    assert len(chunks) == 3
+    rows = [json.loads(line) for line in "".join(chunks).splitlines()]
+    assert rows == [{'club_name': f'Club {i}', 'majors': ['CS']} for i in range(5)]
+
+
+def test_json_array_is_valid_json():
+    body = "".join(export_chunks((dict(c) for c in CLUBS), 'json-array', batch=2))
+    assert [c['club_name'] for c in json.loads(body)] == [f'Club {i}' for i in range(5)]
+    assert "".join(export_chunks(iter([]), 'json-array')) == '[]'
+
+
+def test_unknown_format():
+    with pytest.raises(ValueError):
+        list(export_chunks(iter([]), 'xml'))
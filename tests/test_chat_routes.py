@@ -0,0 +1,157 @@
+"""
+Route-level tests for the Flask chat endpoints (mongomock + fake LLM)
+"""
+import threading
+import time
+
+import pytest
+
+from circuit_breaker import CircuitBreaker
+from llm_backend import FakeBackend
+
+
+@pytest.fixture
+def app(hello, monkeypatch):
+    hello.collection.delete_many({})
+    hello.collection.insert_many([
+        {'club_name': 'Robotics Club', 'link': 'https://example.edu/robots',
+         'description': 'Build robots.', 'majors': 'ME, ECE'},
+        {'club_name': 'Chess Club', 'link': 'https://example.edu/chess',
+         'description': 'Weekly games.', 'majors': 'Mathematics'},
+    ])
+    hello.catalog_cache.invalidate()
+    hello.response_cache.clear()
+    # slow tokens so a streaming leader is still in flight while a waiter joins
+    monkeypatch.setattr(hello, 'llm', FakeBackend(latency=0, tokens_per_second=20, reply_tokens=40))
+    monkeypatch.setattr(hello, 'gemini_breaker', CircuitBreaker(is_failure=hello.counts_against_llm))
+    return hello
+
+
+def start_waiter(hello, message):
+    """POST /chat in a thread once a streaming leader holds the flight; returns (thread, result)"""
+    result = {}
+    shared = hello.chat_flight.stats()['shared']
+
+    def run():
+        response = hello.app.test_client().post('/chat', json={'message': message})
+        result['status'], result['body'] = response.status_code, response.get_json()
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    deadline = time.monotonic() + 5
+    while hello.chat_flight.stats()['shared'] == shared and time.monotonic() < deadline:
+        time.sleep(0.005)
+    return thread, result
+
+
+def test_disconnected_stream_leader_gives_waiters_a_json_error(app):
+    message = "I like building robots, any ideas?"
+    leader = app.app.test_client().post('/chat/stream', json={'message': message})
+    chunks = iter(leader.response)
+    assert b'delta' in next(chunks)
+
+    thread, result = start_waiter(app, message)
+    leader.close()   # client disconnects mid-stream: GeneratorExit in the leader
+    thread.join(5)
+
+    assert result['status'] == 503
+    assert result['body'] == {'success': False, 'error': 'The request was cancelled'}
+
+
+def test_stream_leader_timeout_is_a_504_for_waiters(app, monkeypatch):
+    monkeypatch.setattr(app, 'CHAT_TIMEOUT', 0.5)
+    message = "Something about strategy games please"
+    leader = app.app.test_client().post('/chat/stream', json={'message': message})
+    chunks = iter(leader.response)
+    next(chunks)
+
+    thread, result = start_waiter(app, message)
+    events = b"".join(chunks)
+    thread.join(5)
+
+    assert b'event: error' in events
+    assert result['status'] == 504
+    assert result['body']['error'] == 'The model did not answer in time'
+
+
+def test_llm_timeouts_are_errors_on_both_routes(app, monkeypatch):
+    monkeypatch.setattr(app, 'CHAT_TIMEOUT', 0.1)
+    monkeypatch.setattr(app, 'llm', FakeBackend(latency=0.3))
+    client = app.app.test_client()
+
+    response = client.post('/chat', json={'message': "Any clubs for chess players?"})
+    assert response.status_code == 504
+
+    events = client.post('/chat/stream', json={'message': "Any clubs for robot builders?"}).get_data()
+    assert b'event: error' in events and b'did not answer in time' in events
+    assert b'retrieval' not in events
+
+
+def test_cross_worker_flight_key_follows_catalog_contents(app, monkeypatch):
+    monkeypatch.setattr(app.chat_flight, 'distributed', object())
+    catalog = app.catalog_cache.get()
+    before = app.build_turn('u', 's', "robots?", "", catalog)
+    club = app.collection.find_one({'club_name': 'Chess Club'})
+    app.catalog_cache.apply(upserted=[club])   # a write that leaves the catalog as it was
+    after = app.build_turn('u', 's', "robots?", "", app.catalog_cache.get())
+    assert after['cache_key'] != before['cache_key']
+    assert after['flight_key'] == before['flight_key']
+
+
+def test_upstream_errors_fall_back_to_the_club_search(app, monkeypatch):
+    monkeypatch.setattr(app, 'llm', FakeBackend(latency=0, error_rate=1))
+    client = app.app.test_client()
+
+    body = client.post('/chat', json={'message': 'robots please'}).get_json()
+    assert body['success'] and body['source'] == 'retrieval'
+    assert 'Robotics Club' in body['response']
+
+    events = client.post('/chat/stream', json={'message': 'any robots club?'}).get_data(as_text=True)
+    assert 'event: done' in events and '"source": "retrieval"' in events
+    assert app.fallback.stats()['by_reason']['llm_error'] >= 2
+    assert app.gemini_breaker.stats()['state'] == 'closed'   # 2 failures, threshold 5
+
+
+def test_summaries_respect_the_breaker_and_fall_back(app, monkeypatch):
+    messages = [{'role': 'user', 'text': 'I like robots', 'ts': 0}]
+    monkeypatch.setattr(app, 'llm', FakeBackend(latency=0, error_rate=1))
+    for _ in range(5):
+        assert 'robots' in app.summarize_turns("", messages)
+    assert app.gemini_breaker.stats()['state'] == 'open'
+
+    calls = app.llm.stats()['calls']
+    assert 'robots' in app.summarize_turns("", messages)
+    assert app.llm.stats()['calls'] == calls   # open circuit: no upstream call
+
+
+def test_summary_calls_time_out(app, monkeypatch):
+    monkeypatch.setattr(app, 'llm', FakeBackend(latency=5))
+    monkeypatch.setattr(app, 'SUMMARY_TIMEOUT', 0.05)
+    messages = [{'role': 'user', 'text': 'I like chess', 'ts': 0}]
+    assert 'chess' in app.summarize_turns("", messages)
+    assert app.llm.stats()['timeouts'] == 1
+
+
+class CachedModel:
+    def generate_content(self, prompt, **kwargs):
+        return type('Response', (), {'text': 'Cached answer'})()
+
+
+def test_cached_prefix_reports_sent_tokens_and_skips_big_catalogs(app, monkeypatch):
+    from context_cache import PrefixCache
+    from llm_backend import GeminiBackend
+
+    prefix_cache = PrefixCache(lambda text, ttl: 'handle', lambda handle: CachedModel())
+    monkeypatch.setattr(app, 'prefix_cache', prefix_cache)
+    monkeypatch.setattr(app, 'llm', GeminiBackend(lambda: CachedModel(), prefix_cache))
+    client = app.app.test_client()
+
+    body = client.post('/chat', json={'message': 'tell me something about robots'}).get_json()
+    assert body['response'] == 'Cached answer'
+    assert body['cached_tokens'] > body['prompt_tokens'] > 0
+    assert prefix_cache.stats()['creates'] == 1
+
+    # a catalog whose prefix is over the limit is not cached: plain top-k prompt
+    monkeypatch.setattr(app, 'CONTEXT_CACHE_MAX_TOKENS', 10)
+    body = client.post('/chat', json={'message': 'anything for chess players'}).get_json()
+    assert body['cached_tokens'] == 0 and prefix_cache.stats()['hits'] == 0
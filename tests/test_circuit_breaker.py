@@ -0,0 +1,66 @@
+"""
+Unit tests for the Gemini circuit breaker
+"""
+import time
+
+import pytest
+
+from circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpen
+
+
+def fail():
+    raise RuntimeError("upstream down")
+
+
+def trip(breaker, n):
+    for _ in range(n):
+        with pytest.raises(RuntimeError):
+            breaker.call(fail)
+
+
+def test_opens_after_consecutive_failures_and_fails_fast():
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60)
+    trip(breaker, 2)
+    assert breaker.state == CLOSED
+    trip(breaker, 1)
+    assert breaker.state == OPEN
+
+    calls = []
+    with pytest.raises(CircuitOpen) as e:
+        breaker.call(lambda: calls.append(1))
+    assert calls == [] and e.value.retry_after >= 1
+    assert breaker.stats()['rejected'] == 1 and breaker.stats()['opened'] == 1
+
+
+def test_opens_on_failure_rate_over_window():
+    breaker = CircuitBreaker(failure_threshold=100, failure_rate=0.5, window=4)
+    breaker.call(lambda: None)
+    trip(breaker, 1)
+    breaker.call(lambda: None)
+    assert breaker.state == CLOSED
+    trip(breaker, 1)
+    assert breaker.state == OPEN
+
+
+def test_half_open_trial_closes_or_reopens():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.01)
+    trip(breaker, 1)
+    time.sleep(0.02)
+    assert breaker.state == HALF_OPEN
+    trip(breaker, 1)
+    assert breaker.state == OPEN
+
+    time.sleep(0.02)
+    breaker.allow()
+    with pytest.raises(CircuitOpen):
+        breaker.allow()     # only one trial at a time
+    breaker.success()
+    assert breaker.state == CLOSED
+
+
+def test_ignored_errors_do_not_count():
+    breaker = CircuitBreaker(failure_threshold=1, is_failure=lambda e: not isinstance(e, ValueError))
+    with pytest.raises(ValueError):
+        with breaker.guard():
+            raise ValueError("bad request")
+    assert breaker.state == CLOSED and breaker.stats()['failures'] == 0
@@ -0,0 +1,35 @@
+"""
+Unit tests for normalized club name lookups
+"""
+import pytest
+
+from club_names import NAME_FIELD, find_by_name, name_filter, normalize_name, with_name_key
+
+mongomock = pytest.importorskip('mongomock')
+
+
+def test_normalize_name():
+    assert normalize_name("  Film\t CLUB ") == "film club"
+    assert normalize_name("Straße") == "strasse"
+    assert normalize_name(None) == ''
+
+
+def test_filters_are_index_friendly():
+    assert name_filter("Film  Club") == {NAME_FIELD: 'film club'}
+    assert name_filter("fil", 'prefix') == {NAME_FIELD: {'$gte': 'fil', '$lt': 'fim'}}
+    # user input is escaped, never run as a regex
+    assert name_filter("a.*", 'contains') == {NAME_FIELD: {'$regex': r'a\.\*'}}
+    with pytest.raises(ValueError):
+        name_filter("film", 'sounds-like')
+    with pytest.raises(ValueError):
+        name_filter("   ")
+
+
+def test_lookup_modes():
+    collection = mongomock.MongoClient().db.clubs
+    for name in ['Film Club', 'Film Society', 'Chess Club', 'Filmmakers']:
+        collection.insert_one(with_name_key({'club_name': name}))
+    names = lambda q, mode: sorted(c['club_name'] for c in find_by_name(collection, q, mode))
+    assert names("FILM club", 'exact') == ['Film Club']
+    assert names("film", 'prefix') == ['Film Club', 'Film Society', 'Filmmakers']
+    assert names("club", 'contains') == ['Chess Club', 'Film Club']
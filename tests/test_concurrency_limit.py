@@ -0,0 +1,73 @@
+"""
+Unit tests for the Gemini concurrency limiter
+"""
+import asyncio
+import threading
+import time
+
+import pytest
+
+from concurrency_limit import AsyncConcurrencyLimiter, ConcurrencyLimiter, Overloaded
+
+
+def hold(limiter, release, entered):
+    with limiter.slot():
+        entered.release()
+        release.wait(5)
+
+
+def test_queue_full_rejected_fast_with_retry_after():
+    limiter = ConcurrencyLimiter(max_concurrent=1, max_queue=1, max_wait=5)
+    release, entered = threading.Event(), threading.Semaphore(0)
+    holder = threading.Thread(target=hold, args=(limiter, release, entered))
+    holder.start()
+    entered.acquire()
+    waiter = threading.Thread(target=hold, args=(limiter, release, entered))
+    waiter.start()
+    while limiter.stats()['queue_depth'] < 1:
+        time.sleep(0.001)
+
+    start = time.monotonic()
+    with pytest.raises(Overloaded) as e:
+        limiter.acquire()
+    assert time.monotonic() - start < 0.5
+    assert e.value.retry_after >= 1
+
+    release.set()
+    holder.join()
+    waiter.join()
+    stats = limiter.stats()
+    assert stats['admitted'] == 2 and stats['rejected'] == 1
+    assert stats['active'] == 0 and stats['queue_depth'] == 0
+    assert stats['peak_queue_depth'] == 1 and stats['max_wait_ms'] > 0
+
+
+def test_wait_times_out():
+    limiter = ConcurrencyLimiter(max_concurrent=1, max_queue=4, max_wait=0.05)
+    limiter.acquire()
+    with pytest.raises(Overloaded):
+        limiter.acquire()
+    limiter.release()
+    assert limiter.stats()['timeouts'] == 1
+    with limiter.slot():
+        assert limiter.stats()['active'] == 1
+
+
+def test_async_limiter_bounds_concurrency():
+    async def run():
+        limiter = AsyncConcurrencyLimiter(max_concurrent=2, max_queue=1, max_wait=5)
+        peak = 0
+
+        async def call():
+            nonlocal peak
+            async with limiter.slot():
+                peak = max(peak, limiter.active)
+                await asyncio.sleep(0.01)
+
+        results = await asyncio.gather(*(call() for _ in range(4)), return_exceptions=True)
+        return limiter, peak, results
+
+    limiter, peak, results = asyncio.run(run())
+    assert peak == 2
+    assert sum(isinstance(r, Overloaded) for r in results) == 1
+    assert limiter.stats()['admitted'] == 3
@@ -0,0 +1,76 @@
+"""
+Unit tests for the Gemini context-cache (static prompt prefix) wrapper
+"""
+from context_cache import PrefixCache
+
+
+class FakeGemini:
+    """stands in for CachedContent.create / GenerativeModel.from_cached_content"""
+
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.created = []
+        self.deleted = []
+
+    def create(self, prefix, ttl):
+        if self.fail:
+            raise RuntimeError("cached content too small")
+        handle = f"cachedContents/{len(self.created)}"
+        self.created.append((handle, prefix, ttl))
+        return handle
+
+    def bind(self, handle):
+        return ('model', handle)
+
+    def cache(self, **kwargs):
+        return PrefixCache(self.create, self.bind, delete=self.deleted.append, **kwargs)
+
+
+def test_handle_reused_across_requests():
+    gemini = FakeGemini()
+    cache = gemini.cache()
+    prefixes = []
+    build = lambda: prefixes.append(1) or "preamble + catalog v1"
+    models = [cache.model_for(1, build) for _ in range(5)]
+    assert models == [('model', 'cachedContents/0')] * 5
+    assert len(gemini.created) == 1 and len(prefixes) == 1
+    assert cache.stats()['hits'] == 4 and cache.stats()['creates'] == 1
+
+
+def test_new_catalog_version_replaces_handle():
+    gemini = FakeGemini()
+    cache = gemini.cache()
+    cache.model_for(1, lambda: "v1")
+    assert cache.model_for(2, lambda: "v2") == ('model', 'cachedContents/1')
+    assert gemini.deleted == ['cachedContents/0']
+    assert cache.stats()['version'] == 2
+
+
+def test_handle_refreshed_before_ttl_runs_out():
+    gemini = FakeGemini()
+    cache = gemini.cache(ttl=0)
+    cache.model_for(1, lambda: "v1")
+    cache.model_for(1, lambda: "v1")
+    assert len(gemini.created) == 2
+
+
+def test_failure_falls_back_and_backs_off():
+    gemini = FakeGemini(fail=True)
+    cache = gemini.cache(retry_after=60)
+    assert cache.model_for(1, lambda: "v1") is None
+    gemini.fail = False
+    assert cache.model_for(1, lambda: "v1") is None   # not retried yet
+    assert gemini.created == []
+    stats = cache.stats()
+    assert stats['failures'] == 1 and stats['fallbacks'] == 2
+
+
+def test_invalidate_recreates_on_next_call():
+    gemini = FakeGemini()
+    cache = gemini.cache()
+    cache.model_for(1, lambda: "v1")
+    cache.invalidate(2)      # other version: no-op
+    assert gemini.deleted == []
+    cache.invalidate(1)
+    assert gemini.deleted == ['cachedContents/0']
+    assert cache.model_for(1, lambda: "v1") == ('model', 'cachedContents/1')
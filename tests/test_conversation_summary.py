@@ -0,0 +1,50 @@
+"""
+Unit tests for rolling session summaries and the history token budget
+"""
+import pytest
+
+from conversation_summary import SessionSummarizer, build_history_block, extractive_summary
+
+
+def msg(role, text, ts=0):
+    return {'role': role, 'text': text, 'ts': ts}
+
+
+def test_history_block_keeps_newest_turns_within_budget():
+    messages = [msg('user', 'a' * 40), msg('assistant', 'b' * 40), msg('user', 'c' * 40)]
+    block = build_history_block("", messages, budget=30)
+    assert block.splitlines() == ["Assistant: " + 'b' * 40, "User: " + 'c' * 40]
+
+
+def test_history_block_puts_summary_first_and_trims_it():
+    block = build_history_block("likes robots " * 50, [msg('user', 'hi')], budget=40)
+    lines = block.splitlines()
+    assert lines[0].startswith("Summary of earlier conversation: likes robots")
+    assert lines[-1] == "User: hi"
+    assert len(block) // 4 <= 40
+
+
+def test_extractive_summary_keeps_user_asks():
+    summary = extractive_summary("", [msg('user', 'robotics?'), msg('assistant', 'Robotics Club')])
+    assert summary == "User asked: robotics?."
+
+
+def test_summarizer_folds_aged_out_messages():
+    mongomock = pytest.importorskip('mongomock')
+    db = mongomock.MongoClient().db
+    db.sessions.insert_one({'user_id': 'u', 'session_id': 's'})
+    db.messages.insert_many([
+        {'user_id': 'u', 'session_id': 's', 'role': 'user', 'text': f'q{i}', 'ts': i} for i in range(6)
+    ])
+    seen = []
+
+    def summarize(previous, messages):
+        seen.append([m['text'] for m in messages])
+        return previous + "".join(m['text'] for m in messages)
+
+    summarizer = SessionSummarizer(db.sessions, db.messages, summarize, window=2, min_batch=2)
+    assert summarizer.update('u', 's') == "q0q1q2q3"
+    assert summarizer.update('u', 's') == "q0q1q2q3"      # nothing new aged out
+    session = db.sessions.find_one({'user_id': 'u'})
+    assert session['summary_through'] == 3
+    assert seen == [['q0', 'q1', 'q2', 'q3']]
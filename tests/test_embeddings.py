@@ -0,0 +1,63 @@
+"""
+Unit tests for the local embedding index (offline, hashing embedder)
+"""
+import numpy as np
+
+from embeddings import EmbeddingIndex, HashingEmbedder
+
+CLUBS = {
+    '1': {'club_name': 'Robotics Club', 'description': 'Build robots for competitions.', 'majors': 'Mechanical Engineering'},
+    '2': {'club_name': 'Film Club', 'description': 'Watch and make movies.', 'majors': 'Literature'},
+    '3': {'club_name': 'Finance Association', 'description': 'Markets and investing.', 'majors': 'Economics, Finance'},
+}
+
+
+def test_hashing_embedder_is_deterministic_and_normalised():
+    embedder = HashingEmbedder(dim=64)
+    a = embedder.embed(["robotics club", ""])
+    b = embedder.embed(["robotics club", ""])
+    assert a.dtype == np.float32 and a.shape == (2, 64)
+    assert np.array_equal(a, b)
+    assert abs(np.linalg.norm(a[0]) - 1.0) < 1e-5
+    assert not a[1].any()
+
+
+def test_search_and_incremental_updates():
+    index = EmbeddingIndex(HashingEmbedder())
+    index.build(CLUBS)
+    assert index.search("robot building", k=1)[0][0] == '1'
+    index.upsert('4', {'club_name': 'Chess Club', 'description': 'Play chess.', 'majors': 'Any'})
+    assert index.search("chess", k=1)[0][0] == '4'
+    index.remove('1')
+    assert '1' not in [did for did, _ in index.search("robot building", k=4)]
+    assert len(index) == 3
+
+
+def test_memory_mapped_matrix_is_reused(tmp_path):
+    path = str(tmp_path / "clubs.npy")
+    first = EmbeddingIndex(HashingEmbedder(), path=path)
+    first.build(CLUBS)
+
+    second = EmbeddingIndex(HashingEmbedder(), path=path)
+    second.build(CLUBS)
+    assert isinstance(second._matrix, np.memmap)
+    assert second.search("movies", k=1)[0][0] == '2'
+
+    # copy-on-write: a local update never touches the shared file
+    second.upsert('2', {'club_name': 'Film Club', 'description': 'Cinema nights.', 'majors': 'Media'})
+    [mapped] = tmp_path.glob("clubs.*.npy")
+    assert np.array_equal(np.load(mapped), first._matrix)
+
+
+def test_each_catalog_maps_its_own_matrix_file(tmp_path):
+    path = str(tmp_path / "clubs.npy")
+    first = EmbeddingIndex(HashingEmbedder(), path=path)
+    first.build(CLUBS)
+    changed = dict(CLUBS, extra={'club_name': 'Chess Club', 'description': 'Weekly games.', 'majors': 'Math'})
+    second = EmbeddingIndex(HashingEmbedder(), path=path)
+    second.build(changed)
+
+    # the first worker's mapping still holds its own catalog's rows
+    assert first._matrix.shape[0] == len(CLUBS) and second._matrix.shape[0] == len(changed)
+    assert first.search("movies", k=1)[0][0] == '2'
+    assert len(list(tmp_path.iterdir())) == 1   # the superseded matrix is removed, no temp files left
@@ -0,0 +1,33 @@
+"""
+Unit tests for the retrieval-only chat answers
+"""
+from fallback_answer import NO_MATCH_TEXT, FallbackResponder, render_answer
+
+CLUBS = [
+    {'club_name': 'Robotics Club', 'description': 'Build robots.', 'majors': 'ME, ECE',
+     'link': 'https://example.edu/robotics'},
+    {'club_name': 'Film Club', 'description': '', 'majors': None},
+]
+
+
+def test_render_lists_clubs_in_order():
+    text = render_answer(CLUBS)
+    lines = text.splitlines()
+    assert lines[2] == "- Robotics Club: Build robots. (Majors: ME, ECE) https://example.edu/robotics"
+    assert lines[3] == "- Film Club"
+
+
+def test_responder_counts_reasons_and_misses():
+    searches = []
+
+    def search(message, k):
+        searches.append((message, k))
+        return CLUBS[:1] if 'robot' in message else []
+
+    responder = FallbackResponder(search, limit=3)
+    assert 'Robotics Club' in responder.answer('robot clubs?', 'fast')
+    assert responder.answer('knitting', 'circuit_open') == NO_MATCH_TEXT
+    assert searches == [('robot clubs?', 3), ('knitting', 3)]
+    assert responder.stats() == {
+        'answers': 2, 'by_reason': {'fast': 1, 'circuit_open': 1}, 'no_match': 1
+    }
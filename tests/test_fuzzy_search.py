@@ -0,0 +1,45 @@
+"""
+Unit tests for the trigram fuzzy name search
+"""
+from fuzzy_search import TrigramIndex, bounded_levenshtein, name_distance, trigrams
+
+CLUBS = {
+    '1': {'club_name': 'Robotics Club'},
+    '2': {'club_name': 'Robotics Club'},
+    '3': {'club_name': 'Rowing Team'},
+    '4': {'club_name': 'Chess Club'},
+    '5': {'club_name': 'Finance Association'},
+}
+
+
+def index():
+    t = TrigramIndex(limit=10)
+    t.build(CLUBS)
+    return t
+
+
+def test_trigrams_and_distances():
+    assert trigrams("ab") == {'  a', ' ab', 'ab '}
+    assert bounded_levenshtein("robtics", "robotics", 2) == 1
+    assert bounded_levenshtein("chess", "robotics club", 2) == 3
+    assert name_distance("robtics", "robotics club", 2) == 1
+    assert name_distance("finanse asociation", "finance association", 3) == 2
+
+
+def test_typos_find_the_club():
+    t = index()
+    assert [c['club_name'] for c in t.search("robtics")] == ['Robotics Club', 'Robotics Club']
+    assert [c['club_name'] for c in t.search("chss clb")] == ['Chess Club']
+    assert t.search("Finanse asociation")[0]['club_name'] == 'Finance Association'
+    assert t.search("zzzzzz") == [] and t.search("") == []
+    assert t.stats()['no_match'] == 1
+
+
+def test_follows_catalog_writes():
+    t = index()
+    t.upsert('6', {'club_name': 'Quantum Computing Club'})
+    t.remove('4')
+    assert t.search("quantm")[0]['club_name'] == 'Quantum Computing Club'
+    assert t.search("chess club") == []
+    t.remove('1')
+    assert len(t.search("robotics")) == 1
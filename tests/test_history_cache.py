@@ -0,0 +1,45 @@
+"""
+Unit tests for the per-session recent-history ring buffer
+"""
+from history_cache import HistoryCache
+
+
+def msg(role, text):
+    return {'role': role, 'text': text}
+
+
+def test_miss_fill_then_append_keeps_last_n():
+    cache = HistoryCache(max_messages=3)
+    assert cache.get('u', 's') is None
+    cache.fill('u', 's', [msg('user', 'a'), msg('assistant', 'b')])
+    cache.append('u', 's', [msg('user', 'c'), msg('assistant', 'd')])
+    assert [m['text'] for m in cache.get('u', 's')] == ['b', 'c', 'd']
+    assert cache.stats()['hits'] == 1 and cache.stats()['misses'] == 1
+
+
+def test_append_ignores_unknown_sessions():
+    cache = HistoryCache()
+    cache.append('u', 's', [msg('user', 'a')])
+    assert cache.get('u', 's') is None
+
+
+def test_lru_eviction_by_sessions_and_bytes():
+    cache = HistoryCache(max_sessions=2)
+    cache.fill('u', 'a', [])
+    cache.fill('u', 'b', [])
+    cache.get('u', 'a')
+    cache.fill('u', 'c', [])
+    assert cache.get('u', 'b') is None
+    assert cache.get('u', 'a') == []
+
+    cache = HistoryCache(max_bytes=200)
+    cache.fill('u', 'a', [msg('user', 'x' * 100)])
+    cache.fill('u', 'b', [msg('user', 'y' * 100)])
+    assert cache.get('u', 'a') is None
+    assert cache.stats()['bytes'] <= 200
+
+
+def test_ttl_expiry():
+    cache = HistoryCache(ttl=0)
+    cache.fill('u', 's', [msg('user', 'a')])
+    assert cache.get('u', 's') is None
@@ -0,0 +1,60 @@
+"""
+Unit tests for the keyword intent router
+"""
+from intent_router import IntentRouter
+
+CLUBS = {
+    '1': {'club_name': 'Film Club', 'link': 'https://example.edu/film',
+          'description': 'Movies every week.', 'majors': 'Finance, Economics'},
+    '2': {'club_name': 'Chess Club', 'link': 'https://example.edu/chess',
+          'description': 'Weekly games.', 'majors': ['Statistics', 'Mathematics']},
+    '3': {'club_name': 'Data Science Society', 'link': '',
+          'description': 'Kaggle nights.', 'majors': 'Statistics'},
+}
+
+
+def router():
+    r = IntentRouter(limit=10)
+    r.build(CLUBS)
+    return r
+
+
+def test_link_lookup():
+    r = router()
+    assert r.route("Link for Film Club?") == ('link', "Film Club: https://example.edu/film")
+    assert r.route("what's the website of chess") == ('link', "Chess Club: https://example.edu/chess")
+    assert r.route("film club link") == ('link', "Film Club: https://example.edu/film")
+    # known club without a link is left to the LLM
+    assert r.route("link for data science society") is None
+
+
+def test_major_lookup_lists_matching_clubs():
+    intent, answer = router().route("Which clubs are for Statistics majors?")
+    assert intent == 'major'
+    assert "Chess Club" in answer and "Data Science Society" in answer and "Film Club" not in answer
+
+
+def test_about_and_list():
+    r = router()
+    assert r.route("tell me about the chess club") == ('about', "Chess Club: Weekly games. (Majors: Statistics, Mathematics) https://example.edu/chess")
+    intent, answer = r.route("list all clubs")
+    assert intent == 'list' and answer.startswith("There are 3 clubs")
+
+
+def test_unknown_or_open_questions_go_to_llm():
+    r = router()
+    assert r.route("what is the best club for meeting people?") is None
+    assert r.route("clubs for Underwater Basket majors") is None
+    assert r.route("I like robots, any ideas?") is None
+    stats = r.stats()
+    assert stats['messages'] == 3 and stats['skipped_llm_calls'] == 0
+
+
+def test_follows_catalog_writes():
+    r = router()
+    r.upsert('4', {'club_name': 'Robotics Club', 'link': 'https://example.edu/robots', 'majors': 'ME'})
+    assert r.route("link for robotics") == ('link', "Robotics Club: https://example.edu/robots")
+    r.remove('1')
+    assert r.route("link for film club") is None
+    assert r.route("clubs for finance majors") is None
+    assert r.stats()['by_intent'] == {'link': 1}
@@ -0,0 +1,118 @@
+"""
+Unit tests for the LLM backends (Gemini adapter against a fake model, offline fake)
+"""
+import asyncio
+
+import pytest
+from google.api_core import exceptions as google_exceptions
+
+from context_cache import PrefixCache
+from llm_backend import FakeBackend, FakeLLMError, GeminiBackend, LLMBackend, LLMTimeout, Prefix
+
+
+class Chunk:
+    def __init__(self, text):
+        self._text = text
+
+    @property
+    def text(self):
+        if self._text is None:
+            raise ValueError("no text parts")
+        return self._text
+
+
+class FakeModel:
+    def __init__(self, name, fail=None):
+        self.name = name
+        self.fail = fail
+        self.prompts = []
+
+    def generate_content(self, prompt, stream=False, request_options=None):
+        self.prompts.append((prompt, request_options))
+        if self.fail:
+            raise self.fail
+        if stream:
+            return iter([Chunk('Hel'), Chunk(None), Chunk('lo')])
+        return Chunk('Hello')
+
+
+def test_gemini_generate_and_stream():
+    model = FakeModel('plain')
+    backend = GeminiBackend(lambda: model)
+    assert backend.generate("prompt", timeout=5) == 'Hello'
+    assert list(backend.stream("prompt")) == ['Hel', 'lo']
+    assert model.prompts[0] == ("prompt", {'timeout': 5})
+
+
+def test_gemini_uses_cached_prefix_and_falls_back():
+    plain, cached = FakeModel('plain'), FakeModel('cached')
+    prefix_cache = PrefixCache(lambda text, ttl: 'handle', lambda handle: cached)
+    backend = GeminiBackend(lambda: plain, prefix_cache)
+    used = []
+    prefix = Prefix(1, lambda: "static", "User: hi", lambda: used.append(1))
+    backend.generate("full prompt", prefix=prefix)
+    assert cached.prompts == [("User: hi", None)] and plain.prompts == []
+    assert used == [1]
+
+    cached.fail = google_exceptions.NotFound("cached content expired")
+    backend.generate("full prompt", timeout=5, prefix=prefix)
+    assert plain.prompts[0][0] == "full prompt"
+    assert 0 < plain.prompts[0][1]['timeout'] <= 5   # only the time left
+    assert prefix_cache.stats()['version'] is None
+    assert used == [1]   # the plain retry is not a cached-prefix request
+
+
+@pytest.mark.parametrize('error, raised', [
+    (google_exceptions.DeadlineExceeded("slow"), LLMTimeout),
+    (google_exceptions.TooManyRequests("quota"), google_exceptions.TooManyRequests),
+    (google_exceptions.ServiceUnavailable("down"), google_exceptions.ServiceUnavailable),
+])
+def test_gemini_upstream_errors_on_cached_prefix_are_not_retried(error, raised):
+    plain, cached = FakeModel('plain'), FakeModel('cached', fail=error)
+    prefix_cache = PrefixCache(lambda text, ttl: 'handle', lambda handle: cached)
+    backend = GeminiBackend(lambda: plain, prefix_cache)
+    with pytest.raises(raised):
+        backend.generate("full prompt", timeout=5, prefix=Prefix(1, lambda: "static", "User: hi"))
+    assert plain.prompts == []
+    assert prefix_cache.stats()['version'] == 1   # the handle is fine, keep it
+
+
+def test_gemini_timeouts_and_failure_classification():
+    backend = GeminiBackend(lambda: FakeModel('plain', fail=google_exceptions.DeadlineExceeded("slow")))
+    with pytest.raises(LLMTimeout):
+        backend.generate("prompt")
+    assert backend.is_failure(google_exceptions.ServiceUnavailable("down"))
+    assert backend.is_failure(google_exceptions.TooManyRequests("quota"))
+    assert not backend.is_failure(google_exceptions.InvalidArgument("bad"))
+
+
+def test_fake_backend_tokens_and_latency():
+    backend = FakeBackend(latency=0, tokens_per_second=10000, reply_tokens=12)
+    chunks = list(backend.stream("...\n\nUser: robots?\n\nAssistant:"))
+    assert len(chunks) == 12
+    assert "".join(chunks).startswith("This is a simulated answer to: robots?")
+    assert asyncio.run(backend.agenerate("User: hi")) == backend.generate("User: hi")
+    assert backend.stats()['calls'] == 3
+
+
+def test_fake_backend_errors_and_timeouts():
+    with pytest.raises(FakeLLMError):
+        FakeBackend(latency=0, error_rate=1).generate("x")
+    slow = FakeBackend(latency=0.5)
+    with pytest.raises(LLMTimeout):
+        slow.generate("x", timeout=0.01)
+    assert slow.stats()['timeouts'] == 1
+
+
+def test_incomplete_backend_fails_at_construction():
+    class SyncOnly(LLMBackend):
+        def generate(self, prompt, timeout=None, prefix=None):
+            return "hi"
+
+        def stream(self, prompt, timeout=None, prefix=None):
+            yield "hi"
+
+    with pytest.raises(TypeError, match="agenerate"):
+        SyncOnly()
+    with pytest.raises(TypeError):
+        LLMBackend()
@@ -0,0 +1,38 @@
+"""
+Unit tests for the shared Gemini model registry
+"""
+import threading
+
+from model_registry import ModelRegistry
+
+
+def test_same_key_returns_same_instance_across_threads():
+    built = []
+
+    def factory(name, config):
+        built.append((name, config))
+        return object()
+
+    registry = ModelRegistry(factory)
+    seen = []
+    threads = [
+        threading.Thread(target=lambda: seen.append(registry.get('gemini', temperature=0.2)))
+        for _ in range(16)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(built) == 1
+    assert all(m is seen[0] for m in seen)
+
+
+def test_config_is_part_of_the_key_and_none_is_ignored():
+    registry = ModelRegistry(lambda name, config: (name, tuple(sorted(config.items()))))
+    a = registry.get('gemini', temperature=0.2, max_output_tokens=None)
+    b = registry.get('gemini', temperature=0.2)
+    c = registry.get('gemini', temperature=0.7)
+    assert a is b
+    assert a != c
+    assert a == ('gemini', (('temperature', 0.2),))
@@ -0,0 +1,60 @@
+"""
+Unit tests for keyset pagination of the club listing
+"""
+import pytest
+
+from club_names import NAME_FIELD, with_name_key
+from pagination import decode_cursor, encode_cursor, page, parse_fields, parse_limit
+
+mongomock = pytest.importorskip('mongomock')
+
+
+def clubs_collection():
+    collection = mongomock.MongoClient().db.clubs
+    names = ['Chess Club', 'Film Club', 'Chess Club', 'AI Society', 'Robotics Club']
+    collection.insert_many([with_name_key({'club_name': n, 'link': f'https://example.edu/{i}'})
+                            for i, n in enumerate(names)])
+    return collection
+
+
+def test_pages_cover_every_club_once_in_order():
+    collection = clubs_collection()
+    seen, cursor = [], None
+    while True:
+        clubs, cursor = page(collection, 2, cursor)
+        seen += [(c['club_name'], c['link']) for c in clubs]
+        if cursor is None:
+            break
+    assert [n for n, _ in seen] == ['AI Society', 'Chess Club', 'Chess Club', 'Film Club', 'Robotics Club']
+    assert len(set(seen)) == 5
+
+
+def test_projection_drops_unrequested_sort_keys():
+    clubs, cursor = page(clubs_collection(), 1, fields=['link'])
+    assert clubs == [{'link': 'https://example.edu/3'}]
+    assert decode_cursor(cursor)[0] == 'ai society'
+
+
+def test_nameless_clubs_do_not_end_the_listing_early():
+    collection = mongomock.MongoClient().db.clubs
+    collection.insert_many([with_name_key(c) for c in
+                            [{'link': 'none'}, {'club_name': None}, {'club_name': 'Alpha'}, {'club_name': 'Beta'}]])
+    collection.update_many({NAME_FIELD: {'$exists': False}}, {'$set': {NAME_FIELD: ''}})   # what backfill does
+    seen, cursor = [], None
+    while True:
+        clubs, cursor = page(collection, 1, cursor)
+        seen += [c.get('club_name') for c in clubs]
+        if cursor is None:
+            break
+    assert seen[2:] == ['Alpha', 'Beta'] and len(seen) == 4
+
+
+def test_cursor_round_trip_and_bad_input():
+    assert decode_cursor(encode_cursor({NAME_FIELD: 'film club', '_id': 7})) == ('film club', 7)
+    with pytest.raises(ValueError):
+        decode_cursor('not-a-cursor')
+    with pytest.raises(ValueError):
+        parse_fields('link,$where')
+    assert parse_limit('1000', 50, 500) == 500 and parse_limit(None, 50, 500) == 50
+    with pytest.raises(ValueError):
+        parse_limit('0', 50, 500)
@@ -0,0 +1,63 @@
+"""
+Unit tests for token-budgeted prompt assembly
+"""
+import pytest
+
+from prompt_assembly import ApproxTokenizer, PromptAssembler, Section, get_token_counter
+
+
+def sections():
+    return [
+        Section.text('preamble', "You help students find clubs.", required=True),
+        Section('catalog', [f"- Club {i}: robots and drones" for i in range(10)], priority=10,
+                header="Clubs:\n"),
+        Section('history', [f"User: question {i}" for i in range(5)], priority=20, drop='head',
+                header="Previous conversation:\n"),
+        Section.text('user', "User: any robotics clubs?\n\nAssistant:", required=True),
+    ]
+
+
+def test_everything_kept_when_under_budget():
+    prompt = PromptAssembler(budget=10000).assemble(sections())
+    assert not prompt.truncated and not prompt.over_budget
+    assert prompt.text.startswith("You help students find clubs.\n\nClubs:\n- Club 0")
+    assert prompt.text.endswith("User: any robotics clubs?\n\nAssistant:")
+    assert prompt.tokens == ApproxTokenizer()(prompt.text)
+
+
+def test_lowest_priority_trimmed_first_from_its_end():
+    full = PromptAssembler(budget=10000).assemble(sections()).tokens
+    assembler = PromptAssembler(budget=full - 20)
+    prompt = assembler.assemble(sections())
+    assert prompt.tokens <= assembler.budget
+    assert prompt.sections['history']['dropped'] == 0
+    assert 0 < prompt.sections['catalog']['dropped'] < 10
+    assert "- Club 0" in prompt.text and "- Club 9" not in prompt.text
+    assert assembler.stats()['dropped_items'] == {'catalog': prompt.sections['catalog']['dropped']}
+
+
+def test_sections_dropped_entirely_then_oldest_history():
+    required = PromptAssembler(budget=10000).assemble(
+        [s for s in sections() if s.required]).tokens
+    prompt = PromptAssembler(budget=required + 12).assemble(sections())
+    assert "Clubs:" not in prompt.text
+    assert "question 4" in prompt.text and "question 0" not in prompt.text
+    assert prompt.tokens <= required + 12
+
+
+def test_required_sections_never_trimmed():
+    prompt = PromptAssembler(budget=5).assemble(sections())
+    assert prompt.over_budget
+    assert prompt.text == "You help students find clubs.\n\nUser: any robotics clubs?\n\nAssistant:"
+
+
+def test_assembly_is_deterministic():
+    assembler = PromptAssembler(budget=60)
+    assert assembler.assemble(sections()).text == assembler.assemble(sections()).text
+
+
+def test_token_counter_lookup():
+    assert get_token_counter('chars')("abcdefgh") == 2
+    assert get_token_counter('approx')("hello, world") == 5
+    with pytest.raises(ValueError):
+        get_token_counter('nope')
@@ -0,0 +1,80 @@
+"""
+Unit tests for the /chat answer caches
+"""
+from response_cache import ResponseCache, cache_key, normalize_message
+
+
+def test_normalized_questions_share_a_key():
+    assert normalize_message("  What ROBOTICS clubs are there?? ") == "what robotics clubs are there"
+    assert cache_key("What robotics clubs are there?", 3) == cache_key("what robotics  clubs are there", 3)
+    assert cache_key("what robotics clubs", 3) != cache_key("what robotics clubs", 4)
+    assert cache_key("hi", 1, "User: a") != cache_key("hi", 1, "User: b")
+
+
+def test_hit_miss_and_lru_eviction_by_bytes():
+    cache = ResponseCache(max_bytes=3 * (ResponseCache.ENTRY_OVERHEAD + 20), ttl=60)
+    for key in ("a", "b", "c"):
+        cache.put(key, "x" * 10, catalog_version=1)
+    assert cache.get("a", 1) == "x" * 10      # a is now most recently used
+    cache.put("d", "x" * 10, catalog_version=1)
+    assert cache.get("b", 1) is None           # b was least recently used
+    assert cache.get("a", 1) is not None
+    stats = cache.stats()
+    assert stats['evictions'] == 1
+    assert stats['hits'] == 2 and stats['misses'] == 1
+
+
+def test_ttl_and_catalog_version_invalidate():
+    cache = ResponseCache(ttl=0)
+    cache.put("a", "answer", catalog_version=1)
+    assert cache.get("a", 1) is None
+
+    cache = ResponseCache(ttl=60)
+    cache.put("a", "answer", catalog_version=1)
+    assert cache.get("a", 2) is None
+    assert cache.stats()['entries'] == 0
+    assert cache.stats()['version_flushes'] == 1
+
+
+def test_late_put_for_an_older_catalog_version_is_ignored():
+    cache = ResponseCache(ttl=60)
+    cache.put("a", "answer", catalog_version=2)
+    cache.put("b", "answer", catalog_version=2)
+    cache.put("stale", "old answer", catalog_version=1)   # turn started before the club write
+    assert cache.get("stale", 1) is None
+    assert cache.get("a", 2) == "answer"
+    stats = cache.stats()
+    assert stats['entries'] == 2 and stats['catalog_version'] == 2
+    assert stats['version_flushes'] == 0 and stats['stale_calls'] == 2
+
+
+def test_semantic_cache_serves_paraphrases_within_version_and_scope():
+    from embeddings import HashingEmbedder
+    from response_cache import SemanticResponseCache
+
+    cache = SemanticResponseCache(HashingEmbedder(), capacity=2, threshold=0.8)
+    cache.put("What robotics clubs are there?", "Robotics Club", catalog_version=1, scope="s")
+    assert cache.get("which robotics clubs are there", 1, scope="s") == "Robotics Club"
+    assert cache.get("which robotics clubs are there", 1, scope="other") is None
+    assert cache.get("any finance clubs?", 1, scope="s") is None
+    assert cache.get("which robotics clubs are there", 2, scope="s") is None
+    assert cache.stats()['saved_llm_calls'] == 1
+
+    cache.put("What robotics clubs are there?", "Robotics Club v2", catalog_version=2, scope="s")
+    cache.put("What robotics clubs are there?", "late answer", catalog_version=1, scope="s")
+    assert cache.get("which robotics clubs are there", 2, scope="s") == "Robotics Club v2"
+    assert cache.stats()['catalog_version'] == 2
+
+
+def test_semantic_cache_evicts_least_recently_used():
+    from embeddings import HashingEmbedder
+    from response_cache import SemanticResponseCache
+
+    cache = SemanticResponseCache(HashingEmbedder(), capacity=2, threshold=0.95)
+    cache.put("robotics", "r", 1)
+    cache.put("finance", "f", 1)
+    assert cache.get("robotics", 1) == "r"
+    cache.put("film", "m", 1)
+    assert cache.get("finance", 1) is None
+    assert cache.get("robotics", 1) == "r"
+    assert cache.stats()['evictions'] == 1
@@ -0,0 +1,40 @@
+"""
+Unit tests for the BM25 club index
+"""
+from retrieval import BM25Index, tokenize
+
+CLUBS = {
+    '1': {'club_name': 'Robotics Club', 'description': 'Build robots for competitions.', 'majors': 'Mechanical Engineering'},
+    '2': {'club_name': 'Film Club', 'description': 'Watch and make movies.', 'majors': ['Literature', 'Media']},
+    '3': {'club_name': 'Finance Association', 'description': 'Markets and investing.', 'majors': 'Economics, Finance'},
+}
+
+
+def test_tokenize_drops_stopwords_and_folds_plurals():
+    assert tokenize("What robotics clubs are there?") == ['robotic']
+
+
+def test_search_ranks_name_match_first():
+    index = BM25Index()
+    index.build(CLUBS)
+    hits = index.search("any robotics clubs?", k=2)
+    assert hits[0][0] == '1'
+    assert len(hits) == 1
+
+
+def test_search_matches_majors_list():
+    index = BM25Index()
+    index.build(CLUBS)
+    assert index.search("media", k=3)[0][0] == '2'
+
+
+def test_incremental_upsert_and_remove():
+    index = BM25Index()
+    index.build(CLUBS)
+    index.upsert('4', {'club_name': 'Chess Club', 'description': 'Play chess.', 'majors': 'Any'})
+    assert index.search("chess")[0][0] == '4'
+    index.upsert('1', {'club_name': 'Drone Team', 'description': 'Fly drones.', 'majors': 'Aerospace'})
+    assert index.search("robotics") == []
+    index.remove('4')
+    assert index.search("chess") == []
+    assert len(index) == 3
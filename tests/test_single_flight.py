@@ -0,0 +1,89 @@
+"""
+Unit tests for request coalescing
+"""
+import threading
+import time
+
+import pytest
+
+from single_flight import FlightAborted, MongoFlightLock, SingleFlight
+
+
+def test_concurrent_callers_share_one_call():
+    flight = SingleFlight()
+    calls = []
+    release = threading.Event()
+
+    def work():
+        calls.append(1)
+        release.wait(2)
+        return "answer"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flight.do("k", work))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    while flight.stats()['shared'] < 7:
+        time.sleep(0.001)
+    release.set()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert sorted(shared for _, shared in results) == [False] + [True] * 7
+    assert all(result == "answer" for result, _ in results)
+    assert flight.stats()['in_flight'] == 0
+
+
+def test_leader_error_reaches_waiters_and_clears_flight():
+    flight = SingleFlight()
+    call, leader = flight.begin("k")
+    waiter, is_leader = flight.begin("k")
+    assert leader and not is_leader
+    flight.finish("k", call, error=RuntimeError("boom"))
+    with pytest.raises(RuntimeError):
+        flight.wait(waiter)
+    assert flight.do("k", lambda: 1) == (1, False)
+
+
+def test_mongo_lease_shares_result_across_workers():
+    mongomock = pytest.importorskip('mongomock')
+    collection = mongomock.MongoClient().db.chat_flights
+    worker_a = MongoFlightLock(collection, poll_interval=0.001)
+    worker_b = MongoFlightLock(collection, poll_interval=0.001)
+
+    assert worker_a.run("k", lambda: "answer") == ("answer", False)
+    assert worker_b.run("k", lambda: "other") == ("answer", True)
+    assert worker_b.run("k2", lambda: "other") == ("other", False)
+
+
+def test_async_single_flight_shares_one_await():
+    import asyncio
+
+    from single_flight import AsyncSingleFlight
+
+    flight = AsyncSingleFlight()
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "answer"
+
+    async def main():
+        return await asyncio.gather(*[flight.do("k", work) for _ in range(5)])
+
+    results = asyncio.run(main())
+    assert len(calls) == 1
+    assert [shared for _, shared in results] == [False, True, True, True, True]
+    assert flight.stats()['in_flight'] == 0
+
+
+def test_leader_interruptions_reach_waiters_as_plain_errors():
+    flight = SingleFlight()
+    call, leader = flight.begin("k")
+    waiter, is_leader = flight.begin("k")
+    assert leader and not is_leader
+    flight.finish("k", call, error=GeneratorExit())
+    with pytest.raises(FlightAborted):
+        flight.wait(waiter)
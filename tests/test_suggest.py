@@ -0,0 +1,46 @@
+"""
+Unit tests for the typeahead index
+"""
+from suggest import SuggestIndex
+
+CLUBS = {
+    '1': {'club_name': 'Film Club', 'majors': 'Film Studies, Finance', 'members': 40},
+    '2': {'club_name': 'Finance Association', 'majors': ['Finance'], 'members': 120},
+    '3': {'club_name': 'Fencing Team', 'majors': 'Kinesiology'},
+    '4': {'club_name': 'Chess Club', 'majors': 'Mathematics'},
+}
+
+
+def index():
+    s = SuggestIndex(limit=5)
+    s.build(CLUBS)
+    return s
+
+
+def test_prefix_suggestions_ranked_by_popularity():
+    answer = index().suggest(" FI")
+    assert [c['club_name'] for c in answer['clubs']] == ['Finance Association', 'Film Club']
+    assert answer['majors'] == [{'major': 'Finance', 'clubs': 2}, {'major': 'Film Studies', 'clubs': 1}]
+    assert index().suggest("zzz") == {'clubs': [], 'majors': []}
+    assert index().suggest("") == {'clubs': [], 'majors': []}
+
+
+def test_limit_and_cache():
+    s = index()
+    assert len(s.suggest("f", limit=1)['clubs']) == 1
+    s.suggest("f", limit=1)
+    assert s.stats()['cache_hits'] == 1
+
+
+def test_writes_update_suggestions_and_cached_prefixes():
+    s = index()
+    assert s.suggest("ch")['clubs'][0]['club_name'] == 'Chess Club'
+    assert s.suggest("fi")['clubs'][0]['club_name'] == 'Finance Association'
+    s.upsert('5', {'club_name': 'Fintech Society', 'majors': 'Finance', 'members': 500})
+    s.remove('4')
+    assert s.suggest("fi")['clubs'][0]['club_name'] == 'Fintech Society'
+    assert s.suggest("fi")['majors'][0] == {'major': 'Finance', 'clubs': 3}
+    assert s.suggest("ch")['clubs'] == []
+    s.upsert('1', {'club_name': 'Movie Club', 'majors': 'Film Studies'})
+    assert [c['club_name'] for c in s.suggest("mov")['clubs']] == ['Movie Club']
+    assert 'Film Club' not in [c['club_name'] for c in s.suggest("fil")['clubs']]
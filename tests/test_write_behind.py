@@ -0,0 +1,41 @@
+"""
+Unit tests for the write-behind queue
+"""
+import time
+
+from write_behind import WriteBehindQueue
+
+
+def test_flushes_on_batch_size():
+    batches = []
+    q = WriteBehindQueue(batches.append, max_batch=3, interval=5)
+    for i in range(3):
+        q.submit(i)
+    deadline = time.monotonic() + 2
+    while not batches and time.monotonic() < deadline:
+        time.sleep(0.005)
+    assert batches == [[0, 1, 2]]
+    q.close()
+
+
+def test_flushes_on_interval_and_drains_on_close():
+    batches = []
+    q = WriteBehindQueue(batches.append, max_batch=100, interval=0.05)
+    q.submit('a')
+    time.sleep(0.2)
+    assert batches == [['a']]
+    q.close()
+    q.submit('b')            # after shutdown items are written synchronously
+    assert batches[-1] == ['b']
+    assert q.stats()['flushed'] == 2
+
+
+def test_failed_flush_is_counted():
+    def boom(batch):
+        raise RuntimeError("db down")
+
+    q = WriteBehindQueue(boom, max_batch=1, interval=0.01)
+    q.submit('a')
+    q.close()
+    stats = q.stats()
+    assert stats['failures'] == 1 and stats['dropped'] == 1
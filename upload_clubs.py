@@ -2,6 +2,7 @@ import pandas as pd
 from pymongo import MongoClient
 import os
 from dotenv import load_dotenv
+from club_names import ensure_indexes, with_name_key
 
 # Load environment variables
 load_dotenv()
@@ -31,7 +32,8 @@ try:
         raise FileNotFoundError("sample_clubs.csv not found in current directory")
     
     df = pd.read_csv('sample_clubs.csv')
-    clubs_data = df.to_dict('records')
+    # normalized names back the indexed name lookups in hello.py
+    clubs_data = [with_name_key(club) for club in df.to_dict('records')]
     print(f"✓ Loaded {len(clubs_data)} clubs from CSV")
     
     # Check if collection already has data
@@ -46,6 +48,7 @@ try:
     # Upload to MongoDB
     print("Uploading clubs to MongoDB...")
     result = collection.insert_many(clubs_data)
+    ensure_indexes(collection)
     print(f"✓ Successfully uploaded {len(result.inserted_ids)} clubs to MongoDB")
     
     # Verify upload
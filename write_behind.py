@@ -0,0 +1,120 @@
+"""
+Write-behind queue for chat persistence.
+
+Requests hand their writes to the queue and return immediately; a background
+thread flushes them to MongoDB in batches, either when max_batch items are
+waiting or every `interval` seconds, whichever comes first. close() (also
+registered with atexit) drains whatever is still queued on shutdown.
+"""
+import atexit
+import queue
+import threading
+import time
+
+_WAKE = object()   # unblocks the flusher thread on close()
+
+
+class WriteBehindQueue:
+    """Batch items across requests and flush them from a background thread"""
+
+    def __init__(self, flush, max_batch=100, interval=0.5, max_queue=10000):
+        self._flush = flush            # list of items -> None (raises on failure)
+        self.max_batch = max_batch
+        self.interval = interval
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.flushed = 0
+        self.batches = 0
+        self.failures = 0
+        self.dropped = 0
+        self.sync_writes = 0
+        self._thread = threading.Thread(target=self._run, name='write-behind', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def submit(self, item):
+        """Queue an item; if the queue is full, write it on the caller's thread"""
+        with self._lock:
+            self.submitted += 1
+        if self._stop.is_set():
+            self._write([item])
+            return
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            # backpressure instead of unbounded memory or silent loss
+            with self._lock:
+                self.sync_writes += 1
+            self._write([item])
+
+    def _write(self, batch):
+        try:
+            self._flush(batch)
+        except Exception as e:
+            with self._lock:
+                self.failures += 1
+                self.dropped += len(batch)
+            print(f"⚠ write-behind flush failed ({len(batch)} items dropped): {e}")
+            return
+        with self._lock:
+            self.batches += 1
+            self.flushed += len(batch)
+
+    def _run(self):
+        while not self._stop.is_set():
+            deadline = time.monotonic() + self.interval
+            batch = []
+            # collect until the batch is full or the interval is up
+            while len(batch) < self.max_batch and not self._stop.is_set():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is not _WAKE:
+                    batch.append(item)
+            if batch:
+                self._write(batch)
+
+    def close(self, timeout=10):
+        """Stop the flusher and write out everything still queued"""
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        try:
+            self._queue.put_nowait(_WAKE)
+        except queue.Full:
+            pass   # the flusher is busy and will notice the stop flag
+        self._thread.join(timeout)
+        batch = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _WAKE:
+                continue
+            batch.append(item)
+            if len(batch) == self.max_batch:
+                self._write(batch)
+                batch = []
+        if batch:
+            self._write(batch)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'queued': self._queue.qsize(),
+                'submitted': self.submitted,
+                'flushed': self.flushed,
+                'batches': self.batches,
+                'failures': self.failures,
+                'dropped': self.dropped,
+                'sync_writes': self.sync_writes,
+                'max_batch': self.max_batch,
+                'interval_seconds': self.interval,
+            }